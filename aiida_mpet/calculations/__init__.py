@@ -15,10 +15,20 @@ from aiida.common.warnings import AiidaDeprecationWarning
 from aiida.plugins import DataFactory
 from aiida.engine.processes.builder import ProcessBuilder
 
+from aiida_mpet.data import ElectrodeParametersData
+from aiida_mpet.parsers.parse_raw.pickles import INPUT_DICT_NAMES
+from aiida_mpet.parsers.parse_raw.reporters import get_data_reporter, get_output_data_filename
 from aiida_mpet.utils.convert import convert_input_to_namelist_entry
 from .base import CalcJob
 from .helpers import MPETInputValidationError
 
+
+def validate_electrode_parameters(value, _, electrode):
+    """Validate that an `ElectrodeParametersData` input is intended for the electrode of the port it is passed to."""
+    if isinstance(value, ElectrodeParametersData) and value.electrode not in (None, electrode):
+        return f'the parameter set `{value.name}` is intended for the {value.electrode}, not the {electrode}.'
+
+
 class BaseMpetrunInputGenerator(CalcJob):
     """Base `CalcJob` for implementations for mpet of Mpet."""
 
@@ -111,9 +121,11 @@ class BaseMpetrunInputGenerator(CalcJob):
         spec.input('metadata.options.withmpi', valid_type=bool, default=True)  # Override default withmpi=False
         spec.input('parameters', valid_type=orm.Dict,
             help='The input parameters that are to be used to construct the system input file.')
-        spec.input('cathode_parameters', valid_type=orm.Dict,
+        spec.input('cathode_parameters', valid_type=(orm.Dict, ElectrodeParametersData),
+            validator=partial(validate_electrode_parameters, electrode='cathode'),
             help='The input parameters that are to be used to construct the cathode input file.')
-        spec.input('anode_parameters', valid_type=orm.Dict,
+        spec.input('anode_parameters', valid_type=(orm.Dict, ElectrodeParametersData),
+            validator=partial(validate_electrode_parameters, electrode='anode'),
             help='The input parameters that are to be used to construct the anode input file.')
         spec.input('settings', valid_type=orm.Dict, required=False,
             help='Optional parameters to affect the way the calculation job and the parsing are performed.')
@@ -251,20 +263,27 @@ class BaseMpetrunInputGenerator(CalcJob):
         calcinfo.remote_copy_list = remote_copy_list
         calcinfo.remote_symlink_list = remote_symlink_list
 
+        # The name of the output data file depends on the data reporter that MPET is configured to use
+        try:
+            data_reporter = get_data_reporter(self.inputs.parameters.get_dict())
+        except ValueError as exception:
+            raise exceptions.InputValidationError(str(exception)) from exception
+
         # Retrieve by default the output file and the xml file
         calcinfo.retrieve_list = []
         calcinfo.retrieve_list.append(self.metadata.options.output_filename)
         calcinfo.retrieve_list.append('./sim_output/run_info.txt')
-        calcinfo.retrieve_list.append('./sim_output/output_data.hdf5')
-        calcinfo.retrieve_list.append('./sim_output/input_dict_system.p')
-        calcinfo.retrieve_list.append('./sim_output/input_dict_derived_values.p')
+        calcinfo.retrieve_list.append(f'./sim_output/{get_output_data_filename(data_reporter)}')
         #calcinfo.retrieve_list.extend(self.xml_filepaths)
-        calcinfo.retrieve_list.append('./sim_output/input_dict_cathode.p')
-        calcinfo.retrieve_list.append('./sim_output/input_dict_anode.p')
         calcinfo.retrieve_list.append('./sim_output/daetools_config_options.txt')
         calcinfo.retrieve_list += settings.pop('ADDITIONAL_RETRIEVE_LIST', [])
         calcinfo.retrieve_list += self._internal_retrieve_list
 
+        # The pickled input dictionaries are only retrieved temporarily: the parser decodes them into output nodes
+        calcinfo.retrieve_temporary_list = [
+            os.path.join(self._OUTPUT_SUBFOLDER, f'input_dict_{name}.p') for name in INPUT_DICT_NAMES
+        ]
+
         # We might still have parser options in the settings dictionary: pop them.
         _pop_parser_options(self, settings)
 
@@ -489,8 +508,10 @@ def _pop_parser_options(calc_job_instance, settings_dict, ignore_errors=True):
     try:
         parser_name = calc_job_instance.inputs['metadata']['options']['parser_name']
         parser_class = ParserFactory(parser_name)
-        parser_opts_key = parser_class.get_parser_settings_key().upper()
-        return settings_dict.pop(parser_opts_key, None)
+        parser_opts_key = parser_class.get_parser_settings_key()
+        # The settings are not converted to upper case, so the parser options can be defined in either case
+        parser_options = settings_dict.pop(parser_opts_key.upper(), None)
+        return settings_dict.pop(parser_opts_key, parser_options)
     except (KeyError, EntryPointError, AttributeError) as exc:
         # KeyError: input 'metadata.options.parser_name' is not defined;
         # EntryPointError: there was an error loading the parser class form its entry point
@@ -43,47 +43,89 @@ class MpetrunCalculation(BaseMpetrunInputGenerator):
         """Define the process specification."""
         # yapf: disable
         super().define(spec)
-        #('metadata.options.parser_name', valid_type=str, default='mpet.mpetrun')
+        spec.input('metadata.options.parser_name', valid_type=str, default='mpet.mpetrun')
         spec.input('metadata.options.without_xml', valid_type=bool, required=False, help='If set to `True` the parser '
             'will not fail if the XML file is missing in the retrieved folder.')
 
 
         spec.output('output_parameters', valid_type=orm.Dict,
-            help='The `output_parameters` output node of the successful calculation.')
+            help='The scalar results of the calculation, e.g. the performance metrics. Arrays are never stored in this '
+                 'node, but in the optional array outputs that are selected with the `include_*` parser options.')
+        spec.output('simulation_parameters', valid_type=orm.Dict, required=False,
+            help='The scalar values of the input dictionaries pickled by MPET, i.e. the system, derived values, '
+                 'cathode and anode parameters as parsed and derived by MPET itself.')
+        spec.output('simulation_arrays', valid_type=orm.ArrayData, required=False,
+            help='The array values of the input dictionaries pickled by MPET, e.g. the particle size distributions. '
+                 'Attached unless the `include_simulation_arrays` parser option is disabled.')
+        spec.output('voltage_time', valid_type=orm.XyData, required=False,
+            help='The cell voltage as a function of time, downsampled to the number of points of the '
+                 '`downsample_points` parser option. Attached unless the `include_curves` parser option is disabled.')
+        spec.output('voltage_capacity', valid_type=orm.XyData, required=False,
+            help='The cell voltage as a function of the capacity, downsampled to the number of points of the '
+                 '`downsample_points` parser option. Attached unless the `include_curves` parser option is disabled.')
+        spec.output('output_arrays', valid_type=orm.ArrayData, required=False,
+            help='The full resolution cell level time series, i.e. time, voltage, current, capacity and filling '
+                 'fractions. Only attached if the `include_arrays` parser option is set.')
+        spec.output('output_fields', valid_type=orm.ArrayData, required=False,
+            help='The electrolyte and electrode fields and the particle concentrations, stored in time chunks with the '
+                 'encoding of the `array_encoding` parser option. Only attached if the `include_fields` parser option '
+                 'is set.')
+        spec.output('particle_statistics', valid_type=orm.ArrayData, required=False,
+            help='The mean, standard deviation, histogram and lithium rich fraction of the particle filling fractions '
+                 'per electrode and volume over time. Only attached if the `include_particle_statistics` parser option '
+                 'is set.')
+        spec.output('profiles', valid_type=orm.ArrayData, required=False,
+            help='Snapshots of the electrolyte concentration and potential and of the electrode potential across the '
+                 'cell, interpolated at the times of the `profile_times` parser option and at the states of charge of '
+                 'the `profile_soc` parser option. Only attached if either parser option is set.')
+        spec.output('differential_capacity', valid_type=orm.ArrayData, required=False,
+            help='The capacity integrated from the current per segment of the profile and the smoothed and '
+                 'regularised dQ/dV and dV/dQ curves. Only attached if the `include_differential` parser option is '
+                 'set.')
+        spec.output('parser_profile', valid_type=orm.SinglefileData, required=False,
+            help='The `cProfile` statistics of the parser, which can be loaded with `pstats`. Only attached if the '
+                 '`debug_profile` parser option is set.')
         spec.default_output_node = 'output_parameters'
-        """
+
         # Unrecoverable errors: required retrieved files could not be read, parsed or are otherwise incomplete
         spec.exit_code(301, 'ERROR_NO_RETRIEVED_TEMPORARY_FOLDER',
             message='The retrieved temporary folder could not be accessed.')
         spec.exit_code(302, 'ERROR_OUTPUT_STDOUT_MISSING',
             message='The retrieved folder did not contain the required stdout output file.')
-        spec.exit_code(303, 'ERROR_OUTPUT_XML_MISSING',
-            message='The retrieved folder did not contain the required required XML file.')
-        spec.exit_code(304, 'ERROR_OUTPUT_XML_MULTIPLE',
-            message='The retrieved folder contained multiple XML files.')
-        spec.exit_code(305, 'ERROR_OUTPUT_FILES',
-            message='Both the stdout and XML output files could not be read or parsed.')
+        spec.exit_code(303, 'ERROR_OUTPUT_DATA_MISSING',
+            message='The retrieved folder did not contain the required output data file.')
         spec.exit_code(310, 'ERROR_OUTPUT_STDOUT_READ',
             message='The stdout output file could not be read.')
         spec.exit_code(311, 'ERROR_OUTPUT_STDOUT_PARSE',
             message='The stdout output file could not be parsed.')
         spec.exit_code(312, 'ERROR_OUTPUT_STDOUT_INCOMPLETE',
             message='The stdout output file was incomplete probably because the calculation got interrupted.')
-        spec.exit_code(320, 'ERROR_OUTPUT_XML_READ',
-            message='The XML output file could not be read.')
-        spec.exit_code(321, 'ERROR_OUTPUT_XML_PARSE',
-            message='The XML output file could not be parsed.')
-        spec.exit_code(322, 'ERROR_OUTPUT_XML_FORMAT',
-            message='The XML output file has an unsupported format.')
+        spec.exit_code(320, 'ERROR_OUTPUT_DATA_READ',
+            message='The output data file could not be read.')
+        spec.exit_code(330, 'ERROR_INPUT_DICTS_MISSING',
+            message='The retrieved temporary folder did not contain all the pickled input dictionaries.')
+        spec.exit_code(331, 'ERROR_INPUT_DICTS_READ',
+            message='The pickled input dictionaries could not be read or contained objects that are not allowed.')
         spec.exit_code(340, 'ERROR_OUT_OF_WALLTIME_INTERRUPTED',
             message='The calculation stopped prematurely because it ran out of walltime but the job was killed by the '
                     'scheduler before the files were safely written to disk for a potential restart.')
         spec.exit_code(350, 'ERROR_UNEXPECTED_PARSER_EXCEPTION',
             message='The parser raised an unexpected exception.')
-        """
+        spec.exit_code(351, 'ERROR_PARSER_WORKER_FAILED',
+            message='A worker process of the parser died, e.g. because it ran out of memory while parsing the output '
+                    'data.')
+        spec.exit_code(360, 'ERROR_SOLVER_CONVERGENCE',
+            message='The calculation stopped prematurely because the daetools solver failed to converge.')
+        spec.exit_code(361, 'ERROR_OUT_OF_MEMORY',
+            message='The calculation stopped prematurely because it ran out of memory.')
+
         # Significant errors but calculation can be used to restart
         #spec.exit_code(400, 'ERROR_OUT_OF_WALLTIME',
         #    message='The calculation stopped prematurely because it ran out of walltime.')
+        spec.exit_code(410, 'ERROR_OUTPUT_DATA_PARTIAL',
+            message='The calculation was interrupted, but the output data up to the last complete time step was '
+                    'recovered and attached. The last valid simulation time is recorded in `last_valid_time` and '
+                    '`out_of_walltime` is set if the interruption was caused by the walltime.')
         
         # yapf: enable
     @classmethod
@@ -10,7 +10,7 @@ from ..utils import defaults
 from ..utils import launch
 from ..utils import options
 from ..utils import validate
-from . import cmd_launch
+from . import cmd_calculation, cmd_launch
 
 CALCS_REQUIRING_PARENT = set(['nscf'])
 
@@ -125,3 +125,47 @@ def launch_calculation(
         inputs['metadata']['dry_run'] = True
 
     launch.launch_process(CalculationFactory('mpet.mpetrun'), daemon, **inputs)
+
+
+@cmd_calculation.command('mpetrun-cached')
+@click.argument('candidates', type=click.File('r'))
+@options_core.CODE(
+    type=types.CodeParamType(entry_point='mpet.mpetrun'), help='Only consider calculations run with this code.'
+)
+@click.option(
+    '-o',
+    '--output',
+    type=click.File('w'),
+    help='Write the candidates that still need to be computed to this file, in the same format as the input.'
+)
+@decorators.with_dbenv()
+def cached_calculation(candidates, code, output):
+    """Check which candidate parameter sets have already been computed by a successful `MpetrunCalculation`.
+
+    CANDIDATES is a JSON file with a list of candidate parameter sets, each a mapping with the keys `parameters`,
+    `cathode_parameters`, `anode_parameters` and optionally `settings`.
+    """
+    import json
+
+    from aiida.cmdline.utils import echo
+
+    from aiida_mpet.utils.caching import get_cached_calculations
+
+    candidates = json.load(candidates)
+
+    try:
+        pending, cached = get_cached_calculations(candidates, code=code)
+    except ValueError as exception:
+        raise click.BadParameter(str(exception), param_hint='CANDIDATES')
+
+    if cached:
+        click.echo(f"\n{'Candidate':12s} Cached calculation")
+        click.echo(f"{'-' * 60}")
+
+        for index, node in sorted(cached.items()):
+            click.echo(f'{index:<12d} {node.process_label}<{node.pk}> {node.uuid}')
+
+    if output:
+        json.dump([candidates[index] for index in pending], output, indent=4)
+
+    echo.echo_success(f'{len(cached)} of {len(candidates)} candidates already computed, {len(pending)} remaining.')
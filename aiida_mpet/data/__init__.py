@@ -0,0 +1,6 @@
+# -*- coding: utf-8 -*-
+# pylint: disable=wildcard-import
+"""`Data` plugins of `aiida-mpet`."""
+from .electrode import *
+
+__all__ = electrode.__all__
@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+"""`Data` plugin for a named and versioned set of MPET electrode parameters."""
+import copy
+
+from aiida import orm
+
+from aiida_mpet.utils.validation.parameters import ELECTRODE_KEYWORDS, validate_parameters
+
+__all__ = ('ElectrodeParametersData',)
+
+
+class ElectrodeParametersData(orm.Data):
+    """Validated set of parameters of a cathode or anode material, as written to an MPET electrode input file.
+
+    The full parameter set is stored in the ``parameters`` attribute, while the physical parameters that are known to
+    MPET, e.g. ``muRfunc`` or ``k0``, are also stored as top-level attributes. This means that a material can be found
+    by filtering on its properties directly in the database::
+
+        QueryBuilder().append(ElectrodeParametersData, filters={'attributes.muRfunc': 'LiFePO4'})
+
+    Each parameter set has a ``name`` and an integer ``version``, such that a library of materials can evolve over time
+    without losing the provenance of calculations that used older versions. The node can be passed to the
+    ``cathode_parameters`` and ``anode_parameters`` inputs of the ``MpetrunCalculation`` instead of a plain ``Dict``.
+    """
+
+    ELECTRODES = ('cathode', 'anode')
+
+    KEY_PARAMETERS = tuple(keyword for keywords in ELECTRODE_KEYWORDS.values() for keyword in keywords)
+    """Keywords of the parameter set that are indexed as top-level attributes."""
+
+    def __init__(self, parameters=None, name=None, version=1, electrode=None, **kwargs):
+        """Construct a new instance.
+
+        :param parameters: dictionary mapping the sections of an MPET electrode input file onto their keywords
+        :param name: the name of the parameter set, e.g. the name of the material
+        :param version: the integer version of the parameter set
+        :param electrode: the electrode this parameter set is intended for, one of ``ELECTRODES``
+        """
+        super().__init__(**kwargs)
+
+        if parameters is not None:
+            self.set_parameters(parameters)
+
+        if name is not None:
+            self.name = name
+
+        if electrode is not None:
+            self.electrode = electrode
+
+        self.version = version
+
+    @property
+    def name(self):
+        """Return the name of the parameter set."""
+        return self.get_attribute('name', None)
+
+    @name.setter
+    def name(self, value):
+        """Set the name of the parameter set."""
+        if not isinstance(value, str) or not value:
+            raise ValueError(f'name should be a non-empty string, got: {value}')
+
+        self.set_attribute('name', value)
+
+    @property
+    def version(self):
+        """Return the version of the parameter set."""
+        return self.get_attribute('version', None)
+
+    @version.setter
+    def version(self, value):
+        """Set the version of the parameter set."""
+        if not isinstance(value, int) or isinstance(value, bool) or value < 1:
+            raise ValueError(f'version should be a positive integer, got: {value}')
+
+        self.set_attribute('version', value)
+
+    @property
+    def electrode(self):
+        """Return the electrode this parameter set is intended for, or `None` if it can be used for both."""
+        return self.get_attribute('electrode', None)
+
+    @electrode.setter
+    def electrode(self, value):
+        """Set the electrode this parameter set is intended for."""
+        if value not in self.ELECTRODES:
+            raise ValueError(f'electrode should be one of {self.ELECTRODES}, got: {value}')
+
+        self.set_attribute('electrode', value)
+
+    def set_parameters(self, parameters):
+        """Validate and set the parameters and index the known physical parameters as top-level attributes.
+
+        :param parameters: dictionary mapping the sections of an MPET electrode input file onto their keywords
+        :raises `~aiida_mpet.calculations.helpers.MPETInputValidationError`: if the parameters are invalid
+        """
+        validated = validate_parameters(parameters, ELECTRODE_KEYWORDS)
+
+        for keyword in self.KEY_PARAMETERS:
+            if keyword in self.attributes:
+                self.delete_attribute(keyword)
+
+        for section, content in validated.items():
+            for keyword in ELECTRODE_KEYWORDS[section]:
+                if keyword in content:
+                    self.set_attribute(keyword, content[keyword])
+
+        self.set_attribute('parameters', validated)
+
+    def get_dict(self):
+        """Return the parameters as a dictionary, with the same interface as ``Dict.get_dict``.
+
+        :return: dictionary mapping the sections of an MPET electrode input file onto their keywords
+        """
+        return copy.deepcopy(self.get_attribute('parameters', {}))
+
+    @classmethod
+    def get_latest(cls, name, electrode=None):
+        """Return the stored parameter set with the given name and the highest version.
+
+        :param name: the name of the parameter set
+        :param electrode: optionally restrict to parameter sets for the given electrode
+        :return: the `ElectrodeParametersData` node
+        :raises `~aiida.common.exceptions.NotExistent`: if no parameter set with the given name exists
+        """
+        from aiida.common.exceptions import NotExistent
+
+        filters = {'attributes.name': name}
+
+        if electrode is not None:
+            filters['attributes.electrode'] = electrode
+
+        builder = orm.QueryBuilder()
+        builder.append(cls, filters=filters)
+        builder.order_by({cls: {'attributes.version': {'order': 'desc', 'cast': 'i'}}})
+        builder.limit(1)
+
+        result = builder.first()
+
+        if result is None:
+            raise NotExistent(f'no `{cls.__name__}` with name `{name}` exists')
+
+        return result[0]
+
+    def __str__(self):
+        """Return a human readable representation of the node."""
+        return f'{super().__str__()} {self.name} v{self.version}'
@@ -5,12 +5,20 @@ All `Parser` implementations in `aiida-mpet` must use this base class, not `aiid
 """
 from aiida.parsers import Parser as _BaseParser
 
+from aiida_mpet.utils.mapping import LOG_COUNTS_KEY
+
 __all__ = ('Parser',)
 
 
 class Parser(_BaseParser):  # pylint: disable=abstract-method
     """Custom `Parser` class for `aiida-mpet` parser implementations."""
 
+    MAXIMUM_LOG_RECORDS = 100
+    """The maximum number of log records that `emit_logs` writes for a single node."""
+
+    LOG_LEVELS = ('critical', 'error', 'warning', 'info', 'debug')
+    """The log levels in order of decreasing severity, in which `emit_logs` emits the messages."""
+
     def emit_logs(self, logging_dictionaries, ignore=None):
         """Emit the messages in one or multiple "log dictionaries" through the logger of the parser.
 
@@ -25,6 +33,14 @@ class Parser(_BaseParser):  # pylint: disable=abstract-method
                 'error': ['Self-consistency was not achieved']
             }
 
+        Every log record becomes a row in the database, so identical messages of the same level are emitted only once,
+        with the number of times they occurred and the positions of the first and last occurrence among all messages.
+        If a log dictionary was already aggregated by its producer, the counts and the line numbers of the first and
+        last occurrence in the parsed file under its ``LOG_COUNTS_KEY`` key are used instead, see
+        :py:data:`~aiida_mpet.utils.mapping.LOG_COUNTS_KEY`. The messages are emitted in order of decreasing severity
+        and at most ``MAXIMUM_LOG_RECORDS`` records are written per node: the number of messages beyond that cap is
+        reported in a single final warning.
+
         :param logging_dictionaries: log dictionaries
         :param ignore: list of log messages to ignore
         """
@@ -33,8 +49,18 @@ class Parser(_BaseParser):  # pylint: disable=abstract-method
         if not isinstance(logging_dictionaries, (list, tuple)):
             logging_dictionaries = [logging_dictionaries]
 
+        occurrences = {}
+        aggregated = {}
+        position = 0
+
         for logs in logging_dictionaries:
+            counts = logs.get(LOG_COUNTS_KEY, None) or {}
+
             for level, messages in logs.items():
+
+                if level == LOG_COUNTS_KEY:
+                    continue
+
                 for message in messages:
 
                     if message is None:
@@ -45,10 +71,50 @@ class Parser(_BaseParser):  # pylint: disable=abstract-method
                     if not stripped or stripped in ignore:
                         continue
 
-                    try:
-                        getattr(self.logger, level)(stripped)
-                    except AttributeError:
-                        pass
+                    position += 1
+                    occurrence = occurrences.setdefault((level, stripped), [0, position, position])
+                    occurrence[0] += 1
+                    occurrence[2] = position
+
+                    if message in counts.get(level, {}):
+                        aggregated[(level, stripped)] = counts[level][message]
+
+        def get_severity(item):
+            level = item[0][0]
+            return self.LOG_LEVELS.index(level) if level in self.LOG_LEVELS else len(self.LOG_LEVELS)
+
+        emitted = getattr(self, '_emitted_log_records', 0)
+        suppressed = 0
+
+        for (level, message), (count, first, last) in sorted(occurrences.items(), key=get_severity):
+            try:
+                log = getattr(self.logger, level)
+            except AttributeError:
+                continue
+
+            # Messages that were aggregated by their producer and that occur in a single log dictionary carry the
+            # counts of all their occurrences in the parsed file, of which only the first was listed
+            location = 'message'
+
+            if count == 1 and (level, message) in aggregated:
+                count, first, last = aggregated[(level, message)]
+                location = 'line'
+
+            if emitted >= self.MAXIMUM_LOG_RECORDS:
+                suppressed += count
+                continue
+
+            if count > 1:
+                message = f'{message} [repeated {count} times, first at {location} {first}, last at {location} {last}]'
+
+            log(message)
+            emitted += 1
+
+        if suppressed:
+            self.logger.warning(f'suppressed {suppressed} further log messages, the maximum of '
+                                f'{self.MAXIMUM_LOG_RECORDS} log records per node was reached')
+
+        self._emitted_log_records = emitted
 
     def exit(self, exit_code):
         """Log the exit message of the give exit code with level `ERROR` and return the exit code.
@@ -1,62 +1,10 @@
 # -*- coding: utf-8 -*-
 """A basic parser for the common format of MPET."""
 
-__all__ = ('parse_output_base', 'parse_output_error', 'convert_qe_time_to_sec', 'convert_qe2aiida_structure')
+__all__ = ('COMPLETION_MARKER', 'parse_output_error', 'convert_qe_time_to_sec', 'convert_qe2aiida_structure')
 
-
-def parse_output_base(filecontent, codename=None, message_map=None):
-    """Parses the output file of a MPET calculation, just checking for basic content like JOB DONE, errors with %%%% etc.
-
-    :param filecontent: a string with the output file content
-    :param codename: the string printed both in the header and near the walltime.
-        If passed, a few more things are parsed (e.g. code version, walltime, ...)
-    :returns: tuple of two dictionaries, with the parsed data and log messages, respectively
-    """
-    from aiida_mpet.utils.mapping import get_logging_container
-
-    keys = ['error', 'warning']
-
-    if message_map is not None and (not isinstance(message_map, dict) or any(key not in message_map for key in keys)):
-        raise RuntimeError(f'invalid format `message_map`: should be dictionary with two keys {keys}')
-
-    logs = get_logging_container()
-    parsed_data = {}
-
-    lines = filecontent if isinstance(filecontent, list) else filecontent.split('\n')
-
-    for line in lines:
-        if 'JOB DONE' in line:
-            break
-    else:
-        logs.error.append('ERROR_OUTPUT_STDOUT_INCOMPLETE')
-
-    if codename is not None:
-
-        codestring = f'Program {codename}'
-
-        for line_number, line in enumerate(lines):
-
-            if codestring in line and 'starts on' in line:
-                parsed_data['code_version'] = line.split(codestring)[1].split('starts on')[0].strip()
-
-            # Parse the walltime
-            if codename in line and 'WALL' in line:
-                try:
-                    time = line.split('CPU')[1].split('WALL')[0].strip()
-                    parsed_data['wall_time'] = time
-                except (ValueError, IndexError):
-                    logs.warnings.append('ERROR_PARSING_WALLTIME')
-                else:
-                    try:
-                        parsed_data['wall_time_seconds'] = convert_qe_time_to_sec(time)
-                    except ValueError:
-                        logs.warnings.append('ERROR_CONVERTING_WALLTIME_TO_SECONDS')
-
-            # Parse an error message with optional mapping of the message
-            if '%%%%%%%%%%%%%%' in line:
-                parse_output_error(lines, line_number, logs, message_map)
-
-    return parsed_data, logs
+COMPLETION_MARKER = 'Total time:'
+"""Line that MPET prints to stdout after the simulation finished and all output was written."""
 
 
 def parse_output_error(lines, line_number_start, logs, message_map=None):
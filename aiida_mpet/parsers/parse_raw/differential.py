@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+"""Functions to integrate the capacity from the current and to compute the differential capacity curves.
+
+All functions are vectorised over the time steps. Simulations with a `CCsegments` or `CVsegments` profile are split in
+segments, within which the curves are smoothed and differentiated, such that the steps of the current or voltage at the
+start of a segment do not bleed into the neighbouring segments.
+"""
+import ast
+
+import numpy
+
+__all__ = ('SEGMENTED_PROFILES', 'get_segments', 'get_segment_durations', 'get_segment_ids', 'integrate_capacity',
+           'smooth', 'get_differential_curves')
+
+SEGMENTED_PROFILES = ('CCsegments', 'CVsegments')
+"""The profile types of MPET that consist of segments defined by the `segments` parameter."""
+
+
+def get_segments(sim_params):
+    """Return the segments defined in the `Sim Params` section of the MPET parameters.
+
+    :param sim_params: dictionary with the `Sim Params` section, where `segments` is either a list or its string
+        representation of tuples of the setpoint and the duration in minutes
+    :return: list of tuples of the setpoint and the duration in minutes, which is empty if the profile does not
+        consist of segments
+    :raises ValueError: if the segments cannot be parsed
+    """
+    if sim_params.get('profileType', None) not in SEGMENTED_PROFILES:
+        return []
+
+    segments = sim_params.get('segments', [])
+
+    if isinstance(segments, str):
+        try:
+            segments = ast.literal_eval(segments)
+        except (SyntaxError, ValueError) as exception:
+            raise ValueError(f'invalid `segments`: {segments}') from exception
+
+    try:
+        return [(segment[0], float(segment[1])) for segment in segments]
+    except (TypeError, IndexError, ValueError) as exception:
+        raise ValueError(f'invalid `segments`: {segments}') from exception
+
+
+def get_segment_durations(sim_params):
+    """Return the durations of the segments defined in the `Sim Params` section of the MPET parameters.
+
+    :param sim_params: dictionary with the `Sim Params` section, see `get_segments`
+    :return: list of durations in s, which is empty if the profile does not consist of segments
+    :raises ValueError: if the segments cannot be parsed
+    """
+    return [duration * 60. for _, duration in get_segments(sim_params)]
+
+
+def get_segment_ids(time, durations=None):
+    """Return the index of the segment to which each time step belongs.
+
+    :param time: one-dimensional array with the times in s
+    :param durations: optional list of the durations of the consecutive segments in s
+    :return: integer array of the same length as ``time``
+    """
+    time = numpy.asarray(time, dtype=float)
+
+    if not durations:
+        return numpy.zeros(len(time), dtype=int)
+
+    edges = time[0] + numpy.cumsum(durations)[:-1]
+    return numpy.searchsorted(edges, time, side='left')
+
+
+def _get_segment_bounds(segment_ids):
+    """Return the index of the first and last time step of the segment of each time step."""
+    indices = numpy.arange(len(segment_ids))
+    starts = numpy.flatnonzero(numpy.r_[True, segment_ids[1:] != segment_ids[:-1]])
+    stops = numpy.r_[starts[1:], len(segment_ids)] - 1
+    which = numpy.searchsorted(starts, indices, side='right') - 1
+    return starts[which], stops[which]
+
+
+def integrate_capacity(time, current, segment_ids=None):
+    """Integrate the current over time to the capacity with the trapezoidal rule.
+
+    :param time: one-dimensional array with the times
+    :param current: one-dimensional array with the current, in units such that the product with the time has the units
+        of the capacity
+    :param segment_ids: optional array with the index of the segment of each time step, see `get_segment_ids`
+    :return: tuple of the cumulative signed capacity, starting at zero, and an array with the signed capacity that was
+        passed in each segment, where an interval between two segments is attributed to the later segment
+    """
+    time = numpy.asarray(time, dtype=float)
+    current = numpy.asarray(current, dtype=float)
+    segment_ids = numpy.zeros(len(time), dtype=int) if segment_ids is None else numpy.asarray(segment_ids)
+
+    increments = (current[1:] + current[:-1]) * numpy.diff(time) / 2.
+    capacity = numpy.r_[0., numpy.cumsum(increments)]
+
+    if not increments.size:
+        return capacity, numpy.zeros(1)
+
+    segments = numpy.bincount(segment_ids[1:], weights=increments, minlength=int(segment_ids.max()) + 1)
+    return capacity, segments
+
+
+def smooth(values, window, segment_ids=None):
+    """Smooth an array with a centred moving average that does not extend beyond the segment of each element.
+
+    Near the edges of a segment the window is truncated, such that the average is always over the available values.
+
+    :param values: one-dimensional array
+    :param window: the number of elements of the window, where even numbers are increased by one
+    :param segment_ids: optional array with the index of the segment of each element
+    :return: the smoothed array
+    """
+    values = numpy.asarray(values, dtype=float)
+    segment_ids = numpy.zeros(len(values), dtype=int) if segment_ids is None else numpy.asarray(segment_ids)
+
+    if window <= 1 or not values.size:
+        return values.copy()
+
+    half = int(window) // 2
+    indices = numpy.arange(len(values))
+    starts, stops = _get_segment_bounds(segment_ids)
+    lower = numpy.maximum(indices - half, starts)
+    upper = numpy.minimum(indices + half, stops)
+
+    cumulative = numpy.r_[0., numpy.cumsum(values)]
+    return (cumulative[upper + 1] - cumulative[lower]) / (upper + 1 - lower)
+
+
+def get_differential_curves(capacity, voltage, window=11, regularization=0.05, segment_ids=None):
+    """Compute the differential capacity dQ/dV and the differential voltage dV/dQ.
+
+    Both curves are first smoothed with `smooth`, after which the differences are taken between the neighbours of each
+    time step within its segment. On a voltage plateau the voltage difference vanishes and the plain ratio dQ/dV blows
+    up on the noise of the voltage. The ratio is therefore regularised as ``dQ dV / (dV^2 + epsilon^2)``, where epsilon
+    is ``regularization`` times the median absolute difference, which leaves the ratio unchanged where the differences
+    are large and smoothly bounds it where they vanish. The same applies to dV/dQ with the roles reversed.
+
+    :param capacity: one-dimensional array with the capacity
+    :param voltage: one-dimensional array with the voltage
+    :param window: the window of the moving average in number of time steps
+    :param regularization: the relative regularisation of the ratios, zero disables the regularisation
+    :param segment_ids: optional array with the index of the segment of each time step
+    :return: tuple of the arrays dQ/dV and dV/dQ, which are zero where both differences vanish
+    """
+    capacity = numpy.asarray(capacity, dtype=float)
+    segment_ids = numpy.zeros(len(capacity), dtype=int) if segment_ids is None else numpy.asarray(segment_ids)
+
+    smoothed_capacity = smooth(capacity, window, segment_ids)
+    smoothed_voltage = smooth(voltage, window, segment_ids)
+
+    indices = numpy.arange(len(capacity))
+    starts, stops = _get_segment_bounds(segment_ids)
+    lower = numpy.maximum(indices - 1, starts)
+    upper = numpy.minimum(indices + 1, stops)
+
+    delta_capacity = smoothed_capacity[upper] - smoothed_capacity[lower]
+    delta_voltage = smoothed_voltage[upper] - smoothed_voltage[lower]
+
+    def ratio(numerator, denominator):
+        nonzero = numpy.abs(denominator[denominator != 0])
+        epsilon = regularization * numpy.median(nonzero) if nonzero.size else 0.
+        squared = denominator**2 + epsilon**2
+        return numpy.divide(numerator * denominator, squared, out=numpy.zeros(len(squared)), where=squared > 0)
+
+    return ratio(delta_capacity, delta_voltage), ratio(delta_voltage, delta_capacity)
@@ -0,0 +1,291 @@
+# -*- coding: utf-8 -*-
+"""Functions to parse the simulation data written by the MPET data reporters.
+
+The functions in this module only depend on `numpy` and the readers of the data reporters and do not require a loaded
+AiiDA profile, such that they can be used in worker processes.
+"""
+import re
+
+import numpy
+
+from .reporters import DEFAULT_DATA_REPORTER, open_output_data
+
+__all__ = (
+    'DATASET_PREFIXES', 'get_dataset_prefix', 'parse_output_data', 'read_cell_arrays', 'get_cell_quantities',
+    'get_performance_metrics', 'get_field_names', 'iter_dataset_chunks', 'get_trode_value', 'get_valid_length'
+)
+
+DATASET_PREFIXES = ('mpet.', '')
+"""Prefixes of the dataset names that have been used by different versions of MPET, in order of precedence."""
+
+BOLTZMANN_CONSTANT = 1.381e-23
+"""Boltzmann constant in J/K, with the precision used by MPET."""
+
+ELEMENTARY_CHARGE = 1.602e-19
+"""Elementary charge in C, with the precision used by MPET."""
+
+REFERENCE_TEMPERATURE = 298.
+"""Reference temperature in K that MPET uses to scale the potentials."""
+
+ELECTROLYTE_CHUNK_SIZE = 4096
+"""Number of time steps of the electrolyte concentration that are read at once to compute the depletion."""
+
+TIME_SERIES_NAMES = ('phi_applied_times', 'phi_applied', 'current', 'ffrac_c', 'ffrac_a')
+"""Names, without prefix, of the cell level time series."""
+
+FIELD_PATTERN = re.compile(r'^(?:(?:c_lyte|phi_lyte|phi_bulk)_[csa]|partTrode[ca]vol\d+part\d+[._]c[12]?)$')
+"""Pattern of the names, without prefix, of the datasets with the electrolyte and electrode fields and the particle
+concentrations, which all have the time as first axis."""
+
+
+def get_dataset_prefix(handle):
+    """Return the prefix of the dataset names in an MPET output file.
+
+    :param handle: an open `h5py.File`
+    :return: the prefix string
+    :raises KeyError: if the file does not contain the applied potential dataset for any of the known prefixes
+    """
+    for prefix in DATASET_PREFIXES:
+        if f'{prefix}phi_applied' in handle:
+            return prefix
+
+    raise KeyError('the file does not contain the `phi_applied` dataset')
+
+
+def parse_output_data(filepath, reporter=DEFAULT_DATA_REPORTER):
+    """Parse the cell level time series from an MPET output file.
+
+    The values are the nondimensional quantities as written by MPET. Only the complete time steps are returned, see
+    `get_valid_length`, such that the data of interrupted simulations can be salvaged. The maximum electrolyte
+    depletion, i.e. one minus the ratio of the lowest electrolyte concentration anywhere in the cell to the initial
+    average concentration, is computed while streaming the concentration in chunks.
+
+    :param filepath: path or open file-like object of the output file
+    :param reporter: the data reporter that wrote the file, see :py:mod:`~aiida_mpet.parsers.parse_raw.reporters`
+    :return: tuple of a dictionary with scalar results, where `truncated` is `True` if incomplete time steps were
+        discarded, and a dictionary with the `times`, `phi_applied` and `current` arrays and, if present, the
+        `ffrac_c` and `ffrac_a` arrays with the filling fractions of the electrodes
+    :raises KeyError: if one of the required datasets is missing
+    :raises OSError: if the file cannot be read in the format of the data reporter
+    """
+    with open_output_data(filepath, reporter) as handle:
+        prefix = get_dataset_prefix(handle)
+        length, truncated = get_valid_length(handle, prefix)
+        arrays = read_cell_arrays(handle, prefix, length)
+
+        minimum = numpy.inf
+        initial = []
+
+        for part in ('c', 's', 'a'):
+            if f'{prefix}c_lyte_{part}' not in handle or not length:
+                continue
+
+            dataset = handle[f'{prefix}c_lyte_{part}']
+            initial.append(numpy.atleast_1d(dataset[0]))
+
+            for chunk in iter_dataset_chunks(dataset, ELECTROLYTE_CHUNK_SIZE, stop=length):
+                minimum = min(minimum, numpy.nanmin(chunk))
+
+    times = numpy.atleast_1d(arrays['times'])
+    parsed_data = {
+        'number_of_time_steps': int(times.size),
+        'final_time': float(times[-1]) if times.size else 0.,
+        'truncated': truncated,
+    }
+
+    if initial:
+        parsed_data['max_electrolyte_depletion'] = float(1. - minimum / numpy.concatenate(initial).mean())
+
+    return parsed_data, arrays
+
+
+def read_cell_arrays(handle, prefix, length=None):
+    """Return the cell level time series of an MPET output file.
+
+    :param handle: an open output file, see :py:func:`~aiida_mpet.parsers.parse_raw.reporters.open_output_data`
+    :param prefix: the prefix of the dataset names as returned by `get_dataset_prefix`
+    :param length: optional number of time steps to return, e.g. the valid length returned by `get_valid_length`
+    :return: dictionary with the `times`, `phi_applied` and `current` arrays and, if present, the `ffrac_c` and
+        `ffrac_a` arrays with the filling fractions of the electrodes
+    :raises KeyError: if one of the required datasets is missing
+    """
+    arrays = {
+        'times': _read_time_series(handle, f'{prefix}phi_applied_times', length),
+        'phi_applied': _read_time_series(handle, f'{prefix}phi_applied', length),
+        'current': _read_time_series(handle, f'{prefix}current', length),
+    }
+
+    for trode in ('c', 'a'):
+        if f'{prefix}ffrac_{trode}' in handle:
+            arrays[f'ffrac_{trode}'] = _read_time_series(handle, f'{prefix}ffrac_{trode}', length)
+
+    return arrays
+
+
+def _read_time_series(handle, name, length=None):
+    """Return the first ``length`` elements of a cell level time series as a one-dimensional array."""
+    return numpy.atleast_1d(numpy.squeeze(handle[name][()]))[:length]
+
+
+def get_valid_length(handle, prefix):
+    """Return the number of complete time steps in an MPET output file.
+
+    When MPET is interrupted, the time series and fields can have been written up to different time steps and the last
+    time steps of a file that was recovered with zero padding read as zeros, see
+    :py:func:`~aiida_mpet.parsers.parse_raw.reporters.open_output_data`. The valid time steps are those that are present
+    in all time series and fields and that precede the first time that is not finite or not larger than its
+    predecessor.
+
+    :param handle: an open output file, see :py:func:`~aiida_mpet.parsers.parse_raw.reporters.open_output_data`
+    :param prefix: the prefix of the dataset names as returned by `get_dataset_prefix`
+    :return: tuple of the number of valid time steps and a boolean that is `True` if the file contains any time steps
+        beyond those
+    """
+    names = [name for name in TIME_SERIES_NAMES if f'{prefix}{name}' in handle] + get_field_names(handle, prefix)
+    lengths = [handle[f'{prefix}{name}'].shape[0] if handle[f'{prefix}{name}'].ndim else 1 for name in names]
+    length = min(lengths)
+
+    times = _read_time_series(handle, f'{prefix}phi_applied_times', length)
+    invalid = numpy.flatnonzero(~numpy.isfinite(times) | numpy.r_[False, numpy.diff(times) <= 0])
+
+    if invalid.size:
+        length = int(invalid[0])
+
+    return length, length < max(lengths)
+
+
+def get_trode_value(derived_values, key, trode):
+    """Return the value of a derived value for an electrode, which MPET stores either as a scalar or keyed on trode."""
+    value = derived_values[key]
+    return value[trode] if isinstance(value, dict) else value
+
+
+def get_cell_quantities(arrays, derived_values):
+    """Convert the nondimensional cell level time series to dimensional quantities.
+
+    The conversion follows the post-processing of MPET itself: the cell voltage is the standard potential of the cell
+    minus the scaled applied potential and the capacity is the change of the filling fraction of the limiting electrode
+    times its capacity.
+
+    :param arrays: dictionary with the arrays as returned by `parse_output_data`
+    :param derived_values: dictionary with the derived values pickled by MPET, which should contain at least `t_ref`
+        and `phiRef` and, to compute the capacity, `limtrode` and `cap`
+    :return: dictionary with the `time` in s, `voltage` in V and, if it can be computed, the `capacity` in mAh/cm^2
+    :raises KeyError: if one of the required derived values is missing
+    """
+    thermal_voltage = BOLTZMANN_CONSTANT * REFERENCE_TEMPERATURE / ELEMENTARY_CHARGE
+
+    standard_voltage = -thermal_voltage * get_trode_value(derived_values, 'phiRef', 'c')
+
+    # Without a simulated anode, i.e. for a lithium foil, the standard potential of the anode is zero
+    if 'ffrac_a' in arrays:
+        standard_voltage += thermal_voltage * get_trode_value(derived_values, 'phiRef', 'a')
+
+    quantities = {
+        'time': numpy.atleast_1d(arrays['times']) * derived_values['t_ref'],
+        'voltage': standard_voltage - thermal_voltage * numpy.atleast_1d(arrays['phi_applied']),
+    }
+
+    limtrode = derived_values.get('limtrode', 'c')
+
+    if f'ffrac_{limtrode}' in arrays and 'cap' in derived_values:
+        filling_fraction = numpy.atleast_1d(arrays[f'ffrac_{limtrode}'])
+        # The capacity is stored by MPET in A s / m^2, which is converted to mA h / cm^2
+        capacity = get_trode_value(derived_values, 'cap', limtrode) / 36000.
+        quantities['capacity'] = numpy.abs(filling_fraction - filling_fraction[0]) * capacity
+
+    return quantities
+
+
+def _integrate(y, x):
+    """Return the integral of ``y`` over ``x`` with the trapezoidal rule."""
+    return float(numpy.sum((y[1:] + y[:-1]) * numpy.diff(x)) / 2.)
+
+
+def get_performance_metrics(quantities, arrays, voltage_cutoffs=None):
+    """Compute the scalar performance metrics of a simulation from its dimensional time series.
+
+    :param quantities: dictionary with the dimensional quantities as returned by `get_cell_quantities`
+    :param arrays: dictionary with the arrays as returned by `parse_output_data`
+    :param voltage_cutoffs: optional tuple of the lower and upper voltage cutoffs in V, i.e. `Vmin` and `Vmax`
+    :return: dictionary with the metrics, where the units of the dimensional metrics are defined by the corresponding
+        key with the ``_units`` suffix
+    """
+    time = quantities['time']
+    voltage = quantities['voltage']
+
+    metrics = {
+        'minimum_voltage': float(voltage.min()),
+        'maximum_voltage': float(voltage.max()),
+        'voltage_units': 'V',
+    }
+
+    if 'capacity' in quantities:
+        capacity = quantities['capacity']
+        energy = abs(_integrate(voltage, capacity))
+        metrics['capacity'] = float(capacity[-1])
+        metrics['capacity_units'] = 'mAh/cm^2'
+        metrics['energy'] = energy
+        metrics['energy_units'] = 'mWh/cm^2'
+        metrics['average_voltage'] = energy / metrics['capacity'] if metrics['capacity'] > 0 else float(voltage.mean())
+    elif time[-1] > time[0]:
+        metrics['average_voltage'] = _integrate(voltage, time) / float(time[-1] - time[0])
+    else:
+        metrics['average_voltage'] = float(voltage.mean())
+
+    if voltage_cutoffs is not None:
+        lower, upper = voltage_cutoffs
+        mask = numpy.zeros(voltage.shape, dtype=bool)
+
+        if lower is not None:
+            mask |= voltage <= lower
+
+        if upper is not None:
+            mask |= voltage >= upper
+
+        reached = numpy.flatnonzero(mask)
+
+        if reached.size:
+            metrics['time_to_cutoff'] = float(time[reached[0]] - time[0])
+            metrics['time_to_cutoff_units'] = 's'
+
+    for trode in ('c', 'a'):
+        if f'ffrac_{trode}' in arrays:
+            metrics[f'final_soc_{trode}'] = float(numpy.atleast_1d(arrays[f'ffrac_{trode}'])[-1])
+
+    return metrics
+
+
+def get_field_names(handle, prefix):
+    """Return the names of the field datasets in an MPET output file, see ``FIELD_PATTERN``.
+
+    :param handle: an open `h5py.File`
+    :param prefix: the prefix of the dataset names as returned by `get_dataset_prefix`
+    :return: sorted list of the dataset names without the prefix
+    """
+    names = [name[len(prefix):] for name in handle if name.startswith(prefix)]
+    return sorted(name for name in names if FIELD_PATTERN.match(name))
+
+
+def iter_dataset_chunks(dataset, chunk_size=None, stop=None):
+    """Yield the consecutive chunks of a dataset along its first axis, reading only one chunk at a time.
+
+    :param dataset: an `h5py.Dataset`
+    :param chunk_size: the number of elements along the first axis per chunk, by default the dataset is read at once
+    :param stop: optional number of elements along the first axis after which to stop, e.g. the valid length returned
+        by `get_valid_length`
+    :return: generator of numpy arrays
+    """
+    length = dataset.shape[0] if dataset.ndim else 1
+
+    if stop is not None:
+        length = min(length, stop)
+
+    chunk_size = chunk_size or max(length, 1)
+
+    if not dataset.ndim:
+        yield numpy.atleast_1d(dataset[()])
+        return
+
+    for start in range(0, length, chunk_size):
+        yield dataset[start:min(start + chunk_size, length)]
@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+"""Functions to compute statistics of the particle filling fractions from an MPET HDF5 output file.
+
+The concentration of every particle of every volume of an electrode is written by MPET as a separate dataset, e.g.
+``mpet.partTrodecvol0part1.c``, whose first axis is the time. The statistics are computed while streaming these
+datasets in chunks of time steps, such that the memory footprint only depends on the chunk size and the number of
+particles, and not on the number of time steps or the discretization of the particles.
+"""
+import re
+
+import numpy
+
+__all__ = ('get_particle_datasets', 'get_shell_volumes', 'compute_particle_statistics')
+
+PARTICLE_PATTERN = re.compile(r'^partTrode(?P<trode>[ca])vol(?P<volume>\d+)part(?P<particle>\d+)[._](?P<field>\w+)$')
+"""Pattern of the names, without prefix, of the particle datasets."""
+
+
+def get_particle_datasets(handle, prefix):
+    """Return the names of the datasets that define the filling fraction of each particle.
+
+    If MPET wrote the average filling fraction ``cbar`` of a particle, that is used, otherwise the concentration ``c``
+    or, for particles with two layers, the concentrations ``c1`` and ``c2``, which are averaged over the particle.
+
+    :param handle: an open `h5py.File`
+    :param prefix: the prefix of the dataset names as returned by `get_dataset_prefix`
+    :return: nested dictionary mapping the electrode onto a dictionary of tuples of the volume and particle index onto
+        a list of the dataset names
+    """
+    fields = {}
+
+    for name in handle:
+        match = PARTICLE_PATTERN.match(name[len(prefix):]) if name.startswith(prefix) else None
+
+        if match is None:
+            continue
+
+        key = (int(match.group('volume')), int(match.group('particle')))
+        fields.setdefault(match.group('trode'), {}).setdefault(key, {})[match.group('field')] = name
+
+    datasets = {}
+
+    for trode, particles in fields.items():
+        for key, names in particles.items():
+            if 'cbar' in names:
+                selected = [names['cbar']]
+            elif 'c' in names:
+                selected = [names['c']]
+            else:
+                selected = [names[field] for field in ('c1', 'c2') if field in names]
+
+            if selected:
+                datasets.setdefault(trode, {})[key] = selected
+
+    return datasets
+
+
+def get_shell_volumes(particle_shape, points):
+    """Return the normalized volumes of the shells of the radial discretization of a particle.
+
+    MPET discretizes spherical and cylindrical particles on equidistant points along the radius, where each point
+    represents the shell between the midpoints to its neighbours, see ``mpet.geometry.get_unit_solid_discr``. The
+    average concentration of such a particle is the mean over the points weighted by the volumes of their shells.
+
+    :param particle_shape: the shape of the particles as defined in the ``Particles`` section of the electrode
+        parameters, e.g. ``C3``, ``sphere`` or ``cylinder``
+    :param points: the number of points of the discretization
+    :return: numpy array with the volumes of the shells that sum to one, or `None` if all points have the same weight
+    """
+    exponents = {'sphere': 3, 'cylinder': 2}
+
+    if particle_shape not in exponents or points < 2:
+        return None
+
+    radii = numpy.linspace(0., 1., points)
+    edges = numpy.concatenate([[0.], (radii[:-1] + radii[1:]) / 2., [1.]])
+    volumes = numpy.diff(edges**exponents[particle_shape])
+
+    return volumes / volumes.sum()
+
+
+def _read_filling_fractions(handle, particles, shape, start, stop, particle_shape=None):
+    """Return the filling fractions of all particles for a range of time steps, with shape ``(time, volume, part)``."""
+    filling = numpy.full((stop - start,) + shape, numpy.nan)
+
+    for (volume, particle), names in particles.items():
+        values = []
+        for name in names:
+            chunk = numpy.asarray(handle[name][start:stop], dtype=float)
+            chunk = chunk.reshape(chunk.shape[0], -1)
+            weights = get_shell_volumes(particle_shape, chunk.shape[1]) if not name.endswith('cbar') else None
+            values.append(chunk.mean(axis=1) if weights is None else chunk @ weights)
+        filling[:, volume, particle] = numpy.mean(values, axis=0)
+
+    return filling
+
+
+def compute_particle_statistics(
+    handle, prefix, bins=20, threshold=0.5, chunk_size=1024, stop=None, particle_shapes=None
+):
+    """Compute the statistics of the particle filling fractions of each electrode over time.
+
+    For each electrode the following arrays are returned, where the first axis is always the time:
+
+        * ``{trode}_mean`` and ``{trode}_std``: mean and standard deviation of the filling fraction over all particles
+        * ``{trode}_volume_mean`` and ``{trode}_volume_std``: the same per volume, with the volume as second axis
+        * ``{trode}_histogram``: the number of particles per bin of the filling fraction, with the bin as second axis
+        * ``{trode}_lithium_rich_fraction``: the fraction of particles whose filling fraction exceeds the threshold
+
+    In addition, the ``histogram_edges`` array contains the edges of the bins, which divide [0, 1] in equal parts.
+
+    :param handle: an open `h5py.File`
+    :param prefix: the prefix of the dataset names as returned by `get_dataset_prefix`
+    :param bins: the number of bins of the histogram
+    :param threshold: the filling fraction above which a particle is considered to be in the lithium rich phase
+    :param chunk_size: the number of time steps that are read at once
+    :param stop: optional number of time steps after which to stop, e.g. the valid length returned by
+        :py:func:`~aiida_mpet.parsers.parse_raw.output_data.get_valid_length`
+    :param particle_shapes: optional dictionary mapping the electrode, ``c`` or ``a``, onto the shape of its particles.
+        If MPET did not write the average filling fraction of the particles, the concentrations of spherical and
+        cylindrical particles are averaged with the volumes of the shells of the discretization, see
+        `get_shell_volumes`, and those of other particles with equal weights.
+    :return: dictionary of numpy arrays, which is empty if the file does not contain any particle datasets
+    """
+    datasets = get_particle_datasets(handle, prefix)
+    edges = numpy.linspace(0., 1., bins + 1)
+    statistics = {'histogram_edges': edges} if datasets else {}
+
+    for trode, particles in sorted(datasets.items()):
+        shape = tuple(max(key[axis] for key in particles) + 1 for axis in (0, 1))
+        length = min([handle[names[0]].shape[0] for names in particles.values()] + ([stop] if stop is not None else []))
+        results = {
+            'mean': numpy.empty(length),
+            'std': numpy.empty(length),
+            'volume_mean': numpy.empty((length, shape[0])),
+            'volume_std': numpy.empty((length, shape[0])),
+            'histogram': numpy.empty((length, bins), dtype=int),
+            'lithium_rich_fraction': numpy.empty(length),
+        }
+
+        particle_shape = (particle_shapes or {}).get(trode, None)
+
+        for start in range(0, length, chunk_size):
+            chunk_stop = min(start + chunk_size, length)
+            filling = _read_filling_fractions(handle, particles, shape, start, chunk_stop, particle_shape)
+            flat = filling.reshape(chunk_stop - start, -1)
+            flat = flat[:, ~numpy.isnan(flat).all(axis=0)]
+
+            results['mean'][start:chunk_stop] = flat.mean(axis=1)
+            results['std'][start:chunk_stop] = flat.std(axis=1)
+            results['volume_mean'][start:chunk_stop] = numpy.nanmean(filling, axis=2)
+            results['volume_std'][start:chunk_stop] = numpy.nanstd(filling, axis=2)
+            results['lithium_rich_fraction'][start:chunk_stop] = (flat > threshold).mean(axis=1)
+
+            # Values are clipped such that particles that are exactly full or slightly overfilled end up in the last
+            # bin, while values that are not finite, e.g. of particles that were not written in a time step, are not
+            # counted
+            indices = numpy.clip(numpy.digitize(flat, edges[1:-1]), 0, bins - 1)
+            offsets = numpy.arange(chunk_stop - start)[:, None] * bins
+            finite = numpy.isfinite(flat)
+            counts = numpy.bincount((indices + offsets)[finite], minlength=(chunk_stop - start) * bins)
+            results['histogram'][start:chunk_stop] = counts.reshape(chunk_stop - start, bins)
+
+        statistics.update({f'{trode}_{key}': value for key, value in results.items()})
+
+    return statistics
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""Functions to safely decode the pickled input dictionaries that MPET writes to its output folder.
+
+MPET stores the parsed configuration of a simulation as pickles, e.g. ``input_dict_system.p``. Since unpickling
+arbitrary data can execute arbitrary code, the files are loaded with an unpickler that only allows to reconstruct
+builtin containers and numpy arrays and scalars.
+"""
+import io
+import math
+import pickle
+
+import numpy
+
+__all__ = ('INPUT_DICT_NAMES', 'RestrictedUnpickler', 'load_pickle', 'split_scalars_and_arrays')
+
+INPUT_DICT_NAMES = ('system', 'derived_values', 'cathode', 'anode')
+"""Names of the pickled input dictionaries, which are written by MPET to the files ``input_dict_{name}.p``."""
+
+SAFE_GLOBALS = {
+    ('builtins', 'complex'),
+    ('builtins', 'frozenset'),
+    ('builtins', 'set'),
+    ('builtins', 'slice'),
+    ('collections', 'OrderedDict'),
+    ('numpy', 'dtype'),
+    ('numpy', 'ndarray'),
+    ('numpy.core.multiarray', '_reconstruct'),
+    ('numpy.core.multiarray', 'scalar'),
+    ('numpy._core.multiarray', '_reconstruct'),
+    ('numpy._core.multiarray', 'scalar'),
+}
+"""The globals that the `RestrictedUnpickler` is allowed to load, as tuples of the module and the name."""
+
+
+class RestrictedUnpickler(pickle.Unpickler):
+    """Unpickler that only allows to load the globals defined in ``SAFE_GLOBALS``."""
+
+    def find_class(self, module, name):
+        """Return the global if it is allowed.
+
+        :raises `pickle.UnpicklingError`: if the global is not allowed
+        """
+        if (module, name) not in SAFE_GLOBALS:
+            raise pickle.UnpicklingError(f'global `{module}.{name}` is not allowed')
+
+        return super().find_class(module, name)
+
+
+def load_pickle(handle):
+    """Load a pickle with the `RestrictedUnpickler`.
+
+    :param handle: a binary file-like object or the content as bytes
+    :return: the unpickled object
+    :raises `pickle.UnpicklingError`: if the pickle is corrupt or contains a global that is not allowed
+    """
+    if isinstance(handle, bytes):
+        handle = io.BytesIO(handle)
+
+    return RestrictedUnpickler(handle).load()
+
+
+def _is_scalar(value):
+    """Return whether the value can be stored as is in a `Dict` node."""
+    if isinstance(value, float):
+        return math.isfinite(value)
+
+    return value is None or isinstance(value, (bool, int, str))
+
+
+def split_scalars_and_arrays(value, prefix=''):
+    """Split an unpickled input dictionary in the values that can be stored in a `Dict` and those that are arrays.
+
+    Numpy scalars and zero-dimensional arrays are converted to python scalars. Arrays, non-finite floats and lists that
+    contain anything else than scalars are returned as arrays instead, keyed on the path of the value in the nested
+    dictionary with the keys joined by underscores, e.g. ``psd_vol_c`` for ``value['psd_vol']['c']``. Values that cannot
+    be represented as an array either, e.g. lists of dictionaries, are dropped.
+
+    :param value: the unpickled dictionary
+    :param prefix: prefix for the keys of the arrays
+    :return: tuple of the dictionary with scalar values and a flat dictionary with numpy arrays
+    """
+    scalars = {}
+    arrays = {}
+
+    for key, item in value.items():
+        name = f'{prefix}{key}'
+
+        if isinstance(item, numpy.ndarray) and item.ndim == 0:
+            item = item[()]
+
+        if isinstance(item, numpy.generic):
+            item = item.item()
+
+        if isinstance(item, dict):
+            nested_scalars, nested_arrays = split_scalars_and_arrays(item, prefix=f'{name}_')
+            arrays.update(nested_arrays)
+            if nested_scalars:
+                scalars[key] = nested_scalars
+        elif _is_scalar(item):
+            scalars[key] = item
+        elif isinstance(item, (list, tuple)) and all(_is_scalar(element) for element in item):
+            scalars[key] = list(item)
+        else:
+            try:
+                array = numpy.asarray(item)
+            except (TypeError, ValueError):
+                continue
+
+            # Values that cannot be represented as a numeric or string array cannot be stored and are dropped
+            if array.dtype != object:
+                arrays[name] = array
+
+    return scalars, arrays
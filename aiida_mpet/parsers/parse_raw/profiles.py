@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""Functions to extract snapshots of the spatial profiles across the cell from an MPET HDF5 output file.
+
+The profiles are interpolated linearly in time between the two time steps that bracket each requested snapshot. Only
+those rows of the field datasets are read from the file, so extracting a few snapshots from a long simulation is cheap.
+"""
+import numpy
+
+from .output_data import get_dataset_prefix, get_valid_length
+
+__all__ = ('PROFILE_FIELDS', 'get_snapshot_times', 'get_profiles', 'extract_profiles')
+
+PROFILE_FIELDS = ('c_lyte', 'phi_lyte', 'phi_bulk')
+"""The fields for which the profiles are extracted by default."""
+
+CELL_PARTS = ('a', 's', 'c')
+"""The parts of the cell in the order in which the profiles are concatenated: anode, separator and cathode."""
+
+
+def get_snapshot_times(times, filling_fraction=None, snapshot_times=None, snapshot_soc=None):
+    """Return the times of the requested snapshots, converting the states of charge to the time at which they occur.
+
+    :param times: one-dimensional array with the times of the simulation
+    :param filling_fraction: one-dimensional array with the filling fraction that defines the state of charge at each
+        time, which is required if ``snapshot_soc`` is specified
+    :param snapshot_times: optional list of times, in the same units as ``times``
+    :param snapshot_soc: optional list of states of charge, for each of which the first time at which the filling
+        fraction reaches it is used. States of charge that are never reached are skipped.
+    :return: tuple of an array with the snapshot times and an array with the state of charge at each snapshot time
+    """
+    times = numpy.atleast_1d(times)
+    result = [float(time) for time in (snapshot_times or []) if times[0] <= time <= times[-1]]
+
+    if snapshot_soc:
+        if filling_fraction is None:
+            raise ValueError('the filling fraction is required to take snapshots at a state of charge')
+
+        filling_fraction = numpy.atleast_1d(filling_fraction)
+        delta = numpy.diff(filling_fraction)
+
+        for soc in snapshot_soc:
+            crossings = numpy.flatnonzero((filling_fraction[:-1] - soc) * (filling_fraction[1:] - soc) <= 0)
+            if not crossings.size:
+                continue
+            index = crossings[0]
+            weight = (soc - filling_fraction[index]) / delta[index] if delta[index] else 0.
+            result.append(float(times[index] + weight * (times[index + 1] - times[index])))
+
+    result = numpy.array(result)
+
+    if filling_fraction is None:
+        return result, numpy.full(len(result), numpy.nan)
+
+    return result, numpy.interp(result, times, numpy.atleast_1d(filling_fraction))
+
+
+def _get_interpolation(times, snapshot_times):
+    """Return the rows to read and, for each snapshot, the indices into those rows and the interpolation weight."""
+    upper = numpy.clip(numpy.searchsorted(times, snapshot_times, side='left'), 1, len(times) - 1)
+    lower = upper - 1
+    span = times[upper] - times[lower]
+    weights = numpy.divide(snapshot_times - times[lower], span, out=numpy.zeros(len(snapshot_times)), where=span > 0)
+
+    rows = numpy.unique(numpy.concatenate([lower, upper]))
+    return rows, numpy.searchsorted(rows, lower), numpy.searchsorted(rows, upper), weights
+
+
+def get_profiles(handle, snapshot_times, fields=PROFILE_FIELDS):
+    """Return the spatial profiles of the fields across the cell at the snapshot times.
+
+    :param handle: an open `h5py.File`
+    :param snapshot_times: array of the nondimensional times of the snapshots
+    :param fields: the fields to extract, for each of which the datasets of the different parts of the cell are
+        concatenated in the order of ``CELL_PARTS``
+    :return: dictionary mapping each field that is present in the file onto an array with shape ``(snapshot, space)``
+    """
+    prefix = get_dataset_prefix(handle)
+    length, _ = get_valid_length(handle, prefix)
+    times = numpy.atleast_1d(numpy.squeeze(handle[f'{prefix}phi_applied_times'][()]))[:length]
+    snapshot_times = numpy.atleast_1d(numpy.asarray(snapshot_times, dtype=float))
+
+    if len(times) < 2 or not snapshot_times.size:
+        return {}
+
+    rows, lower, upper, weights = _get_interpolation(times, snapshot_times)
+    profiles = {}
+
+    for field in fields:
+        parts = []
+
+        for part in CELL_PARTS:
+            name = f'{prefix}{field}_{part}'
+
+            if name not in handle:
+                continue
+
+            values = numpy.asarray(handle[name][rows], dtype=float).reshape(len(rows), -1)
+            parts.append(values[lower] + weights[:, None] * (values[upper] - values[lower]))
+
+        if parts:
+            profiles[field] = numpy.concatenate(parts, axis=1)
+
+    return profiles
+
+
+def extract_profiles(handle, snapshot_times=None, snapshot_soc=None, t_ref=1., trode='c', fields=PROFILE_FIELDS):
+    """Return the snapshots of the profiles across the cell at the given times and states of charge.
+
+    The state of charge is defined as the filling fraction of the electrode ``trode``, which is normally the limiting
+    electrode. Only the time axis and this filling fraction are read completely, of the fields only the rows that
+    bracket the snapshots are read.
+
+    :param handle: an open `h5py.File`
+    :param snapshot_times: optional list of times in s
+    :param snapshot_soc: optional list of states of charge
+    :param t_ref: the reference time in s used by MPET to make the time nondimensional
+    :param trode: the electrode whose filling fraction defines the state of charge
+    :param fields: the fields to extract
+    :return: dictionary with the `snapshot_times` in s, the `snapshot_soc` and the profile of each field with shape
+        ``(snapshot, space)``, which is empty if none of the snapshots lies within the simulated time
+    """
+    prefix = get_dataset_prefix(handle)
+    length, _ = get_valid_length(handle, prefix)
+    times = numpy.atleast_1d(numpy.squeeze(handle[f'{prefix}phi_applied_times'][()]))[:length]
+    filling_fraction = None
+
+    if f'{prefix}ffrac_{trode}' in handle:
+        filling_fraction = numpy.atleast_1d(numpy.squeeze(handle[f'{prefix}ffrac_{trode}'][()]))[:length]
+
+    if snapshot_soc and filling_fraction is None:
+        raise KeyError(f'the file does not contain the `ffrac_{trode}` dataset')
+
+    times_scaled = [time / t_ref for time in snapshot_times or []]
+    snapshots, soc = get_snapshot_times(times, filling_fraction, times_scaled, snapshot_soc)
+    profiles = get_profiles(handle, snapshots, fields)
+
+    if not profiles:
+        return {}
+
+    return {'snapshot_times': snapshots * t_ref, 'snapshot_soc': soc, **profiles}
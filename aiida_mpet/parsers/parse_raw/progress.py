@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""Functions to follow the output data of a running MPET simulation incrementally.
+
+MPET keeps appending time steps to the HDF5 output file while it runs. The progress of a simulation is followed by
+reading only the time steps beyond those that were read before, with `read_appended_time_series`. The function is
+self-contained, such that its source can be shipped in `get_remote_read_command` and executed by the python of the
+remote computer, next to the file, and only the appended time steps have to be transferred.
+"""
+import inspect
+import shlex
+
+__all__ = ('read_appended_time_series', 'get_remote_read_command')
+
+REMOTE_READ_SCRIPT = """
+import json, sys
+import h5py
+{source}
+try:
+    handle = h5py.File(sys.argv[1], 'r', swmr=True)
+except (OSError, ValueError):
+    handle = h5py.File(sys.argv[1], 'r')
+with handle:
+    length, arrays = read_appended_time_series(handle, int(sys.argv[2]))
+print(json.dumps({{'length': length, 'arrays': {{key: value.tolist() for key, value in arrays.items()}}}}))
+"""
+"""Python script that prints the time steps of an output file beyond an offset as JSON."""
+
+
+def read_appended_time_series(handle, offset=0):
+    """Read the complete time steps of the cell level time series beyond the given offset.
+
+    A file that is still being written can contain time series of different lengths and, if the writer did not flush
+    the last time steps yet, times that are zero. Only the time steps that are present in all time series and that
+    precede the first time that is not finite or not larger than its predecessor are returned.
+
+    :param handle: an open `h5py.File` of the output data
+    :param offset: the number of time steps that were read before
+    :return: tuple of the total number of complete time steps and a dictionary with the arrays of the time steps
+        beyond the offset, with the same keys as those returned by `parse_output_data`. If the total number is smaller
+        than the offset, the file was rewritten and the arrays are empty.
+    :raises KeyError: if the file does not contain the applied potential dataset
+    """
+    # This function is executed on the remote computer, so it cannot use anything outside of its own body
+    import numpy
+
+    prefix = next((prefix for prefix in ('mpet.', '') if f'{prefix}phi_applied' in handle), None)
+
+    if prefix is None:
+        raise KeyError('the file does not contain the `phi_applied` dataset')
+
+    names = {
+        'times': 'phi_applied_times',
+        'phi_applied': 'phi_applied',
+        'current': 'current',
+        'ffrac_c': 'ffrac_c',
+        'ffrac_a': 'ffrac_a',
+    }
+    datasets = {key: handle[f'{prefix}{name}'] for key, name in names.items() if f'{prefix}{name}' in handle}
+    length = min(dataset.shape[0] if dataset.ndim else 1 for dataset in datasets.values())
+
+    # The time step before the offset is read as well, to verify the first appended time is larger than it
+    start = min(max(offset - 1, 0), length)
+    arrays = {key: numpy.atleast_1d(numpy.squeeze(dataset[()] if not dataset.ndim else dataset[start:length]))
+              for key, dataset in datasets.items()}
+
+    times = arrays['times']
+    invalid = numpy.flatnonzero(~numpy.isfinite(times) | numpy.r_[False, numpy.diff(times) <= 0])
+
+    if invalid.size:
+        length = start + int(invalid[0])
+
+    return length, {key: values[offset - start:length - start] for key, values in arrays.items()}
+
+
+def get_remote_read_command(filepath, offset=0, python='python3'):
+    """Return the shell command that prints the time steps of an output file beyond an offset as JSON.
+
+    The file locking of HDF5 is disabled, because MPET keeps the file open for writing and does not use SWMR.
+
+    :param filepath: the absolute path of the output file on the remote computer
+    :param offset: the number of time steps that were read before
+    :param python: the python executable on the remote computer, which should have `h5py` installed
+    :return: the command
+    """
+    script = REMOTE_READ_SCRIPT.format(source=inspect.getsource(read_appended_time_series))
+    arguments = ' '.join(shlex.quote(str(argument)) for argument in (python, '-c', script, filepath, int(offset)))
+    return f'HDF5_USE_FILE_LOCKING=FALSE {arguments}'
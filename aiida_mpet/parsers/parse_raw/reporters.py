@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+"""Lazy readers for the output files of the different data reporters of MPET.
+
+MPET writes its output with the data reporter selected by the `dataReporter` keyword of the `Sim Params`:
+
+    * ``hdf5``: all variables in ``output_data.hdf5``
+    * ``hdf5Fast``: a reduced set of variables in ``output_data.hdf5``
+    * ``mat``: all variables in the MATLAB file ``output_data.mat``
+
+`open_output_data` returns a reader with the same interface for all formats, i.e. the subset of the `h5py.File`
+interface that is used by the parser: the names of the datasets can be iterated and tested with ``in``, while a dataset
+is only read when it is sliced and exposes its ``shape`` and ``ndim`` without being read.
+"""
+import contextlib
+import io
+import os
+import re
+
+import numpy
+
+__all__ = ('DATA_REPORTERS', 'DEFAULT_DATA_REPORTER', 'get_data_reporter', 'get_output_data_filename',
+           'open_output_data')
+
+DATA_REPORTERS = {
+    'hdf5': 'output_data.hdf5',
+    'hdf5Fast': 'output_data.hdf5',
+    'mat': 'output_data.mat',
+}
+"""Mapping of the data reporters of MPET onto the name of the output file they write."""
+
+DEFAULT_DATA_REPORTER = 'hdf5'
+"""The data reporter that MPET uses if the `dataReporter` keyword is not specified."""
+
+TRUNCATED_FILE_PATTERN = re.compile(r'truncated file: eof = (?P<eof>\d+).*stored_eof = (?P<stored_eof>\d+)')
+"""Pattern of the error message of HDF5 for a file that is shorter than the size recorded in its superblock."""
+
+
+def get_data_reporter(parameters):
+    """Return the data reporter selected by the MPET input parameters.
+
+    :param parameters: dictionary with the MPET input parameters, i.e. the content of the `parameters` input node
+    :return: one of the keys of ``DATA_REPORTERS``
+    :raises ValueError: if the data reporter is not supported
+    """
+    reporter = parameters.get('Sim Params', {}).get('dataReporter', DEFAULT_DATA_REPORTER)
+
+    if reporter not in DATA_REPORTERS:
+        raise ValueError(f'unsupported `dataReporter` {reporter}, valid reporters are: {", ".join(DATA_REPORTERS)}')
+
+    return reporter
+
+
+def get_output_data_filename(reporter=DEFAULT_DATA_REPORTER):
+    """Return the name of the output file written by a data reporter.
+
+    :param reporter: one of the keys of ``DATA_REPORTERS``
+    :return: the filename
+    """
+    return DATA_REPORTERS[reporter]
+
+
+@contextlib.contextmanager
+def open_output_data(filepath, reporter=DEFAULT_DATA_REPORTER):
+    """Context manager that opens an output file of MPET for lazy reading.
+
+    If MPET was killed while writing an HDF5 file, e.g. by the scheduler when the job ran out of walltime, the file is
+    shorter than the size recorded in its superblock and HDF5 refuses to open it. In that case the file is opened as if
+    it were padded with zeros up to the recorded size, such that all data that was flushed before the job was killed
+    can still be read. The time steps that were lost read as zeros, which `get_valid_length` excludes.
+
+    :param filepath: path or open binary file-like object of the output file
+    :param reporter: the data reporter that wrote the file, one of the keys of ``DATA_REPORTERS``
+    :return: an `h5py.File` for the HDF5 reporters or a `MatFile` for the ``mat`` reporter
+    :raises ValueError: if the data reporter is not supported
+    :raises OSError: if the file cannot be read in the format of the reporter
+    """
+    if reporter not in DATA_REPORTERS:
+        raise ValueError(f'unsupported data reporter `{reporter}`')
+
+    if reporter == 'mat':
+        with MatFile(filepath) as handle:
+            yield handle
+        return
+
+    import h5py
+
+    with contextlib.ExitStack() as stack:
+        try:
+            handle = stack.enter_context(h5py.File(filepath, 'r'))
+        except OSError as exception:
+            match = TRUNCATED_FILE_PATTERN.search(str(exception))
+
+            if match is None:
+                raise
+
+            if isinstance(filepath, (str, os.PathLike)):
+                filepath = stack.enter_context(open(filepath, 'rb'))
+
+            padded = ZeroPaddedFile(filepath, int(match.group('stored_eof')))
+            handle = stack.enter_context(h5py.File(padded, 'r'))
+
+        yield handle
+
+
+class ZeroPaddedFile(io.RawIOBase):
+    """Read-only file-like object that pads a file with zeros up to a given size."""
+
+    def __init__(self, handle, size):
+        super().__init__()
+        self._handle = handle
+        self._size = size
+        self._position = 0
+        self._eof = handle.seek(0, os.SEEK_END)
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._position
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        reference = {os.SEEK_SET: 0, os.SEEK_CUR: self._position, os.SEEK_END: self._size}[whence]
+        self._position = reference + offset
+        return self._position
+
+    def readinto(self, buffer):
+        # The views have to be released before returning, since the buffer that HDF5 passes is invalid after the call
+        with memoryview(buffer) as view, view.cast('B') as target:
+            length = min(len(target), max(self._size - self._position, 0))
+            available = max(min(self._eof - self._position, length), 0)
+
+            if available:
+                self._handle.seek(self._position)
+                self._handle.readinto(target[:available])
+
+            target[available:length] = bytes(length - available)
+
+        self._position += length
+        return length
+
+
+class MatDataset:
+    """A variable of a MATLAB file that is only read when it is sliced.
+
+    `scipy.io.savemat` stores one-dimensional arrays as row vectors, which are exposed as one-dimensional arrays again,
+    such that the shapes match those of the HDF5 reporters.
+    """
+
+    def __init__(self, mat_file, name, shape):
+        self._mat_file = mat_file
+        self._values = None
+        self.name = name
+        self.shape = shape[1:] if len(shape) == 2 and shape[0] == 1 else shape
+
+    @property
+    def ndim(self):
+        """Return the number of dimensions of the dataset."""
+        return len(self.shape)
+
+    def __getitem__(self, key):
+        if self._values is None:
+            self._values = self._mat_file.read(self.name).reshape(self.shape)
+        return self._values[key]
+
+
+class MatFile:
+    """Reader of a MATLAB output file with the interface of `h5py.File` that is used by the parser.
+
+    The MATLAB version 5 format that is written by `scipy.io.savemat` cannot be sliced on disk, so each variable is
+    read completely, but only when it is first sliced, and only the names and shapes are read when the file is opened.
+    """
+
+    def __init__(self, filepath):
+        from scipy.io import whosmat
+
+        self._filepath = filepath
+
+        try:
+            variables = whosmat(filepath)
+        except (ValueError, TypeError) as exception:
+            raise OSError(f'failed to read the MATLAB file: {exception}') from exception
+
+        self._datasets = {name: MatDataset(self, name, tuple(shape)) for name, shape, _ in variables}
+
+    def read(self, name):
+        """Read a variable from the file.
+
+        :param name: the name of the variable
+        :return: numpy array with the values
+        """
+        from scipy.io import loadmat
+
+        if hasattr(self._filepath, 'seek'):
+            self._filepath.seek(0)
+
+        return numpy.asarray(loadmat(self._filepath, variable_names=[name])[name])
+
+    def close(self):
+        """Release the references to the datasets that were read."""
+        self._datasets = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __contains__(self, name):
+        return name in self._datasets
+
+    def __iter__(self):
+        return iter(self._datasets)
+
+    def __getitem__(self, name):
+        return self._datasets[name]
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""Functions to parse the `run_info.txt` file that MPET writes to its output folder.
+
+MPET records the version and the git branch and commit of the code it was run with and, once the simulation finished,
+the total run time. Depending on the version of MPET, a value is either on the same line as its key, e.g.
+``Total run time: 12.3 s``, or on the line that follows it.
+"""
+import re
+
+__all__ = ('RUN_INFO_KEYS', 'parse_run_info', 'add_integration_time')
+
+RUN_INFO_KEYS = {
+    'mpet version': 'mpet_version',
+    'daetools version': 'daetools_version',
+    'branch name': 'mpet_branch',
+    'commit hash': 'mpet_commit',
+    'total run time': 'wall_time_seconds',
+}
+"""Mapping of the keys in `run_info.txt`, in lower case, onto the keys of the parsed data."""
+
+NUMBER_PATTERN = re.compile(r'[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?')
+
+
+def parse_run_info(run_info):
+    """Parse the content of `run_info.txt` in a single pass.
+
+    :param run_info: iterable of the lines of the file, e.g. an open file handle in text mode, or the content as string
+    :return: dictionary with the values of the keys in ``RUN_INFO_KEYS`` that were found, where the total run time is
+        converted to a float in seconds
+    """
+    if isinstance(run_info, str):
+        run_info = run_info.splitlines()
+
+    parsed_data = {}
+    pending = None
+
+    for line in run_info:
+        stripped = line.strip()
+
+        if not stripped:
+            continue
+
+        key, separator, value = stripped.partition(':')
+        key = key.strip().lower()
+
+        if separator and key in RUN_INFO_KEYS:
+            pending = RUN_INFO_KEYS[key]
+            value = value.strip()
+            if not value:
+                continue
+        elif pending is not None:
+            value = stripped
+        else:
+            continue
+
+        if pending == 'wall_time_seconds':
+            match = NUMBER_PATTERN.search(value)
+            if match:
+                parsed_data[pending] = float(match.group())
+        else:
+            parsed_data[pending] = value
+
+        pending = None
+
+    return parsed_data
+
+
+def add_integration_time(parsed_run_info, parsed_stdout):
+    """Add the `integration_time_seconds` to the parsed `run_info.txt`, if the setup time was found in the stdout.
+
+    The integration time is the remainder of the total wall time, taken from `run_info.txt` or else from the stdout,
+    after the time spent in the initialization of the system.
+
+    :param parsed_run_info: dictionary with the parsed data of `run_info.txt`, which is updated in place
+    :param parsed_stdout: dictionary with the parsed data of the stdout
+    :return: the updated `parsed_run_info`
+    """
+    wall_time = parsed_run_info.get('wall_time_seconds', parsed_stdout.get('wall_time_seconds', None))
+    setup_time = parsed_stdout.get('setup_time_seconds', None)
+
+    if wall_time is not None and setup_time is not None:
+        parsed_run_info['integration_time_seconds'] = max(wall_time - setup_time, 0.)
+
+    return parsed_run_info
@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+"""The heavy stages of parsing the output data, which can be run in a pool of worker processes.
+
+Each stage is a module level function that takes the path of the output data file, or an open file, and the data
+reporter as its first two arguments and that reads the output data itself, optionally up to a given number of time
+steps, such that only the results and not the datasets have to be transferred between the processes. The stages only
+create arrays and dictionaries: the nodes are created by the parser afterwards.
+
+The parser waits for the result of a stage, so running a stage in the pool does not make the parser asynchronous: the
+calling thread, and any event loop that runs in it, is blocked as long as when the stage is run in the calling process.
+What the pool provides is isolation: the peak memory of a stage is allocated in the worker process and if the worker is
+killed, e.g. by the operating system when it runs out of memory, the calling process survives.
+"""
+import concurrent.futures
+import multiprocessing
+
+from .output_data import (get_cell_quantities, get_dataset_prefix, get_performance_metrics, parse_output_data,
+                          read_cell_arrays)
+from .particles import compute_particle_statistics
+from .profiles import extract_profiles
+from .reporters import open_output_data
+
+__all__ = (
+    'StageWorkerError', 'get_process_pool', 'run_stage', 'summarize_output_data', 'compute_cell_results',
+    'read_particle_statistics', 'read_profiles'
+)
+
+
+class StageWorkerError(Exception):
+    """Raised when the worker process that ran a stage died, e.g. because it was killed when it ran out of memory."""
+
+
+_PROCESS_POOLS = {}
+"""Process pools of the current process by size, which are reused by all the parsers that run in the process."""
+
+
+def get_process_pool(size):
+    """Return the process pool with the given number of worker processes, which is created the first time.
+
+    The worker processes are started with the ``spawn`` method, because forking a daemon worker would copy the state of
+    its event loop and communication threads.
+
+    :param size: the number of worker processes
+    :return: a `concurrent.futures.ProcessPoolExecutor` or `None` if the size is zero or `None`
+    """
+    if not size:
+        return None
+
+    if size not in _PROCESS_POOLS:
+        context = multiprocessing.get_context('spawn')
+        _PROCESS_POOLS[size] = concurrent.futures.ProcessPoolExecutor(max_workers=size, mp_context=context)
+
+    return _PROCESS_POOLS[size]
+
+
+def run_stage(size, function, *args, **kwargs):
+    """Run a stage in the process pool of the given size and wait for its result.
+
+    The calling thread is blocked until the result is available. If the pool is broken, e.g. because a worker process
+    was killed by the operating system when it ran out of memory, the pool is discarded and the stage is not run again
+    in the calling process, which would likely run out of memory as well, but a `StageWorkerError` is raised.
+
+    :param size: the number of worker processes of the pool, if zero or `None` the stage is run in the calling process
+    :param function: the module level function of the stage
+    :return: the return value of the function
+    :raises StageWorkerError: if the worker process that ran the stage died
+    """
+    pool = get_process_pool(size)
+
+    if pool is None:
+        return function(*args, **kwargs)
+
+    try:
+        return pool.submit(function, *args, **kwargs).result()
+    except concurrent.futures.process.BrokenProcessPool as exception:
+        _PROCESS_POOLS.pop(size, None)
+        pool.shutdown(wait=False)
+        message = f'the worker process of the stage `{function.__name__}` died: {exception}'
+        raise StageWorkerError(message) from exception
+
+
+def summarize_output_data(filepath, reporter):
+    """Return the scalar results of an output data file, without its time series.
+
+    :param filepath: path or open binary file-like object of the output data file
+    :param reporter: the data reporter that wrote the file
+    :return: dictionary with the scalar results, see
+        :py:func:`~aiida_mpet.parsers.parse_raw.output_data.parse_output_data`
+    :raises KeyError: if one of the required datasets is missing
+    :raises OSError: if the file cannot be read in the format of the data reporter
+    """
+    parsed_data, _ = parse_output_data(filepath, reporter)
+    return parsed_data
+
+
+def compute_cell_results(filepath, reporter, derived_values, voltage_cutoffs=None, downsample_points=None, stop=None):
+    """Compute the performance metrics and the downsampled voltage curves from an output data file.
+
+    :param filepath: path or open binary file-like object of the output data file
+    :param reporter: the data reporter that wrote the file
+    :param derived_values: dictionary with the derived values pickled by MPET
+    :param voltage_cutoffs: optional tuple of the lower and upper voltage cutoffs in V, i.e. `Vmin` and `Vmax`
+    :param downsample_points: the number of points of the voltage curves, which are not computed if `None`
+    :param stop: optional number of time steps after which to stop, e.g. the valid length returned by
+        :py:func:`~aiida_mpet.parsers.parse_raw.output_data.get_valid_length`
+    :return: tuple of the metrics, see `get_performance_metrics`, completed with the `last_valid_time` in s, and a
+        dictionary with the downsampled abscissa and voltage of the `voltage_time` and `voltage_capacity` curves
+    :raises KeyError: if one of the datasets or one of the derived values required for the dimensional quantities is
+        missing
+    """
+    from aiida_mpet.utils.downsampling import downsample_lttb
+
+    with open_output_data(filepath, reporter) as data:
+        arrays = read_cell_arrays(data, get_dataset_prefix(data), stop)
+
+    quantities = get_cell_quantities(arrays, derived_values)
+    metrics = get_performance_metrics(quantities, arrays, voltage_cutoffs)
+    metrics['last_valid_time'] = float(quantities['time'][-1])
+    metrics['last_valid_time_units'] = 's'
+    curves = {}
+
+    if downsample_points is not None:
+        voltage = quantities['voltage']
+        curves['voltage_time'] = downsample_lttb(quantities['time'], voltage, downsample_points)
+
+        if 'capacity' in quantities:
+            curves['voltage_capacity'] = downsample_lttb(quantities['capacity'], voltage, downsample_points)
+
+    return metrics, curves
+
+
+def read_particle_statistics(filepath, reporter, **kwargs):
+    """Read the statistics of the particle filling fractions from an output data file.
+
+    :param filepath: path or open binary file-like object of the output data file
+    :param reporter: the data reporter that wrote the file
+    :param kwargs: keyword arguments of `compute_particle_statistics`
+    :return: dictionary with the statistics, see `compute_particle_statistics`
+    """
+    with open_output_data(filepath, reporter) as data:
+        return compute_particle_statistics(data, get_dataset_prefix(data), **kwargs)
+
+
+def read_profiles(filepath, reporter, **kwargs):
+    """Read snapshots of the profiles across the cell from an output data file.
+
+    :param filepath: path or open binary file-like object of the output data file
+    :param reporter: the data reporter that wrote the file
+    :param kwargs: keyword arguments of `extract_profiles`
+    :return: dictionary with the snapshots, see `extract_profiles`
+    """
+    with open_output_data(filepath, reporter) as data:
+        return extract_profiles(data, **kwargs)
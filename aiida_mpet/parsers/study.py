@@ -1,198 +1,914 @@
 # -*- coding: utf-8 -*-
 """`Parser` implementation for the `MpetrunCalculation` calculation job class."""
+import contextlib
+import os
+import pickle
+import shutil
+import tempfile
 import traceback
 
 import numpy
-
 from aiida import orm
 from aiida.common import exceptions
 
 from aiida_mpet.utils.mapping import get_logging_container
 from .base import Parser
-from .parse_raw.mpetrun import reduce_symmetries
+from .parse_raw.pickles import INPUT_DICT_NAMES, load_pickle, split_scalars_and_arrays
+from .parse_raw.stages import StageWorkerError
 
 
 class MpetrunParser(Parser):
     """`Parser` implementation for the `MpetrunCalculation` calculation job class."""
 
+    DEFAULT_PARSER_OPTIONS = {
+        'include_curves': True,
+        'include_arrays': False,
+        'include_fields': False,
+        'include_simulation_arrays': True,
+        'include_particle_statistics': False,
+        'downsample_points': 500,
+        'array_encoding': 'float64',
+        'time_chunk_size': None,
+        'histogram_bins': 20,
+        'lithium_rich_threshold': 0.5,
+        'particle_chunk_size': 1024,
+        'profile_times': None,
+        'profile_soc': None,
+        'include_differential': False,
+        'differential_window': 11,
+        'differential_regularization': 0.05,
+        'admission_timeout': 60,
+        'process_pool_size': 0,
+        'profile_memory': False,
+        'debug_profile': False,
+    }
+    """Default values of the parser options. The `include_*` options control which of the optional outputs are attached:
+
+        * `include_curves`: the downsampled `voltage_time` and `voltage_capacity` curves
+        * `include_arrays`: the full resolution cell level time series in `output_arrays`
+        * `include_fields`: the electrolyte and electrode fields and particle concentrations in `output_fields`
+        * `include_simulation_arrays`: the arrays of the input dictionaries pickled by MPET in `simulation_arrays`
+        * `include_particle_statistics`: the statistics of the particle filling fractions in `particle_statistics`
+        * `include_differential`: the integrated capacity and the dQ/dV and dV/dQ curves in `differential_capacity`
+
+    The `profile_times`, in s, and `profile_soc` options define at which times and states of charge of the limiting
+    electrode snapshots of the profiles across the cell are attached in `profiles`.
+
+    The `admission_timeout`, in s, is the maximum time to wait for the memory budget of the machine before the output
+    data is parsed regardless, see :py:meth:`admit_output_data`. The admission control is only enabled if a budget is
+    defined, see :py:mod:`aiida_mpet.utils.admission`, and never waits within the event loop of a daemon worker.
+
+    The `process_pool_size` is the number of worker processes in which the heavy stages, i.e. reading the output data,
+    computing the metrics and downsampling the curves, are run, see :py:mod:`~aiida_mpet.parsers.parse_raw.stages`.
+    The parser still waits for each stage, but its peak memory is allocated in the worker process and a worker that is
+    killed fails the parser with `ERROR_PARSER_WORKER_FAILED` instead of taking down the daemon worker. By default the
+    stages are run in the parser process.
+
+    If `profile_memory` is set, the peak memory of each stage of the parser is recorded with `tracemalloc` in addition
+    to its wall time, see :py:meth:`parse`. Since tracing slows down every allocation, it is disabled by default.
+
+    If `debug_profile` is set, the parser is run under `cProfile` and the statistics are attached as `parser_profile`.
+    """
+
+    RUN_INFO_FILENAME = 'run_info.txt'
+    """Name of the file in which MPET records the versions of the code and the total run time."""
+
+    PROFILE_EXTRA_KEY = 'parser_profile'
+    """Extra of the calculation node in which the wall time and peak memory of each stage of the parser are stored."""
+
     def parse(self, **kwargs):
         """Parse the retrieved files of a completed `MpetrunCalculation` into output nodes.
 
         Two nodes that are expected are the default 'retrieved' `FolderData` node which will store the retrieved files
         permanently in the repository. The second required node is a filepath under the key `retrieved_temporary_files`
         which should contain the temporary retrieved files.
+
+        The wall time of each stage of the parser, and its peak memory if the `profile_memory` parser option is set, are
+        recorded, see :py:class:`~aiida_mpet.utils.profiling.StageProfiler`, and stored in the ``PROFILE_EXTRA_KEY``
+        extra of the calculation node, since its attributes can no longer be changed. The stages within the parsing of
+        the output data are prefixed with `output_data.`, such that each stage is recorded under a unique name. If the
+        `debug_profile` parser option is set, the parser is also run under `cProfile`, of which the statistics are
+        attached as the `parser_profile` output.
         """
-        dir_with_bands = None
-        self.exit_code_xml = None
-        self.exit_code_stdout = None
-        self.exit_code_parser = None
+        import cProfile
+
+        from aiida_mpet.utils.profiling import StageProfiler
+
+        parser_options = self.get_parser_options()
+        self.profiler = StageProfiler(trace_memory=parser_options['profile_memory'])
+        debug_profile = cProfile.Profile() if parser_options['debug_profile'] else None
+
+        if debug_profile is not None:
+            debug_profile.enable()
 
         try:
-            settings = self.node.inputs.settings.get_dict()
-        except exceptions.NotExistent:
-            settings = {}
+            with self.profile_stage('total'):
+                exit_code = self.parse_retrieved(parser_options, **kwargs)
+        finally:
+            if debug_profile is not None:
+                debug_profile.disable()
 
-        # Look for optional settings input node and potential 'parser_options' dictionary within it
-        parser_options = settings.get(self.get_parser_settings_key(), None)
+        self.node.set_extra(self.PROFILE_EXTRA_KEY, self.profiler.get_stages())
+
+        if debug_profile is not None:
+            self.out('parser_profile', self.build_profile_data(debug_profile))
+
+        return exit_code
+
+    def parse_retrieved(self, parser_options, **kwargs):
+        """Parse the retrieved files into output nodes and return the exit code, see `parse`.
+
+        :param parser_options: dictionary with parser options
+        :return: the exit code or `None` if the calculation finished successfully
+        """
+        dir_input_dicts = None
+        self.exit_code_stdout = None
+        self.exit_code_input_dicts = None
+        self.exit_code_output_data = None
 
         # Verify that the retrieved_temporary_folder is within the arguments if temporary files were specified
         if self.node.get_attribute('retrieve_temporary_list', None):
             try:
-                dir_with_bands = kwargs['retrieved_temporary_folder']
+                dir_input_dicts = kwargs['retrieved_temporary_folder']
             except KeyError:
                 return self.exit(self.exit_codes.ERROR_NO_RETRIEVED_TEMPORARY_FOLDER)
 
+        with self.profile_stage('file_listing'):
+            self.retrieved_filenames  # pylint: disable=pointless-statement
+
         parameters = self.node.inputs.parameters.get_dict()
-        parsed_xml, logs_xml = self.parse_xml(dir_with_bands, parser_options)
-        parsed_stdout, logs_stdout = self.parse_stdout(parameters, parser_options, parsed_xml)
-        parsed_parameters = self.build_output_parameters(parsed_stdout, parsed_xml)
 
-        self.out('output_parameters', orm.Dict(dict=parsed_parameters))
+        with self.profile_stage('input_dicts'):
+            parsed_input_dicts, logs_input_dicts = self.parse_input_dicts(dir_input_dicts)
+
+        with self.profile_stage('stdout'):
+            parsed_stdout, logs_stdout = self.parse_stdout(parameters, parser_options)
+            parsed_run_info, logs_run_info = self.parse_run_info(parsed_stdout)
 
-        self.emit_logs([logs_stdout, logs_xml], ignore=ignore)
+        derived_values = parsed_input_dicts[0]['derived_values'] if parsed_input_dicts else None
 
-        # First check for specific known problems that can cause a pre-mature termination of the calculation
+        with self.admit_output_data(parser_options), self.profile_stage('output_data'):
+            try:
+                with self.copy_output_data(parser_options):
+                    parsed_output_data, logs_output_data = self.parse_output_data(derived_values, parser_options)
+            except StageWorkerError as exception:
+                parsed_output_data, logs_output_data = {}, get_logging_container()
+                logs_output_data.error.append(str(exception))
+                self.exit_code_output_data = self.exit_codes.ERROR_PARSER_WORKER_FAILED
+
+        with self.profile_stage('node_creation'):
+            output_parameters = self.build_output_parameters(parsed_stdout, parsed_run_info, parsed_output_data)
+            self.out('output_parameters', orm.Dict(dict=output_parameters))
+
+            if parsed_input_dicts:
+                simulation_parameters, simulation_arrays = parsed_input_dicts
+                self.out('simulation_parameters', orm.Dict(dict=simulation_parameters))
+                if simulation_arrays and parser_options['include_simulation_arrays']:
+                    self.out('simulation_arrays', self.build_array_data(simulation_arrays))
+
+        self.emit_logs([logs_stdout, logs_run_info, logs_input_dicts, logs_output_data])
+
+        # First check for specific known problems that cause a pre-mature termination that a continuation would repeat
         exit_code = self.validate_premature_exit(logs_stdout)
         if exit_code:
             return self.exit(exit_code)
 
-        # If the both stdout and xml exit codes are set, there was a basic problem with both output files and there
-        # is no need to investigate any further.
-        if self.exit_code_stdout and self.exit_code_xml:
-            return self.exit(self.exit_codes.ERROR_OUTPUT_FILES)
+        # Without the output data nothing can be concluded about the calculation if the parser itself failed
+        if self.exit_code_output_data == self.exit_codes.ERROR_PARSER_WORKER_FAILED:
+            return self.exit(self.exit_code_output_data)
+
+        # An interrupted run still has valid output data up to the last time step that was written, which has been
+        # attached in the outputs, such that it can be analysed or continued from instead of being discarded. Whether
+        # the interruption was caused by the walltime is recorded in the `out_of_walltime` output parameter.
+        if self.is_partial(parsed_output_data):
+            return self.exit(self.exit_codes.ERROR_OUTPUT_DATA_PARTIAL)
+
+        if parsed_stdout.get('out_of_walltime', False):
+            return self.exit(self.exit_codes.ERROR_OUT_OF_WALLTIME_INTERRUPTED)
 
         if self.exit_code_stdout:
             return self.exit(self.exit_code_stdout)
 
-        if self.exit_code_xml:
-            return self.exit(self.exit_code_xml)
+        if self.exit_code_input_dicts:
+            return self.exit(self.exit_code_input_dicts)
+
+        if self.exit_code_output_data:
+            return self.exit(self.exit_code_output_data)
+
+    def get_parser_options(self):
+        """Return the parser options of the `settings` input, completed with the defaults.
+
+        :return: dictionary with parser options
+        """
+        try:
+            settings = self.node.inputs.settings.get_dict()
+        except exceptions.NotExistent:
+            settings = {}
+
+        # Look for optional settings input node and potential 'parser_options' dictionary within it
+        return {**self.DEFAULT_PARSER_OPTIONS, **(settings.get(self.get_parser_settings_key(), None) or {})}
+
+    def profile_stage(self, name):
+        """Return a context manager that records the wall time and peak memory of a stage of the parser.
+
+        :param name: the name of the stage
+        :return: the context manager of the profiler of `parse`, or one that does nothing outside of `parse`
+        """
+        profiler = getattr(self, 'profiler', None)
+
+        if profiler is None:
+            return contextlib.ExitStack()
+
+        return profiler.stage(name)
+
+    @property
+    def retrieved_filenames(self):
+        """Return the names of the files in the retrieved folder, which is only listed once."""
+        if getattr(self, '_retrieved_filenames', None) is None:
+            self._retrieved_filenames = set(self.retrieved.list_object_names())
 
-        # First determine issues that can occurr for all calculation types. Note that the generic errors, that are
-        # common to all types are done first. If a problem is found there, we return the exit code and don't continue
-        for validator in [self.validate_electronic, self.validate_dynamics, self.validate_ionic]:
-            exit_code = validator(trajectory, parsed_parameters, logs_stdout)
-            if exit_code:
-                return self.exit(exit_code)
+        return self._retrieved_filenames
 
     def get_calculation_type(self):
         """Return the type of the calculation."""
         return self.node.inputs.parameters.get_attribute('CONTROL', {}).get('calculation', 'scf')
 
+    def is_partial(self, parsed_output_data):
+        """Return whether the calculation was interrupted but the output data of its complete time steps was parsed.
+
+        :param parsed_output_data: the raw parsed data returned by `parse_output_data`
+        :return: boolean
+        """
+        if self.exit_code_input_dicts or self.exit_code_output_data:
+            return False
+
+        if not parsed_output_data.get('number_of_time_steps', 0):
+            return False
+
+        incomplete = self.exit_code_stdout == self.exit_codes.ERROR_OUTPUT_STDOUT_INCOMPLETE
+        return incomplete or parsed_output_data.get('truncated', False)
+
     def validate_premature_exit(self, logs):
-        """Analyze problems that will cause a pre-mature termination of the calculation, controlled or not."""
-        if 'ERROR_OUT_OF_WALLTIME' in logs['error'] and 'ERROR_OUTPUT_STDOUT_INCOMPLETE' in logs['error']:
-            return self.exit_codes.ERROR_OUT_OF_WALLTIME_INTERRUPTED
+        """Analyze problems that caused a pre-mature termination of the calculation and that are deterministic.
+
+        A solver that failed to converge or a simulation that ran out of memory fails again in the same way when it is
+        continued, so these are reported with their own exit code even if valid output data was recovered. Messages
+        of the solver in a run that completed nevertheless are not considered fatal.
+
+        :param logs: the logging container of the stdout
+        :return: the exit code or `None` if no such problem was found
+        """
+        if 'ERROR_OUTPUT_STDOUT_INCOMPLETE' not in logs['error']:
+            return None
 
         for error_label in [
-            'ERROR_OUT_OF_WALLTIME',
-                ]:
+            'ERROR_OUT_OF_MEMORY',
+            'ERROR_SOLVER_CONVERGENCE',
+        ]:
             if error_label in logs['error']:
                 return self.exit_codes.get(error_label)
 
+        return None
 
-    def parse_xml(self, dir_with_bands=None, parser_options=None):
-        """Parse the XML output file.
+    def parse_input_dicts(self, dir_input_dicts=None):
+        """Decode the pickled input dictionaries that MPET wrote to its output folder.
 
-        :param dir_with_bands: absolute path to directory containing individual k-point XML files for old XML format.
-        :param parser_options: optional dictionary with parser options
-        :return: tuple of two dictionaries, first with raw parsed data and second with log messages
-        """
-        from .parse_xml.exceptions import XMLParseError, XMLUnsupportedFormatError
-        from .parse_xml.mpetrun.parse import parse_xml
+        The pickles are loaded with the :py:class:`~aiida_mpet.parsers.parse_raw.pickles.RestrictedUnpickler`, which
+        only allows builtin types and numpy arrays. The values are split in scalars, which are returned as a nested
+        dictionary with one key for each input dictionary, e.g. `system` and `cathode`, and arrays, which are returned
+        as a flat dictionary keyed on the name of the input dictionary and the path of the value, e.g.
+        `system_psd_vol_c`.
 
+        :param dir_input_dicts: absolute path of the temporary retrieved folder containing the pickles
+        :return: tuple of two elements, the first is either `None` or a tuple of the scalar and array dictionaries and
+            the second is a dictionary with log messages
+        """
         logs = get_logging_container()
-        parsed_data = {}
 
-        object_names = self.retrieved.list_object_names()
-        xml_files = [xml_file for xml_file in self.node.process_class.xml_filenames if xml_file in object_names]
+        if dir_input_dicts is None:
+            return None, logs
 
-        if not xml_files:
-            if not self.node.get_option('without_xml'):
-                self.exit_code_xml = self.exit_codes.ERROR_OUTPUT_XML_MISSING
-            return parsed_data, logs
+        scalars = {}
+        arrays = {}
 
-        if len(xml_files) > 1:
-            self.exit_code_xml = self.exit_codes.ERROR_OUTPUT_XML_MULTIPLE
-            return parsed_data, logs
+        for name in INPUT_DICT_NAMES:
+            filepath = os.path.join(dir_input_dicts, f'input_dict_{name}.p')
 
-        try:
-            with self.retrieved.open(xml_files[0]) as xml_file:
-                parsed_data, logs = parse_xml(xml_file, dir_with_bands)
-        except IOError:
-            self.exit_code_xml = self.exit_codes.ERROR_OUTPUT_XML_READ
-        except XMLParseError:
-            self.exit_code_xml = self.exit_codes.ERROR_OUTPUT_XML_PARSE
-        except XMLUnsupportedFormatError:
-            self.exit_code_xml = self.exit_codes.ERROR_OUTPUT_XML_FORMAT
-        except Exception:
-            logs.critical.append(traceback.format_exc())
-            self.exit_code_xml = self.exit_codes.ERROR_UNEXPECTED_PARSER_EXCEPTION
+            if not os.path.isfile(filepath):
+                self.exit_code_input_dicts = self.exit_codes.ERROR_INPUT_DICTS_MISSING
+                return None, logs
 
-        return parsed_data, logs
-
-    def parse_stdout(self, parameters, parser_options=None, parsed_xml=None):
+            try:
+                with open(filepath, 'rb') as handle:
+                    decoded = load_pickle(handle)
+            except (OSError, EOFError, pickle.UnpicklingError) as exception:
+                logs.error.append(f'failed to decode `input_dict_{name}.p`: {exception}')
+                self.exit_code_input_dicts = self.exit_codes.ERROR_INPUT_DICTS_READ
+                return None, logs
+            except Exception:
+                logs.critical.append(traceback.format_exc())
+                self.exit_code_input_dicts = self.exit_codes.ERROR_UNEXPECTED_PARSER_EXCEPTION
+                return None, logs
+
+            if not isinstance(decoded, dict):
+                logs.error.append(f'`input_dict_{name}.p` does not contain a dictionary')
+                self.exit_code_input_dicts = self.exit_codes.ERROR_INPUT_DICTS_READ
+                return None, logs
+
+            scalars[name], decoded_arrays = split_scalars_and_arrays(decoded, prefix=f'{name}_')
+            arrays.update(decoded_arrays)
+
+        return (scalars, arrays), logs
+
+    def parse_stdout(self, parameters, parser_options=None):
         """Parse the stdout output file.
 
         :param parameters: the input parameters dictionary
         :param parser_options: optional dictionary with parser options
-        :param parsed_xml: the raw parsed data from the XML output
         :return: tuple of two dictionaries, first with raw parsed data and second with log messages
         """
-        from aiida_mpet.parsers.parse_raw.mpetrun import parse_stdout
+        from aiida_mpet.parsers.parse_raw.study import parse_stdout
 
         logs = get_logging_container()
         parsed_data = {}
 
         filename_stdout = self.node.get_attribute('output_filename')
 
-        if filename_stdout not in self.retrieved.list_object_names():
+        if filename_stdout not in self.retrieved_filenames:
             self.exit_code_stdout = self.exit_codes.ERROR_OUTPUT_STDOUT_MISSING
             return parsed_data, logs
 
+        # The stdout is streamed from the repository, since the stdout of a failing solver can be very large
         try:
-            stdout = self.retrieved.get_object_content(filename_stdout)
-        except IOError:
+            with self.retrieved.open(filename_stdout, 'r') as handle:
+                parsed_data, logs = parse_stdout(handle)
+        except (IOError, UnicodeDecodeError):
             self.exit_code_stdout = self.exit_codes.ERROR_OUTPUT_STDOUT_READ
             return parsed_data, logs
-
-        try:
-            parsed_data, logs = parse_stdout(stdout, parameters, parser_options, parsed_xml)
         except Exception:
             logs.critical.append(traceback.format_exc())
             self.exit_code_stdout = self.exit_codes.ERROR_UNEXPECTED_PARSER_EXCEPTION
+            return parsed_data, logs
 
         # If the stdout was incomplete, most likely the job was interrupted before it could cleanly finish, so the
         # output files are most likely corrupt and cannot be restarted from
         if 'ERROR_OUTPUT_STDOUT_INCOMPLETE' in logs['error']:
             self.exit_code_stdout = self.exit_codes.ERROR_OUTPUT_STDOUT_INCOMPLETE
 
+            if 'ERROR_OUT_OF_WALLTIME' in logs['error']:
+                parsed_data['out_of_walltime'] = True
+
         return parsed_data, logs
 
+    def parse_run_info(self, parsed_stdout=None):
+        """Parse the `run_info.txt` file into the telemetry of the run.
+
+        The versions of MPET and daetools and the total wall time are read from `run_info.txt`. If the time spent in
+        the initialization of the system was found in the stdout, the remainder of the wall time is returned as the
+        `integration_time_seconds`.
+
+        :param parsed_stdout: optional dictionary with the raw parsed data of the stdout
+        :return: tuple of two dictionaries, first with raw parsed data and second with log messages
+        """
+        from .parse_raw.run_info import add_integration_time, parse_run_info
+
+        logs = get_logging_container()
+        parsed_data = {}
+        parsed_stdout = parsed_stdout or {}
+
+        if self.RUN_INFO_FILENAME not in self.retrieved_filenames:
+            logs.warning.append(f'the retrieved folder did not contain `{self.RUN_INFO_FILENAME}`')
+        else:
+            try:
+                with self.retrieved.open(self.RUN_INFO_FILENAME, 'r') as handle:
+                    parsed_data = parse_run_info(handle)
+            except (IOError, UnicodeDecodeError) as exception:
+                logs.warning.append(f'failed to read `{self.RUN_INFO_FILENAME}`: {exception}')
+
+        return add_integration_time(parsed_data, parsed_stdout), logs
+
+    def parse_output_data(self, derived_values=None, parser_options=None):
+        """Parse the output data file and attach the optional array outputs selected by the parser options.
+
+        The cell voltage is attached as a function of time in the `voltage_time` output and, if the capacity can be
+        computed, as a function of capacity in the `voltage_capacity` output. Both are downsampled with the
+        Largest-Triangle-Three-Buckets algorithm to the number of points defined by the `downsample_points` parser
+        option, which preserves the shape of the curves, e.g. the voltage plateaus and the cutoff, at a fraction of the
+        size of the full time series. The full resolution time series are attached in the `output_arrays` output only
+        if the `include_arrays` parser option is set.
+
+        The scalar performance metrics, e.g. the delivered `capacity` and `energy`, are returned in the parsed data,
+        such that they end up as top-level attributes of the `output_parameters` node and can be filtered on directly
+        in a `QueryBuilder`, e.g. ``filters={'attributes.capacity': {'>': 1.5}}``.
+
+        :param derived_values: the derived values decoded from the pickled input dictionaries, which are required to
+            convert the nondimensional output to dimensional quantities. If not defined, no curves are attached and no
+            metrics are computed.
+        :param parser_options: optional dictionary with parser options
+        :return: tuple of two dictionaries, first with raw parsed data and second with log messages
+        """
+        from .parse_raw.output_data import get_cell_quantities, get_dataset_prefix, read_cell_arrays
+        from .parse_raw.stages import compute_cell_results, summarize_output_data
+
+        logs = get_logging_container()
+        parsed_data = {}
+        parser_options = {**self.DEFAULT_PARSER_OPTIONS, **(parser_options or {})}
+
+        if self.output_data_filename not in self.retrieved_filenames:
+            self.exit_code_output_data = self.exit_codes.ERROR_OUTPUT_DATA_MISSING
+            return parsed_data, logs
+
+        try:
+            with self.profile_stage('output_data.read'):
+                parsed_data = self.run_output_data_stage(parser_options, summarize_output_data)
+        except (OSError, KeyError) as exception:
+            logs.error.append(f'failed to read `{self.output_data_filename}`: {exception}')
+            self.exit_code_output_data = self.exit_codes.ERROR_OUTPUT_DATA_READ
+            return parsed_data, logs
+        except StageWorkerError:
+            raise
+        except Exception:
+            logs.critical.append(traceback.format_exc())
+            self.exit_code_output_data = self.exit_codes.ERROR_UNEXPECTED_PARSER_EXCEPTION
+            return parsed_data, logs
+
+        length = parsed_data['number_of_time_steps']
+
+        if not length:
+            logs.error.append(f'`{self.output_data_filename}` does not contain any complete time step')
+            self.exit_code_output_data = self.exit_codes.ERROR_OUTPUT_DATA_READ
+            return parsed_data, logs
+
+        if parsed_data['truncated']:
+            logs.warning.append(f'`{self.output_data_filename}` was truncated, recovered {length} complete time steps')
+
+        if parser_options['include_fields']:
+            try:
+                with self.profile_stage('output_data.fields'):
+                    self.parse_fields(parser_options, logs, length)
+            except (OSError, KeyError) as exception:
+                logs.error.append(f'failed to read the fields from `{self.output_data_filename}`: {exception}')
+                self.exit_code_output_data = self.exit_codes.ERROR_OUTPUT_DATA_READ
+
+        if parser_options['include_particle_statistics']:
+            try:
+                with self.profile_stage('output_data.particle_statistics'):
+                    self.parse_particle_statistics(parser_options, length)
+            except (OSError, KeyError) as exception:
+                logs.error.append(f'failed to read the particles from `{self.output_data_filename}`: {exception}')
+                self.exit_code_output_data = self.exit_codes.ERROR_OUTPUT_DATA_READ
+
+        if derived_values is None:
+            return parsed_data, logs
+
+        sim_params = self.node.inputs.parameters.get_dict().get('Sim Params', {})
+        voltage_cutoffs = (sim_params.get('Vmin', None), sim_params.get('Vmax', None))
+        points = parser_options['downsample_points'] if parser_options['include_curves'] else None
+
+        try:
+            with self.profile_stage('output_data.kpis'):
+                metrics, curves = self.run_output_data_stage(
+                    parser_options,
+                    compute_cell_results,
+                    derived_values=derived_values,
+                    voltage_cutoffs=voltage_cutoffs,
+                    downsample_points=points,
+                    stop=length,
+                )
+        except KeyError as exception:
+            logs.warning.append(f'could not convert the output data to dimensional quantities, missing {exception}')
+            return parsed_data, logs
+
+        parsed_data.update(metrics)
+
+        if parser_options['profile_times'] or parser_options['profile_soc']:
+            try:
+                with self.profile_stage('output_data.profiles'):
+                    self.parse_profiles(derived_values, parser_options, logs)
+            except (OSError, KeyError) as exception:
+                logs.error.append(f'failed to read the profiles from `{self.output_data_filename}`: {exception}')
+                self.exit_code_output_data = self.exit_codes.ERROR_OUTPUT_DATA_READ
+
+        # Only the outputs at full resolution require the time series in the parser process, the metrics and curves are
+        # computed from them by the stage above
+        arrays = None
+
+        if parser_options['include_arrays'] or parser_options['include_differential']:
+            try:
+                with self.profile_stage('output_data.series'), self.open_output_data() as data:
+                    arrays = read_cell_arrays(data, get_dataset_prefix(data), length)
+                quantities = get_cell_quantities(arrays, derived_values)
+            except (OSError, KeyError) as exception:
+                logs.error.append(f'failed to read the time series from `{self.output_data_filename}`: {exception}')
+                self.exit_code_output_data = self.exit_codes.ERROR_OUTPUT_DATA_READ
+                arrays = None
+
+        if parser_options['include_differential'] and arrays is not None:
+            try:
+                with self.profile_stage('output_data.differential'):
+                    parsed_data.update(self.parse_differential(arrays, quantities, derived_values, parser_options))
+            except (KeyError, ValueError) as exception:
+                logs.warning.append(f'could not compute the differential capacity: {exception}')
+
+        with self.profile_stage('output_data.node_creation'):
+            if parser_options['include_arrays'] and arrays is not None:
+                quantities['current'] = arrays['current'] * 3600. / derived_values['t_ref']
+                quantities.update({key: value for key, value in arrays.items() if key.startswith('ffrac_')})
+                series = {key: value for key, value in quantities.items() if key != 'time'}
+                output_arrays = self.build_encoded_array_data(series, parser_options, logs)
+                self.set_time_axis(output_arrays, arrays['times'], derived_values['t_ref'])
+                self.out('output_arrays', output_arrays)
+
+            if 'voltage_time' in curves:
+                self.out('voltage_time', self.build_xy_data(*curves['voltage_time'], ('time', 's')))
+
+            if 'voltage_capacity' in curves:
+                capacity, voltage = curves['voltage_capacity']
+                self.out('voltage_capacity', self.build_xy_data(capacity, voltage, ('capacity', 'mAh/cm^2')))
+
+        return parsed_data, logs
+
+    def parse_fields(self, parser_options, logs, length=None):
+        """Attach the electrolyte and electrode fields and the particle concentrations as the `output_fields` output.
+
+        The fields are read from the output data file in chunks of `time_chunk_size` time steps, which are encoded
+        with the `array_encoding` parser option and stored as separate arrays, such that neither parsing nor loading a
+        range of time steps requires the complete field in memory. The arrays should be read back with
+        :py:func:`~aiida_mpet.utils.encoding.get_decoded_array`.
+
+        :param parser_options: dictionary with parser options
+        :param logs: logging container to which warnings are added
+        :param length: optional number of valid time steps, beyond which the fields are not read
+        """
+        from aiida_mpet.utils.encoding import set_encoded_array
+        from .parse_raw.output_data import get_dataset_prefix, get_field_names, iter_dataset_chunks
+
+        encoding = self.get_array_encoding(parser_options, logs)
+        chunk_size = parser_options.get('time_chunk_size', None)
+
+        fields = orm.ArrayData()
+
+        with self.open_output_data() as data:
+            prefix = get_dataset_prefix(data)
+
+            for name in get_field_names(data, prefix):
+                chunks = iter_dataset_chunks(data[f'{prefix}{name}'], chunk_size, stop=length)
+                set_encoded_array(fields, name.replace('.', '_'), chunks, encoding)
+
+        self.out('output_fields', fields)
+
+    def parse_particle_statistics(self, parser_options, length=None):
+        """Attach the statistics of the particle filling fractions as the `particle_statistics` output.
+
+        The particle datasets are streamed from the output data file in chunks of `particle_chunk_size` time
+        steps, see :py:func:`~aiida_mpet.parsers.parse_raw.particles.compute_particle_statistics`, such that runs with
+        many particles can be parsed without loading all particle concentrations in memory. The shape of the particles
+        of each electrode is taken from the `Particles` section of its input parameters.
+
+        :param parser_options: dictionary with parser options
+        :param length: optional number of valid time steps, beyond which the particles are not read
+        """
+        from .parse_raw.stages import read_particle_statistics
+
+        particle_shapes = {
+            'c': self.node.inputs.cathode_parameters.get_dict().get('Particles', {}).get('shape', None),
+            'a': self.node.inputs.anode_parameters.get_dict().get('Particles', {}).get('shape', None),
+        }
+
+        statistics = self.run_output_data_stage(
+            parser_options,
+            read_particle_statistics,
+            bins=parser_options['histogram_bins'],
+            threshold=parser_options['lithium_rich_threshold'],
+            chunk_size=parser_options['particle_chunk_size'],
+            stop=length,
+            particle_shapes=particle_shapes,
+        )
+
+        if statistics:
+            self.out('particle_statistics', self.build_array_data(statistics))
+
+    def parse_profiles(self, derived_values, parser_options, logs):
+        """Attach the snapshots of the profiles across the cell as the `profiles` output.
+
+        Only the rows of the fields that bracket the requested snapshots are read from the output data file, see
+        :py:func:`~aiida_mpet.parsers.parse_raw.profiles.extract_profiles`.
+
+        :param derived_values: the derived values decoded from the pickled input dictionaries
+        :param parser_options: dictionary with parser options
+        :param logs: logging container to which a warning is added if none of the snapshots could be taken
+        """
+        from .parse_raw.stages import read_profiles
+
+        profiles = self.run_output_data_stage(
+            parser_options,
+            read_profiles,
+            snapshot_times=parser_options['profile_times'],
+            snapshot_soc=parser_options['profile_soc'],
+            t_ref=derived_values['t_ref'],
+            trode=derived_values.get('limtrode', 'c'),
+        )
+
+        if not profiles:
+            logs.warning.append('none of the requested profile snapshots lies within the simulated time')
+            return
+
+        self.out('profiles', self.build_array_data(profiles))
+
+    def parse_differential(self, arrays, quantities, derived_values, parser_options):
+        """Attach the capacity integrated from the current and the differential capacity as `differential_capacity`.
+
+        The current is integrated over time per segment of a `CCsegments` or `CVsegments` profile, see
+        :py:mod:`~aiida_mpet.parsers.parse_raw.differential`, such that the capacity is also defined for constant
+        voltage and segmented profiles, where the filling fraction is not a good measure of the passed charge. The
+        curves are smoothed with a moving average of `differential_window` time steps and the ratios are regularised
+        with `differential_regularization`.
+
+        :param arrays: dictionary with the arrays as returned by `read_cell_arrays`
+        :param quantities: dictionary with the dimensional quantities as returned by `get_cell_quantities`
+        :param derived_values: the derived values decoded from the pickled input dictionaries
+        :param parser_options: dictionary with parser options
+        :return: dictionary with the total `charge_throughput` in mAh/cm^2
+        :raises KeyError: if the capacity of the limiting electrode is not defined in the derived values
+        :raises ValueError: if the segments of the profile cannot be parsed
+        """
+        from .parse_raw.differential import (get_differential_curves, get_segment_durations, get_segment_ids,
+                                             integrate_capacity)
+        from .parse_raw.output_data import get_trode_value
+
+        # The nondimensional current integrated over the nondimensional time is a fraction of the electrode capacity,
+        # which is stored by MPET in A s / m^2 and converted to mA h / cm^2
+        scale = get_trode_value(derived_values, 'cap', derived_values.get('limtrode', 'c')) / 36000.
+
+        sim_params = self.node.inputs.parameters.get_dict().get('Sim Params', {})
+        segment_ids = get_segment_ids(quantities['time'], get_segment_durations(sim_params))
+        capacity, segments = integrate_capacity(arrays['times'], arrays['current'], segment_ids)
+        capacity, segments = capacity * scale, segments * scale
+
+        dqdv, dvdq = get_differential_curves(
+            capacity,
+            quantities['voltage'],
+            window=parser_options['differential_window'],
+            regularization=parser_options['differential_regularization'],
+            segment_ids=segment_ids,
+        )
+
+        differential_capacity = self.build_array_data({
+            'voltage': quantities['voltage'],
+            'capacity': capacity,
+            'dqdv': dqdv,
+            'dvdq': dvdq,
+            'segment_ids': segment_ids,
+            'segment_capacities': segments,
+        })
+        self.set_time_axis(differential_capacity, arrays['times'], derived_values['t_ref'])
+        self.out('differential_capacity', differential_capacity)
+
+        return {'charge_throughput': float(numpy.abs(segments).sum()), 'charge_throughput_units': 'mAh/cm^2'}
+
     @staticmethod
-    def build_output_parameters(parsed_stdout, parsed_xml):
+    def set_time_axis(array_data, times, t_ref):
+        """Set the `time` array of an unstored `ArrayData` node and the attributes that identify the time axis.
+
+        The time axis is stored in full precision in the node itself, such that the node is self-contained, while the
+        attributes allow to find the outputs of calculations on the same output grid, see
+        :py:func:`~aiida_mpet.utils.caching.get_time_axis_attributes`.
+
+        :param array_data: the unstored `ArrayData` node
+        :param times: the nondimensional time axis as written by MPET
+        :param t_ref: the reference time in s used by MPET to make the time nondimensional
+        """
+        from aiida_mpet.utils.caching import get_time_axis_attributes
+
+        times = numpy.atleast_1d(times)
+        array_data.set_array('time', times * t_ref)
+
+        for key, value in get_time_axis_attributes(times, t_ref).items():
+            array_data.set_attribute(key, value)
+
+    def get_data_reporter(self):
+        """Return the data reporter selected by the input parameters, falling back to the default if not supported.
+
+        :return: one of the keys of :py:data:`~aiida_mpet.parsers.parse_raw.reporters.DATA_REPORTERS`
+        """
+        from .parse_raw.reporters import DEFAULT_DATA_REPORTER, get_data_reporter
+
+        try:
+            return get_data_reporter(self.node.inputs.parameters.get_dict())
+        except ValueError:
+            return DEFAULT_DATA_REPORTER
+
+    @property
+    def output_data_filename(self):
+        """Return the name of the output data file written by the data reporter of the calculation."""
+        from .parse_raw.reporters import get_output_data_filename
+
+        return get_output_data_filename(self.get_data_reporter())
+
+    @contextlib.contextmanager
+    def admit_output_data(self, parser_options):
+        """Context manager that waits until the estimated memory of parsing the output data fits in the budget.
+
+        The budget is shared by all parsers of the user on the machine, see :py:mod:`aiida_mpet.utils.admission`, such
+        that the peak memory of the daemon workers does not depend on how many calculations finish at the same time.
+        The admission control is opt-in: without a budget the context is entered immediately. Within a running event
+        loop, e.g. that of a daemon worker, the parser does not wait, but its reservation is still recorded, such that
+        the parsers that can wait, e.g. of `verdi calcjob parse` or scripts, account for it.
+
+        :param parser_options: dictionary with parser options
+        """
+        from aiida_mpet.utils.admission import estimate_decode_size, get_memory_budget, memory_admission
+
+        try:
+            budget = get_memory_budget()
+        except ValueError as exception:
+            self.logger.warning(f'memory admission control disabled: {exception}')
+            budget = 0
+
+        if not budget or self.output_data_filename not in self.retrieved_filenames:
+            yield
+            return
+
+        with self.retrieved.open(self.output_data_filename, 'rb') as handle:
+            file_size = handle.seek(0, os.SEEK_END)
+
+        size = estimate_decode_size(file_size, self.get_data_reporter())
+
+        with memory_admission(size, budget=budget, timeout=parser_options['admission_timeout']) as waited:
+            if waited:
+                self.logger.info(f'waited {waited:.1f} s for the memory budget to parse the output data')
+            yield
+
+    @contextlib.contextmanager
+    def copy_output_data(self, parser_options):
+        """Context manager that copies the retrieved output data file to a temporary file for the worker processes.
+
+        The worker processes of the `process_pool_size` pool read the output data file from a path, whereas the
+        repository of the retrieved folder only provides file handles. The file is therefore copied once to a temporary
+        directory, which is removed when the context is exited. If the pool is disabled, nothing is copied.
+
+        :param parser_options: dictionary with parser options
+        """
+        if not parser_options['process_pool_size'] or self.output_data_filename not in self.retrieved_filenames:
+            yield
+            return
+
+        with tempfile.TemporaryDirectory() as dirpath:
+            filepath = os.path.join(dirpath, os.path.basename(self.output_data_filename))
+
+            with self.retrieved.open(self.output_data_filename, 'rb') as source, open(filepath, 'wb') as target:
+                shutil.copyfileobj(source, target)
+
+            self._output_data_filepath = filepath
+
+            try:
+                yield
+            finally:
+                self._output_data_filepath = None
+
+    def run_output_data_stage(self, parser_options, function, **kwargs):
+        """Run a stage that reads the output data file in the pool of `process_pool_size` worker processes.
+
+        The worker processes read the file from the temporary copy of `copy_output_data`. If the pool is disabled or the
+        file was not copied, the stage is run in the parser process on an open handle of the file instead.
+
+        :param parser_options: dictionary with parser options
+        :param function: the stage, a function of :py:mod:`~aiida_mpet.parsers.parse_raw.stages` that takes the file
+            and the data reporter as its first two arguments
+        :param kwargs: keyword arguments of the stage
+        :return: the return value of the stage
+        """
+        from .parse_raw.stages import run_stage
+
+        size = parser_options['process_pool_size']
+        filepath = getattr(self, '_output_data_filepath', None) if size else None
+
+        if filepath is None:
+            with self.retrieved.open(self.output_data_filename, 'rb') as handle:
+                return function(handle, self.get_data_reporter(), **kwargs)
+
+        return run_stage(size, function, filepath, self.get_data_reporter(), **kwargs)
+
+    @contextlib.contextmanager
+    def open_output_data(self):
+        """Context manager that opens the retrieved output data file with the lazy reader of its data reporter.
+
+        :return: the reader, see :py:func:`~aiida_mpet.parsers.parse_raw.reporters.open_output_data`
+        """
+        from .parse_raw.reporters import open_output_data
+
+        with self.retrieved.open(self.output_data_filename, 'rb') as handle:
+            with open_output_data(handle, self.get_data_reporter()) as data:
+                yield data
+
+    @staticmethod
+    def get_array_encoding(parser_options, logs):
+        """Return the array encoding of the parser options, falling back to `float64` if it is not supported.
+
+        :param parser_options: dictionary with parser options
+        :param logs: logging container to which a warning is added if the encoding is not supported
+        :return: one of :py:data:`~aiida_mpet.utils.encoding.ARRAY_ENCODINGS`
+        """
+        from aiida_mpet.utils.encoding import ARRAY_ENCODINGS
+
+        encoding = parser_options.get('array_encoding', 'float64')
+
+        if encoding not in ARRAY_ENCODINGS:
+            logs.warning.append(f'unsupported `array_encoding` {encoding}, storing the arrays as float64 instead')
+            return 'float64'
+
+        return encoding
+
+    def build_encoded_array_data(self, arrays, parser_options, logs):
+        """Build an `ArrayData` node from a dictionary of time series, encoded and chunked as in `parse_fields`.
+
+        :param arrays: dictionary mapping array names onto numpy arrays with the time as first axis
+        :param parser_options: dictionary with parser options
+        :param logs: logging container to which warnings are added
+        :return: an `ArrayData` instance
+        """
+        from aiida_mpet.utils.encoding import set_encoded_array
+
+        encoding = self.get_array_encoding(parser_options, logs)
+        chunk_size = parser_options.get('time_chunk_size', None)
+        array_data = orm.ArrayData()
+
+        for name, array in arrays.items():
+            size = chunk_size or max(len(array), 1)
+            chunks = (array[start:start + size] for start in range(0, len(array), size))
+            set_encoded_array(array_data, name, chunks, encoding)
+
+        return array_data
+
+    @staticmethod
+    def build_output_parameters(*parsed_dictionaries):
         """Build the dictionary of output parameters from the raw parsed data.
 
-        The output parameters are based on the union of raw parsed data from the XML and stdout output files.
-        Currently, if both raw parsed data dictionaries contain the same key, the stdout version takes precedence, but
-        this should not occur as the `parse_stdout` method should already have solved these conflicts.
+        The output parameters are the union of the raw parsed data dictionaries, where later dictionaries take
+        precedence. Only scalar values are kept: arrays and long lists are attached as separate outputs, because storing
+        them in the attributes of the `output_parameters` node would slow down every query that touches them.
 
-        :param parsed_stdout: the raw parsed data dictionary from the stdout output file
-        :param parsed_xml: the raw parsed data dictionary from the XML output file
-        :return: the union of the two raw parsed data dictionaries
+        :param parsed_dictionaries: the raw parsed data dictionaries
+        :return: dictionary with the scalar values of the union of the dictionaries
         """
-        for key in list(parsed_stdout.keys()):
-            if key in list(parsed_xml.keys()):
-                if parsed_stdout[key] != parsed_xml[key]:
-                    raise AssertionError(
-                        '{} found in both dictionaries with different values: {} vs. {}'.format(
-                            key, parsed_stdout[key], parsed_xml[key]
-                        )
-                    )
+        parameters = {}
 
-        parameters = dict(list(parsed_xml.items()) + list(parsed_stdout.items()))
+        for parsed_data in parsed_dictionaries:
+            for key, value in parsed_data.items():
+                if value is None or isinstance(value, (bool, int, float, str)):
+                    parameters[key] = value
 
         return parameters
 
+    @staticmethod
+    def build_xy_data(x, voltage, x_name_units, points=None):
+        """Build an `XyData` node of the voltage as a function of the given abscissa, optionally downsampled with LTTB.
+
+        :param x: array with the abscissae
+        :param voltage: array with the voltage in V
+        :param x_name_units: tuple of the name and units of the abscissa
+        :param points: optional number of points to downsample to
+        :return: an `XyData` instance
+        """
+        from aiida_mpet.utils.downsampling import downsample_lttb
+
+        if points is not None:
+            x, voltage = downsample_lttb(x, voltage, points)
+
+        xy_data = orm.XyData()
+        xy_data.set_x(x, *x_name_units)
+        xy_data.set_y([voltage], ['voltage'], ['V'])
+
+        return xy_data
+
+    @staticmethod
+    def build_profile_data(profile):
+        """Build a `SinglefileData` node with the statistics of a `cProfile` profile.
+
+        The statistics can be loaded with ``pstats.Stats(filepath)`` after copying the file out of the repository.
+
+        :param profile: the `cProfile.Profile` instance
+        :return: a `SinglefileData` instance
+        """
+        with tempfile.TemporaryDirectory() as dirpath:
+            filepath = os.path.join(dirpath, 'parser.pstats')
+            profile.dump_stats(filepath)
+            return orm.SinglefileData(file=filepath)
+
+    @staticmethod
+    def build_array_data(arrays):
+        """Build an `ArrayData` node from a dictionary of numpy arrays.
+
+        :param arrays: dictionary mapping array names onto numpy arrays
+        :return: an `ArrayData` instance
+        """
+        array_data = orm.ArrayData()
+
+        for name, array in arrays.items():
+            array_data.set_array(name, array)
+
+        return array_data
+
     @staticmethod
     def get_parser_settings_key():
         """Return the key that contains the optional parser options in the `settings` input node."""
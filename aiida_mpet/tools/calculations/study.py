@@ -1,5 +1,9 @@
 # -*- coding: utf-8 -*-
 """Tools for nodes created by running the `MpetrunCalculation` class."""
+import json
+import os
+import tempfile
+
 from aiida.common import exceptions
 from aiida.tools.calculations import CalculationTools
 
@@ -11,4 +15,164 @@ class MpetrunCalculationTools(CalculationTools):
     attribute.
     """
 
-    # pylint: disable=too-few-public-methods
+    def get_profiles(self, times=None, soc=None, fields=None):
+        """Return snapshots of the profiles across the cell at the given times and states of charge.
+
+        The profiles are interpolated from the retrieved output data file, of which only the rows that bracket the
+        snapshots are read, see :py:func:`~aiida_mpet.parsers.parse_raw.profiles.extract_profiles`.
+
+        :param times: optional list of times in s
+        :param soc: optional list of states of charge of the limiting electrode
+        :param fields: optional list of fields, by default the electrolyte concentration and potential and the electrode
+            potential
+        :return: dictionary with the `snapshot_times` in s, the `snapshot_soc` and the profile of each field
+        :raises ValueError: if the node does not have the outputs that are required to extract the profiles
+        """
+        from aiida_mpet.parsers.parse_raw.profiles import PROFILE_FIELDS, extract_profiles
+        from aiida_mpet.parsers.parse_raw.reporters import get_data_reporter, get_output_data_filename, open_output_data
+
+        try:
+            retrieved = self._node.outputs.retrieved
+            derived_values = self._node.outputs.simulation_parameters.get_dict()['derived_values']
+        except (exceptions.NotExistent, KeyError) as exception:
+            raise ValueError(f'the node does not have the outputs required to extract the profiles: {exception}')
+
+        reporter = get_data_reporter(self._node.inputs.parameters.get_dict())
+        filename = get_output_data_filename(reporter)
+
+        if filename not in retrieved.list_object_names():
+            raise ValueError(f'the retrieved folder does not contain `{filename}`')
+
+        with retrieved.open(filename, 'rb') as handle:
+            with open_output_data(handle, reporter) as data:
+                return extract_profiles(
+                    data,
+                    snapshot_times=times,
+                    snapshot_soc=soc,
+                    t_ref=derived_values['t_ref'],
+                    trode=derived_values.get('limtrode', 'c'),
+                    fields=fields or PROFILE_FIELDS,
+                )
+
+    def get_progress(self, python='python3', reset=False):
+        """Return the time series and performance metrics that a running calculation has written so far.
+
+        The output data in the remote working directory is read by the python of the remote computer, see
+        :py:func:`~aiida_mpet.parsers.parse_raw.progress.get_remote_read_command`, which only returns the time steps
+        beyond the ones returned by the previous call. Those are kept in a local cache, together with the offset, such
+        that repeated calls only transfer the appended time steps. If the remote python cannot read the file, e.g.
+        because `h5py` is not installed, the file is copied and read with the tolerant reader of the parser instead.
+
+        The dimensional `time`, `voltage` and `current` and the performance metrics are only returned once the pickled
+        derived values of MPET are available in the remote working directory.
+
+        :param python: the python executable on the remote computer
+        :param reset: if `True`, the cache is discarded and all time steps are transferred again
+        :return: dictionary with the `number_of_time_steps`, the nondimensional `times`, `phi_applied` and `current`
+            arrays, the filling fractions and, if the derived values are available, the `time` in s, the `voltage` in
+            V, the `current` in C-rate and the `metrics`, see
+            :py:func:`~aiida_mpet.parsers.parse_raw.output_data.get_performance_metrics`
+        :raises ValueError: if the node does not have a remote folder or its data reporter does not write HDF5
+        """
+        import numpy
+
+        from aiida_mpet.parsers.parse_raw.output_data import get_cell_quantities, get_performance_metrics
+        from aiida_mpet.parsers.parse_raw.reporters import get_data_reporter, get_output_data_filename
+
+        try:
+            remote_folder = self._node.outputs.remote_folder
+        except exceptions.NotExistent as exception:
+            raise ValueError('the node does not have a remote folder') from exception
+
+        filename = get_output_data_filename(get_data_reporter(self._node.inputs.parameters.get_dict()))
+
+        if not filename.endswith('.hdf5'):
+            raise ValueError(f'the progress can only be followed for output data in HDF5, not `{filename}`')
+
+        cache_filepath = os.path.join(tempfile.gettempdir(), 'aiida-mpet-progress', f'{self._node.uuid}.npz')
+        arrays = {}
+
+        if not reset and os.path.isfile(cache_filepath):
+            with numpy.load(cache_filepath) as cache:
+                arrays = {key: cache[key] for key in cache.files}
+
+        offset = len(arrays.get('times', []))
+        dirpath = os.path.join(remote_folder.get_remote_path(), 'sim_output')
+
+        with remote_folder.get_authinfo().get_transport() as transport:
+            length, appended = self._read_remote_output_data(transport, os.path.join(dirpath, filename), offset, python)
+            derived_values = self._read_remote_derived_values(transport, dirpath)
+
+        if length < offset:
+            # The output file was rewritten, e.g. because the calculation was restarted, so the cache is stale
+            return self.get_progress(python=python, reset=True)
+
+        for key, values in appended.items():
+            arrays[key] = numpy.concatenate([arrays[key], values]) if key in arrays else values
+
+        os.makedirs(os.path.dirname(cache_filepath), exist_ok=True)
+        numpy.savez(cache_filepath, **arrays)
+
+        progress = {'number_of_time_steps': length, **arrays}
+
+        if derived_values is not None and length:
+            try:
+                quantities = get_cell_quantities(arrays, derived_values)
+            except KeyError:
+                return progress
+
+            sim_params = self._node.inputs.parameters.get_dict().get('Sim Params', {})
+            voltage_cutoffs = (sim_params.get('Vmin', None), sim_params.get('Vmax', None))
+            progress.update(quantities)
+            progress['current'] = arrays['current'] * 3600. / derived_values['t_ref']
+            progress['metrics'] = get_performance_metrics(quantities, arrays, voltage_cutoffs)
+
+        return progress
+
+    @staticmethod
+    def _read_remote_output_data(transport, filepath, offset, python):
+        """Return the number of complete time steps and the arrays of those beyond the offset of a remote file."""
+        import numpy
+
+        from aiida_mpet.parsers.parse_raw.progress import get_remote_read_command, read_appended_time_series
+        from aiida_mpet.parsers.parse_raw.reporters import open_output_data
+
+        retval, stdout, _ = transport.exec_command_wait(get_remote_read_command(filepath, offset, python))
+
+        if retval == 0:
+            try:
+                result = json.loads(stdout)
+            except ValueError:
+                pass
+            else:
+                return result['length'], {key: numpy.asarray(values) for key, values in result['arrays'].items()}
+
+        with tempfile.TemporaryDirectory() as dirpath:
+            localpath = os.path.join(dirpath, os.path.basename(filepath))
+
+            try:
+                transport.getfile(filepath, localpath)
+                with open_output_data(localpath) as handle:
+                    return read_appended_time_series(handle, offset)
+            except (OSError, KeyError):
+                # The file does not exist yet or MPET did not write the first time step
+                return offset, {}
+
+    @staticmethod
+    def _read_remote_derived_values(transport, dirpath):
+        """Return the derived values pickled by MPET in a remote folder or `None` if they are not available yet."""
+        import pickle
+
+        from aiida_mpet.parsers.parse_raw.pickles import load_pickle
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            localpath = os.path.join(tmpdir, 'input_dict_derived_values.p')
+
+            try:
+                transport.getfile(os.path.join(dirpath, 'input_dict_derived_values.p'), localpath)
+                with open(localpath, 'rb') as handle:
+                    derived_values = load_pickle(handle)
+            except (OSError, EOFError, pickle.UnpicklingError):
+                return None
+
+        return derived_values if isinstance(derived_values, dict) else None
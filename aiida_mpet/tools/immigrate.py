@@ -0,0 +1,376 @@
+# -*- coding: utf-8 -*-
+"""Utilities to immigrate MPET simulations that were run outside of AiiDA as `MpetrunCalculation` nodes.
+
+MPET writes the parsed configuration of a simulation as pickled dictionaries next to its output data, e.g.
+``input_dict_system.p``, ``input_dict_cathode.p`` and ``input_dict_anode.p``. These are used to reconstruct the input
+parameters of the calculation. The expensive part of the immigration, i.e. reading, hashing and parsing the potentially
+very large output files, is performed in a pool of worker processes that do not access the database. The nodes are then
+created and stored by the main process in batches, each in a single database transaction.
+
+Example::
+
+    from aiida_mpet.tools.immigrate import immigrate_folders
+
+    nodes = immigrate_folders('/data/mpet_runs', code=load_code('mpet@cluster'), processes=16)
+"""
+import functools
+import hashlib
+import multiprocessing
+import os
+import pickle
+
+from aiida_mpet.parsers.parse_raw.pickles import INPUT_DICT_NAMES, load_pickle, split_scalars_and_arrays
+from aiida_mpet.utils.validation.parameters import ELECTRODE_KEYWORDS, SYSTEM_KEYWORDS
+
+__all__ = ('find_run_folders', 'reconstruct_parameters', 'immigrate_folders')
+
+INPUT_DICT_PORTS = {'parameters': 'system', 'cathode_parameters': 'cathode', 'anode_parameters': 'anode'}
+"""Mapping of the input ports of the `MpetrunCalculation` onto the names of the input dictionaries pickled by MPET."""
+
+RETRIEVED_FILENAMES = ('run_info.txt', 'output_data.hdf5', 'output_data.mat', 'daetools_config_options.txt')
+"""Files of an MPET output folder that are stored in the `retrieved` node, as retrieved by the `MpetrunCalculation`.
+
+The pickled input dictionaries are not stored, but decoded into the `simulation_parameters` and `simulation_arrays`
+outputs, like the `MpetrunParser` does.
+"""
+
+HASHED_FILENAMES = (
+    'output_data.hdf5', 'output_data.mat', 'input_dict_system.p', 'input_dict_cathode.p', 'input_dict_anode.p'
+)
+"""Files whose content determines the hash of an immigrated run, used to avoid immigrating the same run twice."""
+
+_TRODE_SUFFIXES = ('c', 'a', 's')
+
+
+def find_run_folders(root):
+    """Return the paths of all folders below the root that contain the output of an MPET simulation.
+
+    :param root: path of the directory tree to walk
+    :return: sorted list of absolute folder paths
+    """
+    folders = []
+
+    for dirpath, _, filenames in os.walk(root):
+        if all(f'input_dict_{name}.p' in filenames for name in INPUT_DICT_PORTS.values()):
+            folders.append(os.path.abspath(dirpath))
+
+    return sorted(folders)
+
+
+def _to_python(value):
+    """Convert a numpy scalar to the corresponding python type, returning `None` for non-scalar values."""
+    import numpy
+
+    if isinstance(value, numpy.generic):
+        value = value.item()
+
+    if isinstance(value, (bool, int, float, str)):
+        return value
+
+    return None
+
+
+def reconstruct_parameters(flat, keywords):
+    """Reconstruct the sectioned parameters of an MPET configuration file from the flat dictionary pickled by MPET.
+
+    Keywords are assigned to sections using the mapping of known keywords. Values that MPET combined for the different
+    parts of the cell, e.g. ``{'c': 10, 'a': 10}`` for ``Nvol``, are split again in the original keywords.
+
+    :param flat: the unpickled dictionary
+    :param keywords: mapping of section names onto mappings of keywords onto their type, e.g. ``SYSTEM_KEYWORDS``
+    :return: tuple of the parameters dictionary and a sorted list of keywords that could not be reconstructed
+    """
+    sections = {keyword: section for section, content in keywords.items() for keyword in content}
+    parameters = {}
+    skipped = []
+
+    for key, value in flat.items():
+        if isinstance(value, dict) and value and set(value).issubset(_TRODE_SUFFIXES):
+            items = [(f'{key}_{trode}', trode_value) for trode, trode_value in value.items()]
+        else:
+            items = [(key, value)]
+
+        for keyword, item in items:
+            item = _to_python(item)
+
+            if keyword not in sections or item is None:
+                skipped.append(keyword)
+                continue
+
+            parameters.setdefault(sections[keyword], {})[keyword] = item
+
+    return parameters, sorted(skipped)
+
+
+def _hash_files(folder, filenames, chunk_size=2**24):
+    """Return the sha256 hex digest of the contents of the given files in the folder, in chunks of bounded size."""
+    digest = hashlib.sha256()
+
+    for filename in filenames:
+        filepath = os.path.join(folder, filename)
+
+        if not os.path.isfile(filepath):
+            continue
+
+        digest.update(filename.encode('utf-8'))
+
+        with open(filepath, 'rb') as handle:
+            for chunk in iter(lambda: handle.read(chunk_size), b''):  # pylint: disable=cell-var-from-loop
+                digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+def _process_folder(folder, stdout_filename=None):
+    """Read, hash and parse the content of a single MPET output folder, without accessing the database.
+
+    The output parameters are parsed like the `MpetrunParser` does: the performance metrics and the `last_valid_time`
+    are computed from the complete time steps of the output data and the telemetry is read from `run_info.txt` and, if
+    present, the stdout. A run whose output data was truncated or whose stdout is incomplete is marked as ``partial``.
+
+    :param folder: absolute path of the output folder
+    :param stdout_filename: optional name of the file in the folder with the stdout of MPET
+    :return: dictionary with the folder, the hash, the reconstructed input parameters, the raw parsed data, whether the
+        run is partial and a list of warnings, or with the folder and an ``error`` message if the folder could not be
+        processed.
+    """
+    from aiida_mpet.parsers.parse_raw.reporters import get_data_reporter, get_output_data_filename
+    from aiida_mpet.parsers.parse_raw.run_info import add_integration_time, parse_run_info
+    from aiida_mpet.parsers.parse_raw.stages import compute_cell_results, summarize_output_data
+    from aiida_mpet.parsers.parse_raw.study import parse_stdout
+
+    result = {'folder': folder, 'warnings': []}
+
+    try:
+        decoded = {}
+
+        for name in INPUT_DICT_NAMES:
+            with open(os.path.join(folder, f'input_dict_{name}.p'), 'rb') as handle:
+                decoded[name] = load_pickle(handle)
+
+        inputs = {}
+
+        for port, name in INPUT_DICT_PORTS.items():
+            keywords = SYSTEM_KEYWORDS if port == 'parameters' else ELECTRODE_KEYWORDS
+            inputs[port], skipped = reconstruct_parameters(decoded[name], keywords)
+
+            if skipped:
+                message = f'input_dict_{name}.p: skipped unknown or non-scalar keywords {", ".join(skipped)}'
+                result['warnings'].append(message)
+
+        result['inputs'] = inputs
+        result['simulation_parameters'] = {}
+        result['simulation_arrays'] = {}
+
+        for name, value in decoded.items():
+            scalars, arrays = split_scalars_and_arrays(value, prefix=f'{name}_')
+            result['simulation_parameters'][name] = scalars
+            result['simulation_arrays'].update(arrays)
+
+        result['hash'] = _hash_files(folder, HASHED_FILENAMES)
+
+        parsed_stdout = {}
+        incomplete = False
+
+        if stdout_filename and os.path.isfile(os.path.join(folder, stdout_filename)):
+            with open(os.path.join(folder, stdout_filename), 'r', encoding='utf-8') as handle:
+                parsed_stdout, logs_stdout = parse_stdout(handle)
+
+            incomplete = 'ERROR_OUTPUT_STDOUT_INCOMPLETE' in logs_stdout['error']
+
+            if incomplete and 'ERROR_OUT_OF_WALLTIME' in logs_stdout['error']:
+                parsed_stdout['out_of_walltime'] = True
+
+        parsed_run_info = {}
+
+        if os.path.isfile(os.path.join(folder, 'run_info.txt')):
+            with open(os.path.join(folder, 'run_info.txt'), 'r', encoding='utf-8') as handle:
+                parsed_run_info = parse_run_info(handle)
+
+        parsed_run_info = add_integration_time(parsed_run_info, parsed_stdout)
+
+        reporter = get_data_reporter(inputs['parameters'])
+        filename = get_output_data_filename(reporter)
+        filepath = os.path.join(folder, filename)
+        parsed_output_data = summarize_output_data(filepath, reporter)
+        length = parsed_output_data['number_of_time_steps']
+
+        if not length:
+            return {'folder': folder, 'error': f'`{filename}` does not contain any complete time step'}
+
+        if parsed_output_data['truncated']:
+            result['warnings'].append(f'`{filename}` was truncated, recovered {length} complete time steps')
+
+        sim_params = inputs['parameters'].get('Sim Params', {})
+        voltage_cutoffs = (sim_params.get('Vmin', None), sim_params.get('Vmax', None))
+
+        try:
+            derived_values = decoded['derived_values']
+            metrics, _ = compute_cell_results(filepath, reporter, derived_values, voltage_cutoffs, stop=length)
+        except KeyError as exception:
+            message = f'could not convert the output data to dimensional quantities, missing {exception}'
+            result['warnings'].append(message)
+        else:
+            parsed_output_data.update(metrics)
+
+        result['parsed_data'] = [parsed_stdout, parsed_run_info, parsed_output_data]
+        result['retrieved_filenames'] = RETRIEVED_FILENAMES + ((stdout_filename,) if stdout_filename else ())
+        result['partial'] = incomplete or parsed_output_data['truncated']
+    except (OSError, KeyError, ValueError, AttributeError, pickle.UnpicklingError, EOFError) as exception:
+        return {'folder': folder, 'error': f'{type(exception).__name__}: {exception}'}
+
+    return result
+
+
+def _create_nodes(result, code, computer, metadata):
+    """Create and store the nodes of an immigrated `MpetrunCalculation` from the result of `_process_folder`.
+
+    The output parameters are built like the `MpetrunParser` does. A partial run is sealed with the exit status of
+    `ERROR_OUTPUT_DATA_PARTIAL`, like the parser does for a calculation that was interrupted, which keeps it out of the
+    successful calculations in queries while its outputs can still be analysed.
+
+    :return: the stored and sealed `CalcJobNode`
+    """
+    from aiida import orm
+    from aiida.common.links import LinkType
+    from aiida.engine import ProcessState
+    from aiida.plugins import CalculationFactory, ParserFactory
+
+    MpetrunCalculation = CalculationFactory('mpet.mpetrun')
+    MpetrunParser = ParserFactory('mpet.mpetrun')
+
+    folder = result['folder']
+    options = MpetrunCalculation.spec().inputs['metadata']['options']
+    electrodes = result['inputs']['parameters'].setdefault('Electrodes', {})
+    electrodes['cathode'] = options['cathode_input_filename'].default
+    electrodes['anode'] = options['anode_input_filename'].default
+
+    node = orm.CalcJobNode(computer=computer, process_type=MpetrunCalculation.build_process_type())
+    node.set_process_label(MpetrunCalculation.__name__)
+    node.set_remote_workdir(folder)
+
+    for name, option in metadata.get('options', {}).items():
+        node.set_option(name, option)
+
+    node.add_incoming(code, link_type=LinkType.INPUT_CALC, link_label='code')
+
+    for link_label, input_node in result['input_nodes'].items():
+        node.add_incoming(input_node, link_type=LinkType.INPUT_CALC, link_label=link_label)
+
+    node.set_extra('immigrated_hash', result['hash'])
+    node.store(with_transaction=False)
+
+    retrieved = orm.FolderData()
+    for filename in RETRIEVED_FILENAMES:
+        filepath = os.path.join(folder, filename)
+        if os.path.isfile(filepath):
+            retrieved.put_object_from_file(filepath, filename)
+
+    outputs = {
+        'retrieved': retrieved,
+        'remote_folder': orm.RemoteData(computer=computer, remote_path=folder),
+        'output_parameters': orm.Dict(dict=MpetrunParser.build_output_parameters(*result['parsed_data'])),
+        'simulation_parameters': orm.Dict(dict=result['simulation_parameters']),
+    }
+
+    if result['simulation_arrays']:
+        outputs['simulation_arrays'] = orm.ArrayData()
+        for name, array in result['simulation_arrays'].items():
+            outputs['simulation_arrays'].set_array(name, array)
+
+    for link_label, output_node in outputs.items():
+        output_node.add_incoming(node, link_type=LinkType.CREATE, link_label=link_label)
+        output_node.store(with_transaction=False)
+
+    node.set_process_state(ProcessState.FINISHED)
+
+    if result['partial']:
+        exit_code = MpetrunCalculation.exit_codes.ERROR_OUTPUT_DATA_PARTIAL
+        node.set_exit_status(exit_code.status)
+        node.set_exit_message(exit_code.message)
+    else:
+        node.set_exit_status(0)
+
+    node.seal()
+
+    return node
+
+
+def immigrate_folders(
+    root, code, computer=None, metadata=None, processes=None, batch_size=100, logger=None, stdout_filename=None
+):
+    """Immigrate all MPET simulations below a root directory as `MpetrunCalculation` nodes.
+
+    The output folders are processed in a pool of worker processes, see `_process_folder`, and the nodes of each batch
+    of processed folders are stored in a single database transaction. Folders whose content has already been immigrated,
+    as determined by the hash of their input and output files, are skipped, which means an interrupted immigration can
+    simply be restarted.
+
+    :param root: path of the directory tree that contains the MPET output folders
+    :param code: the `Code` that represents the MPET installation that was used to run the simulations
+    :param computer: the `Computer` the simulations were run on, by default the computer of the code
+    :param metadata: optional dictionary with metadata of the calculations, e.g. the options with the resources
+    :param processes: number of worker processes, by default the number of CPUs
+    :param batch_size: number of calculations that are stored per database transaction
+    :param logger: optional logger to report skipped folders and warnings to
+    :param stdout_filename: optional name of the file in each output folder with the stdout of MPET, which is parsed
+        and stored in the `retrieved` node if it exists
+    :return: list of the immigrated `CalcJobNode` instances
+    """
+    from aiida import orm
+    from aiida.manage.manager import get_manager
+
+    from aiida_mpet.utils.caching import get_interned_dicts
+
+    computer = computer or code.computer
+    metadata = metadata or {}
+    backend = get_manager().get_backend()
+    folders = find_run_folders(root)
+    nodes = []
+
+    builder = orm.QueryBuilder().append(
+        orm.CalcJobNode, filters={'extras': {'has_key': 'immigrated_hash'}}, project=['extras.immigrated_hash']
+    )
+    immigrated = {hash_ for hash_, in builder.iterall()}
+
+    def store_batch(batch):
+        """Store the nodes of a batch of processed folders in a single transaction."""
+        values = [result['inputs'][port] for result in batch for port in INPUT_DICT_PORTS]
+        interned = iter(get_interned_dicts(values))
+
+        for result in batch:
+            result['input_nodes'] = {port: next(interned) for port in INPUT_DICT_PORTS}
+
+        with backend.transaction():
+            nodes.extend(_create_nodes(result, code, computer, metadata) for result in batch)
+
+    # The workers are spawned, because forking would copy the connections of the database that was queried above
+    context = multiprocessing.get_context('spawn')
+
+    with context.Pool(processes) as pool:
+        batch = []
+
+        for result in pool.imap_unordered(functools.partial(_process_folder, stdout_filename=stdout_filename), folders):
+            if 'error' in result:
+                if logger:
+                    logger.warning(f'skipping `{result["folder"]}`: {result["error"]}')
+                continue
+
+            if result['hash'] in immigrated:
+                continue
+
+            if logger:
+                for warning in result['warnings']:
+                    logger.warning(f'`{result["folder"]}`: {warning}')
+
+            immigrated.add(result['hash'])
+            batch.append(result)
+
+            if len(batch) >= batch_size:
+                store_batch(batch)
+                batch = []
+
+        if batch:
+            store_batch(batch)
+
+    return nodes
@@ -1,43 +1,116 @@
 # -*- coding: utf-8 -*-
-"""Utilities to parse Quantum ESPRESSO mpetrun.x input files into AiiDA nodes or builders."""
-import copy
-import re
-import numpy as np
+"""Utilities to parse MPET configuration files into AiiDA nodes or builders."""
+import configparser
+import os
 
-from aiida.orm import Code, Dict
+from aiida.orm import Code
 from aiida.common.folders import Folder
-from aiida.plugins import CalculationFactory, DataFactory
-from qe_tools.parsers import MpetrunInputFile as BaseMpetrunInputFile
+from aiida.plugins import CalculationFactory
 
-from .base import StructureParseMixin
+from aiida_mpet.calculations.helpers import MPETInputValidationError
+from aiida_mpet.utils.caching import get_interned_dicts
+from aiida_mpet.utils.validation.parameters import ELECTRODE_KEYWORDS, SYSTEM_KEYWORDS, validate_parameters
 
+ELECTRODE_FILENAME_OPTIONS = {'cathode': 'cathode_input_filename', 'anode': 'anode_input_filename'}
+"""Mapping of the electrode keywords of the `Electrodes` section onto the options with the corresponding filename."""
 
-class MpetrunInputFile(StructureParseMixin, BaseMpetrunInputFile):
-    """Parser of Quantum ESPRESSO mpetrun.x input file into AiiDA nodes.
 
-    .. note:: This mixes in :class:`~aiida_mpet.tools.base.StructureParseMixin` which adds the functionality
-        to parse a :class:`~aiida.nodes.orm.data.structure.StructureData` from the input file, instead of a plain
-        dictionary returned by :meth:`qe_tools.parsers.qeinputparser.get_structure_from_qeinput`. Note that one cannot
-        directly add this functionality to a sub class of :class:`~qe_tools.parsers.qeinputparser.QeInputFile` and then
-        subsequently sub class that here, because the :class:`~qe_tools.parsers.qeinputparser.CpInputFile` is also
-        required and sub classing both leads to problems with the MRO.
+def convert_config_value(keyword, value, expected_type=None):
+    """Convert the string value of a keyword in an MPET configuration file to the corresponding python type.
+
+    :param keyword: the keyword
+    :param value: the raw string value as read from the configuration file
+    :param expected_type: the type the value should have: [`INTEGER`, `REAL`, `CHARACTER`, `LOGICAL`]. If not
+        specified, the type is inferred from the value, trying integers, floats and booleans before falling back to a
+        string.
+    :return: the converted value
+    :raises TypeError: if the value cannot be converted to the expected type
+    """
+    value = value.strip()
+
+    if expected_type is None:
+        for candidate in ('INTEGER', 'REAL', 'LOGICAL'):
+            try:
+                return convert_config_value(keyword, value, candidate)
+            except TypeError:
+                continue
+        return value
+
+    expected_type = expected_type.upper()
+
+    if expected_type == 'CHARACTER':
+        return value
+
+    if expected_type == 'LOGICAL':
+        try:
+            return configparser.ConfigParser.BOOLEAN_STATES[value.lower()]
+        except KeyError as exception:
+            raise TypeError(f'Expected a boolean for keyword {keyword}, found `{value}` instead') from exception
+
+    converter = {'INTEGER': int, 'REAL': float}[expected_type]
+
+    try:
+        return converter(value)
+    except ValueError as exception:
+        raise TypeError(f'Expected a {converter.__name__} for keyword {keyword}, found `{value}` instead') from exception
+
+
+class MpetrunInputFile:
+    """Parser of an MPET configuration file, i.e. a system or electrode input file in INI format.
+
+    The values are converted to the types defined for the known keywords of the sections, which are the same that are
+    used by :py:func:`~aiida_mpet.utils.validation.parameters.validate_parameters`. Values of unknown keywords are
+    converted to integers, floats or booleans if possible and are kept as strings otherwise.
     """
 
+    def __init__(self, content, keywords):
+        """Parse the content of a configuration file.
+
+        :param content: the content of the configuration file as a string
+        :param keywords: mapping of section names onto mappings of keywords onto their type, e.g. ``SYSTEM_KEYWORDS``
+        :raises `~aiida_mpet.calculations.helpers.MPETInputValidationError`: if the file cannot be parsed or contains
+            invalid values
+        """
+        parser = configparser.ConfigParser(interpolation=None, inline_comment_prefixes=('#', ';'))
+        parser.optionxform = str
 
-def create_builder_from_file(input_folder, input_file_name, code, metadata, pseudo_folder_path=None):
-    """Create a populated process builder for a `MpetrunCalculation` from a standard MPET input file and pseudo (upf) files.
+        try:
+            parser.read_string(content)
+        except configparser.Error as exception:
+            raise MPETInputValidationError(f'failed to parse the configuration file: {exception}') from exception
 
-    :param input_folder: the folder containing the input file
+        parameters = {}
+
+        for section in parser.sections():
+            parameters[section] = {}
+            section_keywords = keywords.get(section, {})
+
+            for keyword, value in parser.items(section):
+                try:
+                    parameters[section][keyword] = convert_config_value(keyword, value, section_keywords.get(keyword))
+                except TypeError as exception:
+                    raise MPETInputValidationError(f'[{section}] {exception}') from exception
+
+        self.parameters = validate_parameters(parameters, keywords)
+
+
+def create_builder_from_file(input_folder, input_file_name, code, metadata):
+    """Create a populated process builder for a `MpetrunCalculation` from an existing set of MPET configuration files.
+
+    The system configuration file is parsed and the electrode configuration files it references in the `cathode` and
+    `anode` keywords of the `Electrodes` section are read from the same folder. These references are replaced by the
+    filenames that the `MpetrunCalculation` will write the electrode input files to.
+
+    :param input_folder: the folder containing the configuration files
     :type input_folder: aiida.common.folders.Folder or str
-    :param input_file_name: the name of the input file
+    :param input_file_name: the name of the system configuration file
     :type input_file_name: str
     :param code: the code associated with the calculation
     :type code: aiida.orm.Code or str
     :param metadata: metadata values for the calculation (e.g. resources)
     :type metadata: dict
-    :param pseudo_folder_path: the folder containing the upf files (if None, then input_folder is used)
-    :type pseudo_folder_path: aiida.common.folders.Folder or str or None
-    :raises NotImplementedError: if the structure is not ibrav=0
+    :raises `~aiida_mpet.calculations.helpers.MPETInputValidationError`: if the files are invalid or the system
+        configuration does not reference both electrode files
     :return: a builder instance for MpetrunCalculation
     """
     MpetrunCalculation = CalculationFactory('mpet.mpetrun')
@@ -49,28 +122,31 @@ def create_builder_from_file(input_folder, input_file_name, code, metadata, pseu
         code = Code.get_from_string(code)
     builder.code = code
 
-    # read input_file
     if isinstance(input_folder, str):
         input_folder = Folder(input_folder)
 
-    with input_folder.open(input_file_name) as input_file:
-        parsed_file = MpetrunInputFile(input_file.read())
-
-    # Then, strip the namelist items that the plugin doesn't allow or sets later.
-    # NOTE: If any of the position or cell units are in alat or crystal
-    # units, that will be taken care of by the input parsing tools, and
-    # we are safe to fake that they were never there in the first place.
-    parameters_dict = copy.deepcopy(parsed_file.namelists)
-    for namelist, blocked_key in MpetrunCalculation._blocked_keywords:  # pylint: disable=protected-access
-        for key in list(parameters_dict[namelist].keys()):
-            # take into account that celldm and celldm(*) must be blocked
-            if re.sub('[(0-9)]', '', key) == blocked_key:
-                parameters_dict[namelist].pop(key, None)
-    builder.parameters = Dict(dict=parameters_dict)
-
-    settings_dict = {}
-
-    if settings_dict:
-        builder.settings = settings_dict
+    with input_folder.open(input_file_name) as handle:
+        parameters = MpetrunInputFile(handle.read(), SYSTEM_KEYWORDS).parameters
+
+    electrodes = parameters.setdefault('Electrodes', {})
+    options = MpetrunCalculation.spec().inputs['metadata']['options']
+    electrode_parameters = []
+
+    for electrode, option in ELECTRODE_FILENAME_OPTIONS.items():
+        try:
+            filename = electrodes[electrode]
+        except KeyError as exception:
+            raise MPETInputValidationError(
+                f'the `Electrodes` section of `{input_file_name}` does not reference the {electrode} file'
+            ) from exception
+
+        with input_folder.open(os.path.normpath(filename)) as handle:
+            electrode_parameters.append(MpetrunInputFile(handle.read(), ELECTRODE_KEYWORDS).parameters)
+
+        electrodes[electrode] = metadata.get('options', {}).get(option, options[option].default)
+
+    builder.parameters, builder.cathode_parameters, builder.anode_parameters = get_interned_dicts(
+        [parameters] + electrode_parameters
+    )
 
     return builder
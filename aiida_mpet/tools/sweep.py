@@ -0,0 +1,309 @@
+# -*- coding: utf-8 -*-
+"""Utilities to generate large numbers of `MpetrunCalculation` builders or input files for parameter sweeps.
+
+A sweep is defined by a base triple of system, cathode and anode parameters and a table of overrides, one row per
+point of the sweep. Each row is a mapping with any of the keys ``parameters``, ``cathode_parameters`` and
+``anode_parameters``, whose values are nested dictionaries of sections and keywords that replace the corresponding
+keywords of the base, for example::
+
+    overrides = [
+        {'parameters': {'Sim Params': {'Crate': crate}}, 'cathode_parameters': {'Reactions': {'k0': k0}}}
+        for crate in (0.1, 1, 10) for k0 in (0.1, 1.6)
+    ]
+
+The rendering of the input files uses a template that is compiled once per base parameter set, such that for each
+point only the sections that are actually overridden are rendered again. The points are processed in windows of
+bounded size and the results are yielded lazily, so the number of points held in memory does not depend on the size of
+the sweep. Only the rendering of input files is distributed over a process pool, whose workers are spawned rather than
+forked, such that they do not inherit the loaded profile and its open database connection. Builders are created in the
+current interpreter, since merging the overrides is cheap and nodes can only be created in the interpreter that has
+the profile loaded.
+"""
+import copy
+import functools
+import itertools
+import multiprocessing
+
+from aiida.common import exceptions
+
+from aiida_mpet.utils.convert import convert_input_to_namelist_entry
+
+__all__ = ('ConfigTemplate', 'SweepBuilderFactory')
+
+INPUT_PORTS = ('parameters', 'cathode_parameters', 'anode_parameters')
+
+_WORKER_TEMPLATES = None
+"""The templates of the sweep, set once in each worker process of the pool by `_initialize_worker`."""
+
+
+class ConfigTemplate:
+    """Precompiled template of an MPET configuration file for a base set of parameters.
+
+    The entry of every keyword and the text of every section of the base parameters are rendered once upon
+    construction. Rendering the file for a set of overrides then only requires the overridden sections to be rendered
+    again, which produces exactly the same content as `BaseMpetrunInputGenerator._generate_MPETRUNinputdata`.
+    """
+
+    def __init__(self, parameters, sections):
+        """Construct a new instance.
+
+        :param parameters: dictionary mapping the sections of the configuration file onto dictionaries of keywords
+        :param sections: list of the valid section names, in the order in which they should be written
+        :raises `~aiida.common.exceptions.InputValidationError`: if the parameters contain unknown sections
+        """
+        self.parameters = copy.deepcopy(parameters)
+        self.sections = list(sections)
+        self._validate_sections(self.parameters)
+        self._entries = {
+            section: {key: self._render_entry(key, value) for key, value in content.items()}
+            for section, content in self.parameters.items()
+        }
+        self._rendered = {
+            section: self._render_section(section, entries) for section, entries in self._entries.items()
+        }
+
+    def _validate_sections(self, parameters):
+        """Raise if the parameters contain sections that are not valid for the configuration file."""
+        unknown = set(parameters) - set(self.sections)
+
+        if unknown:
+            raise exceptions.InputValidationError(
+                'The following namelists are specified in input_params, but are '
+                'not valid namelists for the current type of calculation: '
+                '{}'.format(','.join(sorted(unknown)))
+            )
+
+    @staticmethod
+    def _render_entry(key, value):
+        """Render a single keyword, on a copy of the value because the conversion can modify nested lists in place."""
+        return convert_input_to_namelist_entry(key, copy.deepcopy(value))
+
+    @staticmethod
+    def _render_section(section, entries):
+        """Render a section from the rendered entries of its keywords, which are sorted alphabetically."""
+        if not entries:
+            return ''
+
+        return f'[{section}]\n' + ''.join(entries[key] for key in sorted(entries)) + '\n'
+
+    def merge(self, overrides=None):
+        """Return the base parameters updated with the overrides, copying only the sections that are overridden.
+
+        :param overrides: dictionary mapping section names onto dictionaries of keywords that replace the base values
+        :return: dictionary with the merged parameters
+        """
+        merged = dict(self.parameters)
+
+        for section, content in (overrides or {}).items():
+            merged[section] = {**merged.get(section, {}), **content}
+
+        return merged
+
+    def render(self, overrides=None):
+        """Render the content of the configuration file for the base parameters updated with the overrides.
+
+        :param overrides: dictionary mapping section names onto dictionaries of keywords that replace the base values
+        :return: the content of the configuration file
+        :raises `~aiida.common.exceptions.InputValidationError`: if the overrides contain unknown sections
+        """
+        overrides = overrides or {}
+        self._validate_sections(overrides)
+
+        content = []
+
+        for section in self.sections:
+            if section in overrides:
+                entries = dict(self._entries.get(section, {}))
+                entries.update({key: self._render_entry(key, value) for key, value in overrides[section].items()})
+                content.append(self._render_section(section, entries))
+            else:
+                content.append(self._rendered.get(section, ''))
+
+        return ''.join(content)
+
+
+def _initialize_worker(templates):
+    """Set the templates of the sweep in the global scope of a worker process of the pool."""
+    global _WORKER_TEMPLATES  # pylint: disable=global-statement
+    _WORKER_TEMPLATES = templates
+
+
+def _expand_point_with(templates, arguments):
+    """Expand a single point of the sweep with the given templates.
+
+    :param templates: dictionary with the `InputTemplate` of each input port
+    :param arguments: tuple of the overrides of the point and a boolean whether to render the input files
+    :return: tuple of a dictionary with the merged parameters for each input port and, if requested, a dictionary with
+        the rendered content of the input file of each input port
+    """
+    overrides, render = arguments
+    merged = {}
+    rendered = {}
+
+    for port, template in templates.items():
+        port_overrides = overrides.get(port, None)
+        merged[port] = template.merge(port_overrides) if port_overrides else None
+
+        if render:
+            rendered[port] = template.render(port_overrides)
+
+    return merged, rendered
+
+
+def _expand_point(arguments):
+    """Expand a single point of the sweep in a worker process with the templates set by `_initialize_worker`.
+
+    :param arguments: tuple of the overrides of the point and a boolean whether to render the input files
+    :return: the result of `_expand_point_with`
+    """
+    return _expand_point_with(_WORKER_TEMPLATES, arguments)
+
+
+class SweepBuilderFactory:
+    """Factory to generate the builders or input files of `MpetrunCalculation`s for all points of a parameter sweep.
+
+    Example::
+
+        factory = SweepBuilderFactory(code, parameters, cathode_parameters, anode_parameters, metadata=metadata)
+
+        for builder in factory.iter_builders(overrides):
+            submit(builder)
+    """
+
+    def __init__(
+        self,
+        code,
+        parameters,
+        cathode_parameters,
+        anode_parameters,
+        metadata=None,
+        settings=None,
+        processes=None,
+        window=1024,
+    ):
+        """Construct a new instance.
+
+        :param code: the `Code` that should run the calculations
+        :param parameters: dictionary with the base system parameters
+        :param cathode_parameters: dictionary with the base cathode parameters
+        :param anode_parameters: dictionary with the base anode parameters
+        :param metadata: optional dictionary with the metadata of each calculation, e.g. the options
+        :param settings: optional dictionary with the settings of each calculation
+        :param processes: number of worker processes that render the input files, by default the number of CPUs. If
+            set to zero, the input files are rendered in the current interpreter.
+        :param window: maximum number of points that are expanded at once, which bounds the memory footprint
+        """
+        from aiida.plugins import CalculationFactory
+
+        self._process_class = CalculationFactory('mpet.mpetrun')
+        sections = self._process_class._automatic_namelists['default']  # pylint: disable=protected-access
+
+        self.code = code
+        self.metadata = metadata or {}
+        self.settings = settings
+        self.processes = processes
+        self.window = window
+        self.templates = {
+            'parameters': ConfigTemplate(parameters, sections),
+            'cathode_parameters': ConfigTemplate(cathode_parameters, sections),
+            'anode_parameters': ConfigTemplate(anode_parameters, sections),
+        }
+
+    def _iter_expanded(self, overrides_table, render):
+        """Yield the expanded points of the sweep, processing the table in windows of bounded size.
+
+        :param overrides_table: iterable of override mappings, one for each point of the sweep
+        :param render: boolean, if True, the input files are rendered as well, in the process pool unless the number
+            of processes is zero
+        :return: generator of tuples of the overrides and the result of `_expand_point` for each point
+        :raises ValueError: if the overrides of a point contain unknown input ports
+        """
+        overrides_table = iter(overrides_table)
+        pool = None
+
+        if render and self.processes != 0:
+            context = multiprocessing.get_context('spawn')
+            pool = context.Pool(self.processes, initializer=_initialize_worker, initargs=(self.templates,))
+
+        try:
+            while True:
+                window = list(itertools.islice(overrides_table, self.window))
+
+                if not window:
+                    break
+
+                for overrides in window:
+                    unknown = set(overrides) - set(INPUT_PORTS)
+                    if unknown:
+                        raise ValueError(f'unknown input ports in overrides: {", ".join(sorted(unknown))}')
+
+                arguments = [(overrides, render) for overrides in window]
+
+                if pool is None:
+                    results = map(functools.partial(_expand_point_with, self.templates), arguments)
+                else:
+                    chunksize = max(1, len(window) // (4 * pool._processes))  # pylint: disable=protected-access
+                    results = pool.imap(_expand_point, arguments, chunksize)
+
+                yield from zip(window, results)
+        finally:
+            if pool is not None:
+                pool.terminate()
+
+    def iter_rendered(self, overrides_table):
+        """Yield the content of the input files for each point of the sweep, without creating any nodes.
+
+        :param overrides_table: iterable of override mappings, one for each point of the sweep
+        :return: generator of dictionaries mapping the input filename onto its content, for each point
+        """
+        options = self._process_class.spec().inputs['metadata']['options']
+        filenames = {
+            'parameters': options['input_filename'].default,
+            'cathode_parameters': options['cathode_input_filename'].default,
+            'anode_parameters': options['anode_input_filename'].default,
+        }
+        filenames.update({
+            port: self.metadata.get('options', {}).get(key, filenames[port])
+            for port, key in zip(INPUT_PORTS, ('input_filename', 'cathode_input_filename', 'anode_input_filename'))
+        })
+
+        for _, (_, rendered) in self._iter_expanded(overrides_table, render=True):
+            yield {filenames[port]: content for port, content in rendered.items()}
+
+    def iter_builders(self, overrides_table):
+        """Yield a builder for each point of the sweep.
+
+        The parameter nodes are interned per window of points with
+        :py:func:`~aiida_mpet.utils.caching.get_interned_dicts`, so points that share the same base parameters for an
+        input port also share the same node.
+
+        :param overrides_table: iterable of override mappings, one for each point of the sweep
+        :return: generator of `ProcessBuilder` instances, one for each point
+        """
+        from aiida_mpet.utils.caching import get_interned_dicts
+
+        base = dict(zip(INPUT_PORTS, get_interned_dicts([self.templates[port].parameters for port in INPUT_PORTS])))
+        settings = get_interned_dicts([self.settings])[0] if self.settings is not None else None
+        expanded = self._iter_expanded(overrides_table, render=False)
+
+        while True:
+            window = list(itertools.islice(expanded, self.window))
+
+            if not window:
+                break
+
+            values = [merged[port] for _, (merged, _) in window for port in INPUT_PORTS if merged[port] is not None]
+            interned = iter(get_interned_dicts(values))
+
+            for _, (merged, _) in window:
+                builder = self._process_class.get_builder()
+                builder.code = self.code
+                builder.metadata = copy.deepcopy(self.metadata)
+
+                for port in INPUT_PORTS:
+                    builder[port] = next(interned) if merged[port] is not None else base[port]
+
+                if settings is not None:
+                    builder.settings = settings
+
+                yield builder
@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+"""Admission control that caps the memory of the output data that is parsed concurrently on a machine.
+
+Every daemon worker runs its own parsers, so without coordination the memory of the parsing host grows with the number
+of calculations that happen to finish at the same time. Before parsing, a parser reserves the estimated decode size of
+its output data in a ledger that is shared by all processes of the user on the machine through a file lock. If the
+reservation does not fit in the budget, the parser waits until enough memory has been released by the others, or until
+a timeout expires. A reservation that is larger than the budget on its own is admitted when nothing else is in flight,
+such that it can never be starved.
+
+The admission control is opt-in: it is only enabled if the budget is defined by the ``AIIDA_MPET_PARSER_MEMORY_BUDGET``
+environment variable. Waiting means sleeping in the calling thread, so within a running event loop, e.g. the one of a
+daemon worker, a single attempt is made and the memory is reserved regardless, such that the loop is never blocked.
+If the ledger cannot be accessed, the memory is admitted as well.
+"""
+import asyncio
+import contextlib
+import json
+import os
+import tempfile
+import time
+import uuid
+
+__all__ = (
+    'DECODE_FACTORS', 'DEFAULT_TIMEOUT', 'estimate_decode_size', 'get_memory_budget', 'get_ledger_directory',
+    'memory_admission'
+)
+
+MEMORY_BUDGET_VARIABLE = 'AIIDA_MPET_PARSER_MEMORY_BUDGET'
+"""Environment variable with the memory budget in bytes that is shared by all parsers of the user on the machine."""
+
+DEFAULT_TIMEOUT = 60.
+"""The maximum number of seconds to wait for the budget, after which the memory is admitted regardless."""
+
+LEDGER_FILENAME = 'aiida-mpet-parser-admission.json'
+"""Name of the file in the ledger directory in which the reservations of all processes are stored."""
+
+DECODE_FACTORS = {
+    'hdf5': 2.,
+    'hdf5Fast': 2.,
+    'mat': 3.,
+}
+"""Ratio of the peak memory of parsing the output data of a data reporter and the size of the file.
+
+HDF5 datasets are read in slices, but the time series are converted to dimensional quantities and downsampled, which
+creates a few copies. The variables of a MATLAB file can only be read completely, see `MatFile`.
+"""
+
+
+def estimate_decode_size(file_size, reporter='hdf5'):
+    """Return the estimated peak memory in bytes of parsing an output data file.
+
+    :param file_size: the size of the file in bytes
+    :param reporter: the data reporter that wrote the file, one of the keys of ``DECODE_FACTORS``
+    :return: the estimated size in bytes
+    """
+    return int(file_size * DECODE_FACTORS.get(reporter, max(DECODE_FACTORS.values())))
+
+
+def get_memory_budget():
+    """Return the memory budget in bytes that is shared by all parsers of the user on the machine.
+
+    The budget is read from the ``AIIDA_MPET_PARSER_MEMORY_BUDGET`` environment variable. If it is not set or zero, the
+    admission control is disabled.
+
+    :return: the budget in bytes or `None` if the admission control is disabled
+    :raises ValueError: if the environment variable is not a non-negative integer
+    """
+    value = os.environ.get(MEMORY_BUDGET_VARIABLE, None)
+
+    if value is None:
+        return None
+
+    try:
+        budget = int(value)
+    except ValueError as exception:
+        raise ValueError(f'`{MEMORY_BUDGET_VARIABLE}` should be an integer number of bytes: {value}') from exception
+
+    if budget < 0:
+        raise ValueError(f'`{MEMORY_BUDGET_VARIABLE}` should not be negative: {value}')
+
+    return budget or None
+
+
+def get_ledger_directory():
+    """Return the directory of the ledger of the current user, which is created if it does not exist.
+
+    The directory is private to the user, such that users of a shared machine neither share nor lock out each others
+    ledgers.
+
+    :return: the absolute path of the directory
+    :raises OSError: if the directory cannot be created
+    """
+    user = os.getuid() if hasattr(os, 'getuid') else os.environ.get('USERNAME', 'default')
+    directory = os.path.join(tempfile.gettempdir(), f'aiida-mpet-{user}')
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+
+    return directory
+
+
+def _is_event_loop_running():
+    """Return whether an asyncio event loop is running in the current thread."""
+    try:
+        asyncio.get_running_loop()
+    except AttributeError:
+        # Python 3.6 does not have `get_running_loop` yet
+        return asyncio.get_event_loop().is_running()
+    except RuntimeError:
+        return False
+
+    return True
+
+
+def _is_alive(pid):
+    """Return whether a process with the given identifier is running on this machine."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+@contextlib.contextmanager
+def _locked_ledger(directory):
+    """Context manager that holds the exclusive lock of the ledger and yields its reservations.
+
+    The reservations of processes that no longer exist, e.g. because a daemon worker was killed, are dropped. Changes to
+    the yielded dictionary are written back before the lock is released.
+    """
+    import fcntl
+
+    with open(os.path.join(directory, LEDGER_FILENAME), 'a+', encoding='utf-8') as handle:
+        fcntl.flock(handle, fcntl.LOCK_EX)
+        try:
+            handle.seek(0)
+            try:
+                reservations = json.loads(handle.read() or '{}')
+            except ValueError:
+                reservations = {}
+
+            reservations = {key: value for key, value in reservations.items() if _is_alive(value['pid'])}
+
+            yield reservations
+
+            handle.seek(0)
+            handle.truncate()
+            json.dump(reservations, handle)
+            handle.flush()
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+@contextlib.contextmanager
+def memory_admission(size, budget=None, directory=None, timeout=DEFAULT_TIMEOUT, interval=0.5, blocking=None):
+    """Context manager that waits until the given amount of memory fits in the budget of the machine.
+
+    The memory is reserved for the duration of the context. If the platform does not support file locks, no budget is
+    defined or the ledger cannot be accessed, the context is entered immediately.
+
+    :param size: the amount of memory in bytes to reserve
+    :param budget: the budget in bytes, by default the one returned by `get_memory_budget`
+    :param directory: the directory of the ledger that is shared by the processes, by default the one returned by
+        `get_ledger_directory`
+    :param timeout: maximum number of seconds to wait, after which the context is entered regardless. If `None`, it
+        waits as long as necessary.
+    :param interval: the number of seconds between two attempts to reserve the memory
+    :param blocking: whether to wait for the budget. By default it only waits if no asyncio event loop is running in
+        the current thread. Otherwise a single attempt is made, after which the memory is reserved regardless.
+    :return: the number of seconds that were waited before the memory was admitted
+    """
+    try:
+        import fcntl  # pylint: disable=unused-import
+    except ImportError:
+        yield 0.
+        return
+
+    budget = get_memory_budget() if budget is None else budget
+
+    if not budget:
+        yield 0.
+        return
+
+    if blocking is None:
+        blocking = not _is_event_loop_running()
+
+    token = uuid.uuid4().hex
+    start = time.monotonic()
+
+    try:
+        directory = directory or get_ledger_directory()
+
+        while True:
+            with _locked_ledger(directory) as reservations:
+                reserved = sum(value['size'] for value in reservations.values())
+                expired = not blocking or (timeout is not None and time.monotonic() - start >= timeout)
+
+                if not reservations or reserved + size <= budget or expired:
+                    reservations[token] = {'pid': os.getpid(), 'size': size}
+                    break
+
+            time.sleep(interval)
+    except OSError:
+        # The ledger could not be accessed, e.g. because of the permissions of a shared directory, so rather than
+        # failing the parser the memory is admitted without a reservation
+        directory = None
+
+    try:
+        yield time.monotonic() - start
+    finally:
+        if directory is not None:
+            with contextlib.suppress(OSError), _locked_ledger(directory) as reservations:
+                reservations.pop(token, None)
@@ -0,0 +1,260 @@
+# -*- coding: utf-8 -*-
+"""Utilities to look up previously completed `MpetrunCalculation`s before launching new ones.
+
+The per-process caching mechanism of `aiida-core` only kicks in once a process is launched, which means that a process
+node is created and stored for every point of a sweep, even when the vast majority has already been computed. The
+functions in this module compute the hashes of the input `Dict` nodes of a set of candidate parameter sets up front,
+without storing anything, and match them against the hashes of the inputs of finished calculations in a single bulk
+query, such that only the points that still need computing have to be submitted.
+
+.. note:: the hashes are those computed by `aiida-core` for the `Dict` nodes, which means they are only comparable for
+    nodes that were hashed with the same version of `aiida-core`, exactly like for the built-in caching mechanism.
+"""
+from aiida import orm
+from aiida.common.hashing import make_hash
+from aiida.common.links import LinkType
+
+__all__ = (
+    'HASHED_INPUT_PORTS', 'get_dict_hash', 'get_input_hashes', 'get_canonical_input_hash', 'get_cached_calculations',
+    'get_interned_dict', 'get_interned_dicts', 'TIME_AXIS_HASH_ATTRIBUTE', 'TIME_AXIS_T_REF_ATTRIBUTE',
+    'get_array_hash', 'get_time_axis_attributes'
+)
+
+HASHED_INPUT_PORTS = ('parameters', 'cathode_parameters', 'anode_parameters')
+"""The input ports of the `MpetrunCalculation` whose content determines the result of the calculation."""
+
+TIME_AXIS_HASH_ATTRIBUTE = 'time_axis_hash'
+"""Attribute of an `ArrayData` node with a time axis that contains the hash of the nondimensional time axis."""
+
+TIME_AXIS_T_REF_ATTRIBUTE = 'time_axis_t_ref'
+"""Attribute of an `ArrayData` node with a time axis that contains the reference time in s of the time axis."""
+
+
+def get_dict_hash(value):
+    """Return the hash of the `Dict` node that corresponds to the given value without storing it.
+
+    :param value: a plain dictionary or a `Data` node, e.g. a `Dict` or `ElectrodeParametersData`
+    :return: the hash string
+    """
+    if not isinstance(value, orm.Data):
+        value = orm.Dict(dict=value)
+
+    return value.get_hash()
+
+
+def get_input_hashes(candidate):
+    """Return the hashes of the input `Dict` nodes of a candidate parameter set.
+
+    :param candidate: mapping with at least the keys in ``HASHED_INPUT_PORTS`` and optionally ``settings``, where each
+        value is either a plain dictionary or a `Data` node, e.g. a `Dict` or `ElectrodeParametersData`.
+    :return: dictionary mapping the input port name onto the hash of its content
+    :raises ValueError: if one of the required input ports is missing from the candidate
+    """
+    missing = [port for port in HASHED_INPUT_PORTS if port not in candidate]
+
+    if missing:
+        raise ValueError(f'candidate parameter set is missing the required inputs: {", ".join(missing)}')
+
+    hashes = {port: get_dict_hash(candidate[port]) for port in HASHED_INPUT_PORTS}
+
+    if candidate.get('settings', None) is not None:
+        hashes['settings'] = get_dict_hash(candidate['settings'])
+
+    return hashes
+
+
+def get_canonical_input_hash(candidate, code=None):
+    """Return a single hash that uniquely identifies the inputs of a candidate parameter set.
+
+    :param candidate: mapping of input port names onto plain dictionaries or `Dict` nodes, see `get_input_hashes`
+    :param code: optional `Code` that will run the calculation, which then becomes part of the hash
+    :return: the hash string
+    """
+    hashes = get_input_hashes(candidate)
+
+    if code is not None:
+        hashes['code'] = code.uuid
+
+    return make_hash(hashes)
+
+
+def get_cached_calculations(candidates, code=None):
+    """Determine which of the candidate parameter sets have already been computed by a finished `MpetrunCalculation`.
+
+    The hashes of all candidates are computed locally and then matched against the hashes of the inputs of all
+    `MpetrunCalculation` nodes that finished successfully, with a single bulk query for the required inputs. The
+    optional ``settings`` input is verified with one additional query restricted to the matched calculations.
+
+    :param candidates: list of mappings with the inputs of each candidate, see `get_input_hashes`
+    :param code: optional `Code`, if specified only calculations that were run with this code are considered
+    :return: tuple of a list with the indices of the candidates that still need to be computed and a dictionary mapping
+        the indices of the candidates that have already been computed onto the corresponding `CalcJobNode`
+    """
+    from aiida.plugins import CalculationFactory
+
+    MpetrunCalculation = CalculationFactory('mpet.mpetrun')
+
+    candidate_hashes = [get_input_hashes(candidate) for candidate in candidates]
+    lookup = {}
+
+    for index, hashes in enumerate(candidate_hashes):
+        key = tuple(hashes[port] for port in HASHED_INPUT_PORTS)
+        lookup.setdefault(key, []).append(index)
+
+    if not lookup:
+        return [], {}
+
+    filters = {'attributes.process_state': 'finished', 'attributes.exit_status': 0}
+
+    builder = orm.QueryBuilder()
+    builder.append(MpetrunCalculation, tag='calc', filters=filters, project=['id'])
+
+    for position, port in enumerate(HASHED_INPUT_PORTS):
+        port_hashes = list({key[position] for key in lookup})
+        builder.append(
+            orm.Data,
+            with_outgoing='calc',
+            edge_filters={'label': port},
+            filters={'extras._aiida_hash': {'in': port_hashes}},
+            project=['extras._aiida_hash'],
+        )
+
+    if code is not None:
+        builder.append(orm.Code, with_outgoing='calc', filters={'id': code.pk})
+
+    matches = {}
+
+    for pk, *hashes in builder.iterall():
+        matches.setdefault(tuple(hashes), []).append(pk)
+
+    matched_pks = {pk for pks in matches.values() for pk in pks}
+    settings_hashes = {}
+
+    if matched_pks:
+        builder = orm.QueryBuilder()
+        builder.append(orm.CalcJobNode, tag='calc', filters={'id': {'in': list(matched_pks)}}, project=['id'])
+        builder.append(
+            orm.Dict, with_outgoing='calc', edge_filters={'label': 'settings'}, project=['extras._aiida_hash']
+        )
+        settings_hashes = dict(builder.all())
+
+    pending = []
+    cached = {}
+
+    for index, hashes in enumerate(candidate_hashes):
+        key = tuple(hashes[port] for port in HASHED_INPUT_PORTS)
+        settings_hash = hashes.get('settings', None)
+
+        for pk in matches.get(key, []):
+            if settings_hashes.get(pk, None) == settings_hash:
+                cached[index] = pk
+                break
+        else:
+            pending.append(index)
+
+    nodes = {}
+
+    if cached:
+        builder = orm.QueryBuilder()
+        builder.append(orm.CalcJobNode, filters={'id': {'in': list(set(cached.values()))}})
+        nodes = {node.pk: node for node, in builder.iterall()}
+
+    return pending, {index: nodes[pk] for index, pk in cached.items()}
+
+
+def get_interned_dict(value):
+    """Return a stored `Dict` node with the given content, reusing an existing node with the same hash if possible.
+
+    See `get_interned_dicts` for details.
+
+    :param value: a plain dictionary or a `Dict` node
+    :return: a stored `Dict` node
+    """
+    return get_interned_dicts([value])[0]
+
+
+def get_interned_dicts(values):
+    """Return stored `Dict` nodes with the given contents, reusing existing nodes with the same hash if possible.
+
+    In a typical sweep most of the parameter dictionaries, e.g. the electrode parameters, are identical for thousands of
+    calculations. Instead of storing a new `Dict` node for each builder, the nodes are interned: the hashes of the
+    contents are looked up among the stored `Dict` nodes, and a new node is only stored for contents that do not yet
+    exist in the database. Nodes that were created by a process, e.g. the `output_parameters` of a calculation, are
+    never reused, since passing them as an input would add a data dependency on that process to the provenance
+    graph. Nothing is remembered between calls, so the lookup always reflects the current state of the database of
+    the loaded profile. Values that are already stored `Dict` nodes, or other `Data` nodes such as
+    `ElectrodeParametersData`, are returned as is.
+
+    .. warning:: as a side effect, a `Dict` node is stored for every content that is not yet in the database.
+
+    :param values: list of plain dictionaries or `Dict` nodes
+    :return: list of stored `Dict` nodes, or the `Data` nodes as they were passed, in the same order as the values
+    """
+    nodes = [value if isinstance(value, orm.Data) else orm.Dict(dict=value) for value in values]
+    hashes = [None if node.is_stored or not isinstance(node, orm.Dict) else node.get_hash() for node in nodes]
+    unknown = {node_hash for node_hash in hashes if node_hash is not None}
+    interned = {}
+
+    if unknown:
+        filters = {'extras._aiida_hash': {'in': list(unknown)}}
+
+        created = orm.QueryBuilder()
+        created.append(orm.Dict, filters=dict(filters), project=['id'], tag='dict')
+        created.append(orm.ProcessNode, with_outgoing='dict', edge_filters={'type': LinkType.CREATE.value})
+        excluded = [pk for pk, in created.iterall()]
+
+        if excluded:
+            filters['id'] = {'!in': excluded}
+
+        builder = orm.QueryBuilder()
+        builder.append(orm.Dict, filters=filters, project=['*'])
+
+        for node, in builder.iterall():
+            interned.setdefault(node.get_extra('_aiida_hash'), node)
+
+    results = []
+
+    for node, node_hash in zip(nodes, hashes):
+        if node_hash is None:
+            results.append(node)
+            continue
+
+        if node_hash not in interned:
+            interned[node_hash] = node.store()
+
+        results.append(interned[node_hash])
+
+    return results
+
+
+def get_array_hash(array):
+    """Return a hash of the shape and double precision values of an array.
+
+    :param array: the numpy array
+    :return: the hexadecimal hash string
+    """
+    import hashlib
+
+    import numpy
+
+    array = numpy.ascontiguousarray(array, dtype=numpy.float64)
+    digest = hashlib.sha256(repr(array.shape).encode('utf-8'))
+    digest.update(array.tobytes())
+
+    return digest.hexdigest()
+
+
+def get_time_axis_attributes(times, t_ref):
+    """Return the attributes that identify the time axis of an `ArrayData` node.
+
+    Calculations that share the end time and the number of output steps write identical nondimensional time axes, which
+    can therefore be matched by the hash of the nondimensional axis and the reference time, e.g. to find the outputs of
+    calculations on the same output grid with a single query on these attributes. The hash is computed from the times
+    as written by MPET, and not from the dimensional times, such that the match does not depend on the rounding of
+    their product with the reference time.
+
+    :param times: one-dimensional numpy array with the nondimensional time axis
+    :param t_ref: the reference time in s used by MPET to make the time nondimensional
+    :return: dictionary with the ``TIME_AXIS_HASH_ATTRIBUTE`` and ``TIME_AXIS_T_REF_ATTRIBUTE`` attributes
+    """
+    return {TIME_AXIS_HASH_ATTRIBUTE: get_array_hash(times), TIME_AXIS_T_REF_ATTRIBUTE: float(t_ref)}
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""Utilities to downsample long time series while preserving their visual shape."""
+import numpy
+
+__all__ = ('get_lttb_indices', 'downsample_lttb')
+
+
+def get_lttb_indices(x, y, threshold):
+    """Return the indices of the points selected by the Largest-Triangle-Three-Buckets (LTTB) algorithm.
+
+    The first and last point are always kept. The remaining points are divided in ``threshold - 2`` buckets of equal
+    size and from each bucket the point is selected that forms the largest triangle with the point selected from the
+    previous bucket and the average of the points in the next bucket. This preserves the peaks and kinks of the curve,
+    e.g. the steep voltage drop at the end of a discharge, much better than uniform decimation.
+
+    :param x: one-dimensional array with the abscissae, which should be sorted
+    :param y: one-dimensional array with the ordinates, of the same length as ``x``
+    :param threshold: the number of points to select
+    :return: sorted array of integer indices of the selected points
+    """
+    x = numpy.asarray(x, dtype=float)
+    y = numpy.asarray(y, dtype=float)
+    length = len(x)
+
+    if threshold >= length or threshold < 3:
+        return numpy.arange(length)
+
+    indices = numpy.empty(threshold, dtype=int)
+    indices[0] = 0
+    indices[-1] = length - 1
+
+    edges = numpy.linspace(1, length - 1, threshold - 1).astype(int)
+    selected = 0
+
+    for bucket in range(threshold - 2):
+        start, stop = edges[bucket], edges[bucket + 1]
+        next_start, next_stop = stop, edges[bucket + 2] if bucket + 2 < len(edges) else length
+
+        x_next = x[next_start:next_stop].mean() if next_stop > next_start else x[-1]
+        y_next = y[next_start:next_stop].mean() if next_stop > next_start else y[-1]
+
+        x_bucket = x[start:stop]
+        y_bucket = y[start:stop]
+        areas = numpy.abs(
+            (x[selected] - x_next) * (y_bucket - y[selected]) - (x[selected] - x_bucket) * (y_next - y[selected])
+        )
+
+        selected = start + int(numpy.argmax(areas))
+        indices[bucket + 1] = selected
+
+    return indices
+
+
+def downsample_lttb(x, y, threshold):
+    """Downsample a curve with the Largest-Triangle-Three-Buckets algorithm, see `get_lttb_indices`.
+
+    :param x: one-dimensional array with the abscissae, which should be sorted
+    :param y: one-dimensional array with the ordinates, of the same length as ``x``
+    :param threshold: the number of points to select
+    :return: tuple of the downsampled ``x`` and ``y`` arrays
+    """
+    indices = get_lttb_indices(x, y, threshold)
+    return numpy.asarray(x)[indices], numpy.asarray(y)[indices]
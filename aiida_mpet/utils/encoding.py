@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+"""Utilities to store large arrays compactly and in time chunks in `ArrayData` nodes.
+
+An array is stored as one or multiple chunks along its first axis, which for the fields written by MPET is the time
+axis, such that a range of time steps can be loaded without loading the complete array. Each chunk can be encoded as:
+
+    * ``float64``: the original double precision values
+    * ``float32``: single precision values, which halves the size
+    * ``int16``: integers that are mapped linearly onto the range of values of the chunk, which quarters the size. The
+      offset and scale of each chunk are stored as metadata, such that ``value = offset + scale * integer``. The
+      relative precision is about 3e-5 of the range of the values within the chunk, while not-a-number values are
+      preserved.
+
+The layout of an encoded array is stored in the attribute ``encoding|{name}`` of the node, and the arrays should be
+read back with `get_decoded_array`.
+"""
+import numpy
+
+__all__ = (
+    'ARRAY_ENCODINGS', 'encode_array', 'decode_array', 'set_encoded_array', 'get_decoded_array'
+)
+
+ARRAY_ENCODINGS = ('float64', 'float32', 'int16')
+"""The supported encodings of arrays."""
+
+_INT16_MISSING = numpy.iinfo(numpy.int16).min
+_INT16_MAX = numpy.iinfo(numpy.int16).max
+
+
+def encode_array(array, encoding='float64'):
+    """Encode an array.
+
+    :param array: the numpy array to encode
+    :param encoding: one of ``ARRAY_ENCODINGS``
+    :return: tuple of the encoded array and the offset and scale that are needed to decode it
+    :raises ValueError: if the encoding is not supported
+    """
+    if encoding not in ARRAY_ENCODINGS:
+        raise ValueError(f'unsupported encoding `{encoding}`, valid encodings are: {", ".join(ARRAY_ENCODINGS)}')
+
+    array = numpy.asarray(array, dtype=numpy.float64)
+
+    if encoding != 'int16':
+        return array.astype(encoding), 0., 1.
+
+    finite = numpy.isfinite(array)
+
+    if not finite.any():
+        return numpy.full(array.shape, _INT16_MISSING, dtype=numpy.int16), 0., 1.
+
+    minimum = float(array[finite].min())
+    maximum = float(array[finite].max())
+    offset = (maximum + minimum) / 2.
+    scale = (maximum - minimum) / (2. * _INT16_MAX) or 1.
+
+    encoded = numpy.full(array.shape, _INT16_MISSING, dtype=numpy.int16)
+    encoded[finite] = numpy.rint((array[finite] - offset) / scale)
+
+    return encoded, offset, scale
+
+
+def decode_array(encoded, offset=0., scale=1.):
+    """Decode an array that was encoded with `encode_array`.
+
+    :param encoded: the encoded numpy array
+    :param offset: the offset returned by `encode_array`
+    :param scale: the scale returned by `encode_array`
+    :return: the decoded array as floats
+    """
+    if encoded.dtype != numpy.int16:
+        return encoded.astype(numpy.float64)
+
+    decoded = offset + scale * encoded.astype(numpy.float64)
+    decoded[encoded == _INT16_MISSING] = numpy.nan
+
+    return decoded
+
+
+def set_encoded_array(array_data, name, chunks, encoding='float64'):
+    """Encode an array chunk by chunk and store the chunks in an unstored `ArrayData` node.
+
+    :param array_data: the unstored `ArrayData` node
+    :param name: the name of the array, which should only contain letters, digits and underscores
+    :param chunks: iterable of numpy arrays, that are the consecutive chunks of the array along its first axis. Since
+        each chunk is stored as soon as it is encoded, a generator that reads the chunks lazily bounds the memory.
+    :param encoding: one of ``ARRAY_ENCODINGS``
+    :raises ValueError: if the encoding is not supported
+    """
+    layout = {'encoding': encoding, 'chunks': [], 'offsets': [], 'scales': [], 'lengths': []}
+
+    for index, chunk in enumerate(chunks):
+        encoded, offset, scale = encode_array(chunk, encoding)
+        chunk_name = f'{name}_chunk{index}'
+        array_data.set_array(chunk_name, encoded)
+        layout['chunks'].append(chunk_name)
+        layout['offsets'].append(offset)
+        layout['scales'].append(scale)
+        layout['lengths'].append(int(encoded.shape[0]) if encoded.ndim else 1)
+
+    array_data.set_attribute(f'encoding|{name}', layout)
+
+
+def get_decoded_array(array_data, name, start=None, stop=None):
+    """Return an array of an `ArrayData` node, decoding it if it was stored with `set_encoded_array`.
+
+    Only the chunks that overlap with the requested range along the first axis are loaded.
+
+    :param array_data: the `ArrayData` node
+    :param name: the name of the array
+    :param start: optional index of the first element along the first axis to return
+    :param stop: optional index of the element along the first axis up to which to return the array
+    :return: the decoded numpy array
+    :raises KeyError: if the node does not contain an array with the given name
+    """
+    layout = array_data.get_attribute(f'encoding|{name}', None)
+
+    if layout is None:
+        return array_data.get_array(name)[start:stop]
+
+    total = sum(layout['lengths'])
+    start, stop, _ = slice(start, stop).indices(total)
+    decoded = []
+    position = 0
+
+    for chunk_name, offset, scale, length in zip(layout['chunks'], layout['offsets'], layout['scales'],
+                                                 layout['lengths']):
+        if position < stop and position + length > start:
+            chunk = decode_array(array_data.get_array(chunk_name), offset, scale)
+            decoded.append(chunk[max(start - position, 0):stop - position])
+        position += length
+
+    if not decoded:
+        return numpy.empty((0,))
+
+    return numpy.concatenate(decoded)
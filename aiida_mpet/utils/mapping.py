@@ -5,6 +5,14 @@ from collections.abc import Mapping
 from aiida.common import AttributeDict
 from aiida.orm import Dict
 
+LOG_COUNTS_KEY = 'counts'
+"""Optional key of a logging container with the occurrences of messages that were aggregated by their producer.
+
+The value is a dictionary mapping the log level onto a dictionary of each message onto a tuple of the number of times
+it occurred and the line numbers of its first and last occurrence in the parsed file. The message itself is listed
+only once under its log level.
+"""
+
 
 def get_logging_container():
     """Return an `AttributeDict` that can be used to map logging messages to certain log levels.
@@ -60,7 +68,10 @@ def prepare_process_inputs(process, inputs):
 
     That is to say that when an input is found in the inputs that corresponds to an input port in the spec of the
     process that expects a `Dict`, yet the value in the inputs is a plain dictionary, the value will be wrapped in by
-    the `Dict` class to create a valid input.
+    the `Dict` class to create a valid input. Identical dictionaries are interned, see
+    :py:func:`~aiida_mpet.utils.caching.get_interned_dicts`.
+
+    .. warning:: the `Dict` nodes of the wrapped dictionaries are stored, see `wrap_bare_dict_inputs`.
 
     :param process: sub class of `Process` for which to prepare the inputs dictionary
     :param inputs: a dictionary of inputs intended for submission of the process
@@ -73,12 +84,20 @@ def prepare_process_inputs(process, inputs):
 def wrap_bare_dict_inputs(port_namespace, inputs):
     """Wrap bare dictionaries in `inputs` in a `Dict` node if dictated by the corresponding port in given namespace.
 
+    The `Dict` nodes are interned, which means that an existing stored node is reused if it has the same content.
+
+    .. warning:: this stores a new `Dict` node for every bare dictionary whose content does not exist in the database
+        yet, even if the inputs are never submitted. Pass `Dict` nodes instead of plain dictionaries to keep full
+        control over what is stored.
+
     :param port_namespace: a `PortNamespace`
     :param inputs: a dictionary of inputs intended for submission of the process
     :return: a dictionary with all bare dictionaries wrapped in `Dict` if dictated by the port namespace
     """
     from aiida.engine.processes import PortNamespace
 
+    from aiida_mpet.utils.caching import get_interned_dict
+
     wrapped = {}
 
     for key, value in inputs.items():
@@ -92,7 +111,7 @@ def wrap_bare_dict_inputs(port_namespace, inputs):
         if isinstance(port, PortNamespace):
             wrapped[key] = wrap_bare_dict_inputs(port, value)
         elif port.valid_type == Dict and isinstance(value, dict):
-            wrapped[key] = Dict(dict=value)
+            wrapped[key] = get_interned_dict(value)
         else:
             wrapped[key] = value
 
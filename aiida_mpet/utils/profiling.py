@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""Utilities to record the wall time and peak memory of the stages of a computation, e.g. parsing."""
+import contextlib
+import time
+import tracemalloc
+
+__all__ = ('StageProfiler',)
+
+
+class StageProfiler:
+    """Record the wall time and optionally the peak memory of named stages.
+
+    The memory is only measured if `trace_memory` is set, since `tracemalloc` slows down every allocation of the
+    process while it is tracing. It includes the numpy arrays but not the memory that is allocated by C libraries
+    directly, e.g. the chunk cache of HDF5, nor the memory of other processes. Stages can be nested, in which case the
+    peak of the outer stage includes that of the inner one. A stage that is entered multiple times records the sum of
+    the wall times and the maximum of the peaks. On python versions before 3.9 only the wall time is recorded, because
+    the peak of `tracemalloc` cannot be reset between stages.
+
+    :param trace_memory: whether to record the peak memory of the stages in addition to their wall time
+    """
+
+    def __init__(self, trace_memory=False):
+        self._trace_memory = trace_memory and hasattr(tracemalloc, 'reset_peak')
+        self._stages = {}
+        self._stack = []
+        self._started = False
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        """Context manager that records the wall time and, if enabled, the peak memory of the stage with the given name.
+
+        :param name: the name of the stage
+        """
+        tracing = self._trace_memory
+
+        if tracing and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started = True
+
+        if tracing:
+            self._update_peaks(tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+
+        baseline = tracemalloc.get_traced_memory()[0] if tracing else 0
+        frame = {'start': time.perf_counter(), 'baseline': baseline, 'peak': 0}
+        self._stack.append(frame)
+
+        try:
+            yield
+        finally:
+            if tracing:
+                self._update_peaks(tracemalloc.get_traced_memory()[1])
+                tracemalloc.reset_peak()
+
+            self._stack.pop()
+
+            if self._stack:
+                self._stack[-1]['peak'] = max(self._stack[-1]['peak'], frame['peak'])
+
+            record = self._stages.setdefault(name, {'wall_time_seconds': 0.})
+            record['wall_time_seconds'] += time.perf_counter() - frame['start']
+
+            if tracing:
+                peak = max(frame['peak'] - frame['baseline'], 0)
+                record['peak_memory_bytes'] = max(record.get('peak_memory_bytes', 0), peak)
+
+            if not self._stack and self._started:
+                tracemalloc.stop()
+                self._started = False
+
+    def _update_peaks(self, peak):
+        """Update the peak of the innermost stage with the peak of `tracemalloc` since its last reset."""
+        if self._stack:
+            self._stack[-1]['peak'] = max(self._stack[-1]['peak'], peak)
+
+    def get_stages(self):
+        """Return the records of the stages that were completed.
+
+        :return: dictionary mapping the name of each stage onto a dictionary with the `wall_time_seconds` and, if the
+            memory is traced, the `peak_memory_bytes` relative to the memory that was allocated when the stage was
+            entered
+        """
+        return {name: dict(record) for name, record in self._stages.items()}
@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+"""Known keywords of the MPET configuration files and utilities to validate parameter dictionaries against them."""
+
+__all__ = ('SYSTEM_KEYWORDS', 'ELECTRODE_KEYWORDS', 'validate_parameters')
+
+SYSTEM_KEYWORDS = {
+    'Sim Params': {
+        'profileType': 'CHARACTER',
+        'Crate': 'REAL',
+        'Vmax': 'REAL',
+        'Vmin': 'REAL',
+        'Vset': 'REAL',
+        'power': 'REAL',
+        'segments': 'CHARACTER',
+        'tend': 'REAL',
+        'tsteps': 'INTEGER',
+        'relTol': 'REAL',
+        'absTol': 'REAL',
+        'T': 'REAL',
+        'randomSeed': 'LOGICAL',
+        'seed': 'INTEGER',
+        'dataReporter': 'CHARACTER',
+        'Rser': 'REAL',
+        'Nvol_c': 'INTEGER',
+        'Nvol_s': 'INTEGER',
+        'Nvol_a': 'INTEGER',
+        'Npart_c': 'INTEGER',
+        'Npart_a': 'INTEGER',
+    },
+    'Electrodes': {
+        'cathode': 'CHARACTER',
+        'anode': 'CHARACTER',
+        'k0_foil': 'REAL',
+        'Rfilm_foil': 'REAL',
+    },
+    'Particles': {
+        'mean_c': 'REAL',
+        'stddev_c': 'REAL',
+        'mean_a': 'REAL',
+        'stddev_a': 'REAL',
+        'cs0_c': 'REAL',
+        'cs0_a': 'REAL',
+    },
+    'Conductivity': {
+        'simBulkCond_c': 'LOGICAL',
+        'simBulkCond_a': 'LOGICAL',
+        'sigma_s_c': 'REAL',
+        'sigma_s_a': 'REAL',
+        'simPartCond_c': 'LOGICAL',
+        'simPartCond_a': 'LOGICAL',
+        'G_mean_c': 'REAL',
+        'G_stddev_c': 'REAL',
+        'G_mean_a': 'REAL',
+        'G_stddev_a': 'REAL',
+    },
+    'Geometry': {
+        'L_c': 'REAL',
+        'L_a': 'REAL',
+        'L_s': 'REAL',
+        'P_L_c': 'REAL',
+        'P_L_a': 'REAL',
+        'poros_c': 'REAL',
+        'poros_a': 'REAL',
+        'poros_s': 'REAL',
+        'BruggExp_c': 'REAL',
+        'BruggExp_a': 'REAL',
+        'BruggExp_s': 'REAL',
+    },
+    'Electrolyte': {
+        'c0': 'REAL',
+        'zp': 'INTEGER',
+        'zm': 'INTEGER',
+        'nup': 'INTEGER',
+        'num': 'INTEGER',
+        'elyteModelType': 'CHARACTER',
+        'SMset': 'CHARACTER',
+        'n': 'INTEGER',
+        'sp': 'INTEGER',
+        'Dp': 'REAL',
+        'Dm': 'REAL',
+    },
+}
+"""Mapping of the sections of an MPET system configuration file onto their keywords and expected types.
+
+Keywords that can take values of different types, e.g. ``prevDir`` which is either ``false`` or a path, are not
+listed and are therefore not converted.
+"""
+
+ELECTRODE_KEYWORDS = {
+    'Particles': {
+        'type': 'CHARACTER',
+        'discretization': 'REAL',
+        'shape': 'CHARACTER',
+        'thickness': 'REAL',
+    },
+    'Material': {
+        'muRfunc': 'CHARACTER',
+        'logPad': 'LOGICAL',
+        'noise': 'LOGICAL',
+        'noise_prefac': 'REAL',
+        'numnoise': 'INTEGER',
+        'Omega_a': 'REAL',
+        'Omega_b': 'REAL',
+        'Omega_c': 'REAL',
+        'EvdW': 'REAL',
+        'kappa': 'REAL',
+        'B': 'REAL',
+        'rho_s': 'REAL',
+        'D': 'REAL',
+        'Dfunc': 'CHARACTER',
+        'dgammadc': 'REAL',
+        'cwet': 'REAL',
+    },
+    'Reactions': {
+        'rxnType': 'CHARACTER',
+        'k0': 'REAL',
+        'E_A': 'REAL',
+        'alpha': 'REAL',
+        'lambda': 'REAL',
+        'Rfilm': 'REAL',
+    },
+}
+"""Mapping of the sections of an MPET electrode configuration file onto their keywords and expected types."""
+
+
+def validate_parameters(parameters, keywords):
+    """Validate and convert a nested parameter dictionary against a mapping of known sections and keyword types.
+
+    Unknown sections are not allowed, but unknown keywords within a known section are passed through unchanged, since
+    MPET regularly adds new keywords. Known keywords are converted to their expected type where this is unambiguous,
+    e.g. integers for `REAL` keywords become floats.
+
+    :param parameters: dictionary mapping section names onto dictionaries of keywords
+    :param keywords: mapping of section names onto mappings of keywords onto their type, e.g. ``ELECTRODE_KEYWORDS``
+    :return: a new dictionary with the converted values
+    :raises `~aiida_mpet.calculations.helpers.MPETInputValidationError`: if the parameters are invalid
+    """
+    from aiida_mpet.calculations.helpers import MPETInputValidationError, _check_and_convert
+
+    if not isinstance(parameters, dict):
+        raise MPETInputValidationError('parameters must be a dictionary')
+
+    unknown = set(parameters.keys()) - set(keywords.keys())
+
+    if unknown:
+        raise MPETInputValidationError(
+            f'unknown sections {", ".join(sorted(unknown))}, valid sections are: {", ".join(keywords.keys())}'
+        )
+
+    validated = {}
+
+    for section, content in parameters.items():
+
+        if not isinstance(content, dict):
+            raise MPETInputValidationError(f"The content associated to the section '{section}' must be a dictionary")
+
+        validated[section] = {}
+
+        for keyword, value in content.items():
+            try:
+                expected_type = keywords[section][keyword]
+            except KeyError:
+                validated[section][keyword] = value
+                continue
+
+            try:
+                validated[section][keyword] = _check_and_convert(keyword, value, expected_type)
+            except TypeError as exception:
+                raise MPETInputValidationError(f'[{section}] {exception}') from exception
+
+    return validated
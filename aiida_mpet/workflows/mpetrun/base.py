@@ -1,11 +1,14 @@
 # -*- coding: utf-8 -*-
 """Workchain to run a Quantum ESPRESSO mpetrun.x calculation with automated error handling and restarts."""
+import os
+
 from aiida import orm
 from aiida.common import AttributeDict, exceptions
 from aiida.common.lang import type_check
 from aiida.engine import ToContext, if_, while_, BaseRestartWorkChain, process_handler, ProcessHandlerReport, ExitCode
 from aiida.plugins import CalculationFactory, GroupFactory
 
+from aiida_mpet.utils.caching import get_interned_dict
 from aiida_mpet.utils.defaults.calculation import mpetrun as qe_defaults
 from aiida_mpet.utils.mapping import update_mapping, prepare_process_inputs
 from aiida_mpet.utils.resources import get_default_options, get_mpetrun_parallelization_parameters
@@ -42,6 +45,9 @@ class MpetrunBaseWorkChain(ProtocolMixin, BaseRestartWorkChain):
         'delta_factor_max_seconds': 0.95,
         'delta_factor_nbnd': 0.05,
         'delta_minimum_nbnd': 4,
+        'delta_factor_wallclock_seconds': 1.2,
+        'maximum_factor_wallclock_seconds': 4,
+        'threshold_factor_wallclock_seconds': 0.98,
     })
 
     @classmethod
@@ -188,10 +194,10 @@ class MpetrunBaseWorkChain(ProtocolMixin, BaseRestartWorkChain):
         builder.mpetrun['code'] = code
         builder.mpetrun['pseudos'] = pseudo_family.get_pseudos(structure=structure)
         builder.mpetrun['structure'] = structure
-        builder.mpetrun['parameters'] = orm.Dict(dict=parameters)
+        builder.mpetrun['parameters'] = get_interned_dict(parameters)
         builder.mpetrun['metadata'] = inputs['mpetrun']['metadata']
         if 'parallelization' in inputs['mpetrun']:
-            builder.mpetrun['parallelization'] = orm.Dict(dict=inputs['mpetrun']['parallelization'])
+            builder.mpetrun['parallelization'] = get_interned_dict(inputs['mpetrun']['parallelization'])
         builder.clean_workdir = orm.Bool(inputs['clean_workdir'])
         builder.kpoints_distance = orm.Float(inputs['kpoints_distance'])
         builder.kpoints_force_parity = orm.Bool(inputs['kpoints_force_parity'])
@@ -470,20 +476,135 @@ class MpetrunBaseWorkChain(ProtocolMixin, BaseRestartWorkChain):
         self.report_error_handled(calculation, 'known unrecoverable failure detected, aborting...')
         return ProcessHandlerReport(True, self.exit_codes.ERROR_KNOWN_UNRECOVERABLE_FAILURE)
 
+    def is_out_of_walltime(self, calculation):
+        """Return whether the given calculation was killed because it ran out of walltime.
+
+        The kill is detected either from the walltime message of the scheduler in the stdout, which the parser records
+        in the `out_of_walltime` output parameter, or from the job information of the scheduler: the `TIMEOUT` state
+        in the detailed job information or a wallclock time that reached the requested walltime, see the `defaults`.
+
+        :param calculation: the `CalcJobNode` of the calculation
+        :return: boolean
+        """
+        if calculation.outputs.output_parameters.get_attribute('out_of_walltime', False):
+            return True
+
+        detailed_job_info = calculation.get_attribute('detailed_job_info', None) or {}
+
+        if 'TIMEOUT' in (detailed_job_info.get('stdout', None) or ''):
+            return True
+
+        job_info = calculation.get_last_job_info()
+
+        if job_info is None:
+            return False
+
+        elapsed = getattr(job_info, 'wallclock_time_seconds', None)
+        requested = getattr(job_info, 'requested_wallclock_time_seconds', None)
+        requested = requested or calculation.get_option('max_wallclock_seconds')
+
+        return bool(elapsed and requested and elapsed >= requested * self.defaults.threshold_factor_wallclock_seconds)
+
     @process_handler(priority=580, exit_codes=[
-        MpetrunCalculation.exit_codes.ERROR_OUT_OF_WALLTIME,
+        MpetrunCalculation.exit_codes.ERROR_OUTPUT_DATA_PARTIAL,
     ])
     def handle_out_of_walltime(self, calculation):
-        """Handle `ERROR_OUT_OF_WALLTIME` exit code: calculation shut down neatly and we can simply restart."""
+        """Handle `ERROR_OUTPUT_DATA_PARTIAL`: continue the simulation from the last valid time step if out of walltime.
+
+        Only calculations that were killed because they ran out of walltime are continued, see `is_out_of_walltime`.
+        Any other interruption, e.g. an exception raised by MPET, is deterministic and would be repeated, so the work
+        chain is aborted instead.
+
+        The next calculation continues from the output folder of the interrupted one through the `prevDir` parameter,
+        from which MPET restarts at the last row of the output data. This row is only known to be valid if the output
+        data was not truncated, otherwise the work chain is aborted. The `tend` of the next calculation is reduced by
+        the time that was simulated. For `CCsegments` and `CVsegments` profiles the segments that were completed are
+        removed and the duration of the interrupted segment is reduced. Its `max_wallclock_seconds` is set to the time
+        needed to simulate the remaining time at the progress rate of the interrupted calculation,
+        with a safety margin, at least the previous walltime and at most a fixed factor of it, see the `defaults`.
+        """
+        from aiida_mpet.parsers.parse_raw.differential import get_segments
+
+        if not self.is_out_of_walltime(calculation):
+            self.report_error_handled(calculation, 'interrupted but not by the walltime, aborting...')
+            return ProcessHandlerReport(True, self.exit_codes.ERROR_UNRECOVERABLE_FAILURE)
+
+        output_parameters = calculation.outputs.output_parameters
+        simulated = output_parameters.get_attribute('last_valid_time', 0.)
+
+        if simulated <= 0:
+            self.report_error_handled(calculation, 'no time step was completed, aborting...')
+            return ProcessHandlerReport(True, self.exit_codes.ERROR_UNRECOVERABLE_FAILURE)
+
+        # MPET continues from the last row of the output data in `prevDir`, which is invalid if the file was truncated
+        if output_parameters.get_attribute('truncated', True):
+            self.report_error_handled(calculation, 'the last time step of the output data is not valid, aborting...')
+            return ProcessHandlerReport(True, self.exit_codes.ERROR_UNRECOVERABLE_FAILURE)
+
+        sim_params = self.ctx.inputs.parameters.setdefault('Sim Params', {})
+        tend = sim_params.get('tend', None)
+
         try:
-            self.ctx.inputs.structure = calculation.outputs.output_structure
-        except exceptions.NotExistent:
-            self.ctx.restart_calc = calculation
-            self.report_error_handled(calculation, 'simply restart from the last calculation')
+            segments = get_segments(sim_params)
+        except ValueError:
+            self.report_error_handled(calculation, 'the `segments` could not be parsed, aborting...')
+            return ProcessHandlerReport(True, self.exit_codes.ERROR_UNRECOVERABLE_FAILURE)
+
+        # The `tend` and the durations of the segments of MPET are defined in minutes, whereas the `last_valid_time` is
+        # parsed in seconds
+        if segments:
+            remaining_segments = []
+            end = 0.
+
+            for setpoint, duration in segments:
+                end += duration * 60.
+                if end > simulated:
+                    remaining_segments.append((setpoint, min(duration, (end - simulated) / 60.)))
+
+            if not remaining_segments:
+                self.report_error_handled(calculation, 'interrupted after the last segment, aborting...')
+                return ProcessHandlerReport(True, self.exit_codes.ERROR_UNRECOVERABLE_FAILURE)
+
+            remaining = sum(duration for _, duration in remaining_segments) * 60.
+
+            if isinstance(sim_params['segments'], str):
+                sim_params['segments'] = str(remaining_segments)
+            else:
+                sim_params['segments'] = [list(segment) for segment in remaining_segments]
+
+            if tend is not None:
+                sim_params['tend'] = remaining / 60.
+        elif tend is not None:
+            remaining = tend * 60. - simulated
+
+            if remaining <= 0:
+                self.report_error_handled(calculation, 'interrupted after reaching `tend`, aborting...')
+                return ProcessHandlerReport(True, self.exit_codes.ERROR_UNRECOVERABLE_FAILURE)
+
+            sim_params['tend'] = remaining / 60.
         else:
-            self.ctx.restart_calc = None
-            self.report_error_handled(calculation, 'out of walltime: structure changed so restarting from scratch')
+            # Without `tend` the end of the simulation is unknown, so assume it needs as long again
+            remaining = simulated
 
+        options = self.ctx.inputs.metadata['options']
+        max_wallclock_seconds = options.get('max_wallclock_seconds', None)
+        elapsed = getattr(calculation.get_last_job_info(), 'wallclock_time_seconds', None)
+        elapsed = elapsed or calculation.get_option('max_wallclock_seconds')
+
+        if max_wallclock_seconds is not None and elapsed:
+            required = elapsed * remaining / simulated * self.defaults.delta_factor_wallclock_seconds
+            maximum = max_wallclock_seconds * self.defaults.maximum_factor_wallclock_seconds
+            options['max_wallclock_seconds'] = int(min(max(required, max_wallclock_seconds), maximum))
+
+        # pylint: disable=protected-access
+        remote_path = calculation.outputs.remote_folder.get_remote_path()
+        sim_params['prevDir'] = os.path.normpath(os.path.join(remote_path, MpetrunCalculation._OUTPUT_SUBFOLDER))
+        self.ctx.restart_calc = None
+
+        walltime = options.get('max_wallclock_seconds', None)
+        action = f'continuing from {simulated:.6g} s through `prevDir`, {remaining:.6g} s remaining with ' \
+                 f'`max_wallclock_seconds` set to {walltime}'
+        self.report_error_handled(calculation, action)
         return ProcessHandlerReport(True)
 
     @process_handler(
@@ -0,0 +1,26 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Immigrate all MPET simulations below a directory tree as `MpetrunCalculation` nodes."""
+import logging
+
+from aiida import load_profile
+load_profile()
+
+from aiida.orm import load_code
+
+from aiida_mpet.tools.immigrate import immigrate_folders
+
+# Load the Code node representative of the one used to perform the calculations.
+code = load_code('mpet@TheHive')
+
+# Define the computation resources used for the calculations.
+metadata = {'options': {'resources': {'num_machines': 1, 'num_mpiprocs_per_machine': 1}}}
+
+# Every folder below the root that contains the pickled input dictionaries written by MPET is immigrated. The output
+# files are hashed and parsed by 8 worker processes and the nodes are stored in transactions of 100 calculations.
+# Folders that were already immigrated are skipped, so the script can simply be run again if it is interrupted.
+nodes = immigrate_folders(
+    '/scratch/mpet_runs', code, metadata=metadata, processes=8, batch_size=100, logger=logging.getLogger(__name__)
+)
+
+print(f'Immigrated {len(nodes)} calculations')
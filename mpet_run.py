@@ -3,6 +3,7 @@
 from aiida import orm, engine
 from aiida.common.exceptions import NotExistent
 from aiida.plugins import DataFactory, CalculationFactory
+from aiida_mpet.utils.caching import get_interned_dicts
 
 parameters = {
 	'Sim Params':{
@@ -161,9 +162,10 @@ except NotExistent:
     # Setting up code via python API (or use "verdi code setup")
     code = orm.Code(label='workstation', remote_computer_exec=[computer, '/bin/bash'], input_plugin_name='mpet.mpetrun')
 builder = code.get_builder()
-builder.parameters = Dict(dict=parameters)
-builder.cathode_parameters = Dict(dict=cathode_parameters)
-builder.anode_parameters = Dict(dict=anode_parameters)
+# Identical parameter sets are interned, i.e. an existing `Dict` node with the same content is reused
+builder.parameters, builder.cathode_parameters, builder.anode_parameters = get_interned_dicts(
+	[parameters, cathode_parameters, anode_parameters]
+)
 builder.metadata.options.withmpi = True
 builder.metadata.options.resources = {
     'num_machines': 1,
@@ -19,8 +19,14 @@ def test_mpetrun_default(fixture_sandbox, generate_calc_job, generate_inputs_mpe
     calc_info = generate_calc_job(fixture_sandbox, entry_point_name, inputs)
 
     cmdline_params = ['-in', 'aiida.in']
-    retrieve_list = ['aiida.out', './out/aiida.save/data-file-schema.xml', './out/aiida.save/data-file.xml']
-    retrieve_temporary_list = [['./out/aiida.save/K*[0-9]/eigenval*.xml', '.', 2]]
+    retrieve_list = [
+        'aiida.out', './sim_output/run_info.txt', './sim_output/output_data.hdf5',
+        './sim_output/daetools_config_options.txt'
+    ]
+    retrieve_temporary_list = [
+        './sim_output/input_dict_system.p', './sim_output/input_dict_derived_values.p',
+        './sim_output/input_dict_cathode.p', './sim_output/input_dict_anode.p'
+    ]
 
     # Check the attributes of the returned `CalcInfo`
     assert isinstance(calc_info, datastructures.CalcInfo)
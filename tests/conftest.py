@@ -216,7 +216,6 @@ def generate_calc_job_node(fixture_localhost):
             basepath = os.path.dirname(os.path.abspath(__file__))
             filename = os.path.join(entry_point_name[len('mpet.'):], test_name)
             filepath_folder = os.path.join(basepath, 'parsers', 'fixtures', filename)
-            filepath_input = os.path.join(filepath_folder, 'aiida.in')
 
         entry_point = format_entry_point_string('aiida.calculations', entry_point_name)
 
@@ -230,18 +229,6 @@ def generate_calc_job_node(fixture_localhost):
         if attributes:
             node.set_attribute_many(attributes)
 
-        if filepath_folder:
-            from qe_tools.exceptions import ParsingError
-            from aiida_mpet.tools.pwinputparser import PwInputFile
-            try:
-                with open(filepath_input, 'r') as input_file:
-                    parsed_input = PwInputFile(input_file.read())
-            except (ParsingError, FileNotFoundError):
-                pass
-            else:
-                inputs['structure'] = parsed_input.get_structuredata()
-                inputs['parameters'] = orm.Dict(dict=parsed_input.namelists)
-
         if inputs:
             metadata = inputs.pop('metadata', {})
             options = metadata.get('options', {})
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""Tests for the :py:mod:`~aiida_mpet.data.electrode` module."""
+import pytest
+
+from aiida import orm
+from aiida.common.exceptions import NotExistent
+
+from aiida_mpet.calculations.helpers import MPETInputValidationError
+from aiida_mpet.data import ElectrodeParametersData
+
+
+@pytest.fixture
+def parameters():
+    """Return a set of cathode parameters."""
+    return {
+        'Particles': {'type': 'ACR', 'discretization': 1e-9, 'shape': 'C3', 'thickness': 20e-9},
+        'Material': {'muRfunc': 'LiFePO4', 'logPad': False, 'numnoise': 200, 'D': 5.3e-19},
+        'Reactions': {'rxnType': 'BV', 'k0': 1, 'alpha': 0.5},
+    }
+
+
+def test_construction(parameters):
+    """Test the construction of an `ElectrodeParametersData` and the indexing of the key parameters."""
+    node = ElectrodeParametersData(parameters, name='LFP', electrode='cathode')
+
+    assert node.name == 'LFP'
+    assert node.version == 1
+    assert node.electrode == 'cathode'
+    assert node.get_attribute('muRfunc') == 'LiFePO4'
+    assert node.get_attribute('k0') == 1.0
+    assert isinstance(node.get_dict()['Reactions']['k0'], float)
+
+
+def test_validation(parameters):
+    """Test that invalid parameter sets are rejected."""
+    parameters['Material']['logPad'] = 'false'
+
+    with pytest.raises(MPETInputValidationError):
+        ElectrodeParametersData(parameters)
+
+    with pytest.raises(MPETInputValidationError):
+        ElectrodeParametersData({'Sim Params': {}})
+
+    with pytest.raises(ValueError):
+        ElectrodeParametersData(electrode='separator')
+
+
+@pytest.mark.usefixtures('clear_database_before_test')
+def test_get_latest(parameters):
+    """Test the `get_latest` class method and querying on the indexed attributes."""
+    for version in (1, 2, 10):
+        ElectrodeParametersData(parameters, name='LFP', version=version, electrode='cathode').store()
+
+    assert ElectrodeParametersData.get_latest('LFP').version == 10
+
+    with pytest.raises(NotExistent):
+        ElectrodeParametersData.get_latest('LFP', electrode='anode')
+
+    builder = orm.QueryBuilder().append(ElectrodeParametersData, filters={'attributes.muRfunc': 'LiFePO4'})
+    assert builder.count() == 3
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+"""Tests for the `aiida_mpet.parsers.base` module."""
+import types
+from unittest import mock
+
+from aiida_mpet.parsers.base import Parser
+
+
+def get_parser(maximum_log_records=Parser.MAXIMUM_LOG_RECORDS):
+    """Return an object with a mock logger on which `Parser.emit_logs` can be called without a node."""
+    return types.SimpleNamespace(
+        logger=mock.Mock(spec=['critical', 'error', 'warning', 'info', 'debug']),
+        MAXIMUM_LOG_RECORDS=maximum_log_records,
+        LOG_LEVELS=Parser.LOG_LEVELS,
+    )
+
+
+def test_emit_logs_aggregate():
+    """Test identical messages are emitted once with their count and first and last occurrence."""
+    parser = get_parser()
+    logs = {'warning': ['repeated'] * 3 + ['single'], 'error': ['failed', '', None]}
+    Parser.emit_logs(parser, [logs, {'warning': ['repeated']}])
+
+    parser.logger.error.assert_called_once_with('failed')
+    assert parser.logger.warning.call_args_list == [
+        mock.call('repeated [repeated 4 times, first at message 1, last at message 6]'),
+        mock.call('single'),
+    ]
+
+
+def test_emit_logs_maximum_records():
+    """Test the number of log records is capped, keeping the most severe messages."""
+    parser = get_parser(maximum_log_records=2)
+    logs = {'warning': [f'warning {index}' for index in range(5)], 'error': ['failed']}
+    Parser.emit_logs(parser, logs)
+
+    parser.logger.error.assert_called_once_with('failed')
+    assert parser.logger.warning.call_args_list == [
+        mock.call('warning 0'),
+        mock.call('suppressed 4 further log messages, the maximum of 2 log records per node was reached'),
+    ]
+
+
+def test_emit_logs_counts():
+    """Test the counts of messages that were aggregated by their producer are used."""
+    parser = get_parser(maximum_log_records=1)
+    logs = {'error': ['failed'], 'warning': ['step reduced'], 'counts': {'error': {'failed': (3, 10, 20)}}}
+    Parser.emit_logs(parser, [logs, {'warning': ['step reduced']}])
+
+    parser.logger.error.assert_called_once_with('failed [repeated 3 times, first at line 10, last at line 20]')
+    parser.logger.warning.assert_called_once_with(
+        'suppressed 2 further log messages, the maximum of 1 log records per node was reached'
+    )
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""Tests for the `aiida_mpet.parsers.parse_raw.differential` module."""
+import numpy
+import pytest
+
+from aiida_mpet.parsers.parse_raw.differential import (get_differential_curves, get_segment_durations,
+                                                       get_segment_ids, integrate_capacity, smooth)
+
+
+def test_get_segment_durations():
+    """Test `get_segment_durations` for segmented and constant profiles."""
+    assert get_segment_durations({'profileType': 'CC', 'segments': '[(1, 10)]'}) == []
+    assert get_segment_durations({'profileType': 'CCsegments', 'segments': '[(1, 10), (-1, 0.5)]'}) == [600., 30.]
+
+    with pytest.raises(ValueError):
+        get_segment_durations({'profileType': 'CVsegments', 'segments': '[(1, 10'})
+
+
+def test_integrate_capacity():
+    """Test `integrate_capacity` per segment of a charge followed by a discharge."""
+    time = numpy.linspace(0., 4., 9)
+    segment_ids = get_segment_ids(time, [2., 2.])
+    current = numpy.where(segment_ids == 0, 1., -0.5)
+    current[4] = 1.
+
+    capacity, segments = integrate_capacity(time, current, segment_ids)
+
+    assert numpy.array_equal(segment_ids, [0] * 5 + [1] * 4)
+    assert numpy.isclose(capacity[4], 2.)
+    assert numpy.allclose(segments, [2., -0.625])
+
+
+def test_smooth():
+    """Test `smooth` does not average over the boundaries of the segments."""
+    values = numpy.array([0., 1., 2., 10., 11., 12.])
+    segment_ids = numpy.array([0, 0, 0, 1, 1, 1])
+
+    assert numpy.allclose(smooth(values, 3, segment_ids), [0.5, 1., 1.5, 10.5, 11., 11.5])
+
+
+def test_get_differential_curves():
+    """Test `get_differential_curves` for a linear curve and its regularisation on a plateau."""
+    capacity = numpy.linspace(0., 1., 50)
+    dqdv, dvdq = get_differential_curves(capacity, 4. - 2. * capacity, window=5, regularization=0.)
+
+    assert numpy.allclose(dqdv, -0.5)
+    assert numpy.allclose(dvdq, -2.)
+
+    dqdv, _ = get_differential_curves(capacity, numpy.full(50, 3.5), window=5)
+    assert numpy.all(numpy.isfinite(dqdv))
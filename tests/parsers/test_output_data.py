@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""Tests for the `aiida_mpet.parsers.parse_raw.output_data` module."""
+import numpy
+import pytest
+
+from aiida_mpet.parsers.parse_raw.output_data import get_performance_metrics, parse_output_data
+
+
+def test_get_performance_metrics():
+    """Test `get_performance_metrics` for a linear discharge that reaches the lower voltage cutoff."""
+    time = numpy.linspace(0, 3600, 101)
+    quantities = {
+        'time': time,
+        'voltage': numpy.linspace(3.5, 2.5, 101),
+        'capacity': numpy.linspace(0, 2, 101),
+    }
+    arrays = {'ffrac_c': numpy.linspace(0.1, 0.9, 101)}
+
+    metrics = get_performance_metrics(quantities, arrays, voltage_cutoffs=(2.5, 4.0))
+
+    assert metrics['capacity'] == pytest.approx(2.)
+    assert metrics['energy'] == pytest.approx(6.)
+    assert metrics['average_voltage'] == pytest.approx(3.)
+    assert metrics['minimum_voltage'] == pytest.approx(2.5)
+    assert metrics['maximum_voltage'] == pytest.approx(3.5)
+    assert metrics['time_to_cutoff'] == pytest.approx(3600.)
+    assert metrics['final_soc_c'] == pytest.approx(0.9)
+    assert 'final_soc_a' not in metrics
+
+
+def test_parse_output_data(tmp_path):
+    """Test `parse_output_data` including the streamed maximum electrolyte depletion."""
+    import h5py
+
+    filepath = str(tmp_path / 'output_data.hdf5')
+
+    with h5py.File(filepath, 'w') as handle:
+        handle['mpet.phi_applied_times'] = numpy.linspace(0, 1, 11)
+        handle['mpet.phi_applied'] = numpy.zeros(11)
+        handle['mpet.current'] = numpy.ones(11)
+        handle['mpet.ffrac_c'] = numpy.linspace(0.1, 0.9, 11)
+        handle['mpet.c_lyte_c'] = numpy.linspace(1., 0.25, 11)[:, None] * numpy.ones((1, 4))
+        handle['mpet.c_lyte_s'] = numpy.ones((11, 2))
+
+    parsed_data, arrays = parse_output_data(filepath)
+
+    assert parsed_data['number_of_time_steps'] == 11
+    assert parsed_data['final_time'] == pytest.approx(1.)
+    assert parsed_data['max_electrolyte_depletion'] == pytest.approx(0.75)
+    assert sorted(arrays) == ['current', 'ffrac_c', 'phi_applied', 'times']
+    assert parsed_data['truncated'] is False
+
+
+def test_parse_output_data_truncated(tmp_path):
+    """Test `parse_output_data` only returns the complete time steps of an interrupted simulation."""
+    import h5py
+
+    filepath = str(tmp_path / 'output_data.hdf5')
+    times = numpy.linspace(0, 1, 11)
+    times[8:] = 0.
+
+    with h5py.File(filepath, 'w') as handle:
+        handle['mpet.phi_applied_times'] = times
+        handle['mpet.phi_applied'] = numpy.zeros(11)
+        handle['mpet.current'] = numpy.ones(10)
+        handle['mpet.c_lyte_c'] = numpy.ones((9, 4))
+
+    parsed_data, arrays = parse_output_data(filepath)
+
+    assert parsed_data['number_of_time_steps'] == 8
+    assert parsed_data['truncated'] is True
+    assert parsed_data['final_time'] == pytest.approx(0.7)
+    assert all(len(array) == 8 for array in arrays.values())
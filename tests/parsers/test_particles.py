@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""Tests for the `aiida_mpet.parsers.parse_raw.particles` module."""
+import numpy
+
+from aiida_mpet.parsers.parse_raw.particles import compute_particle_statistics, get_particle_datasets, get_shell_volumes
+
+
+def test_compute_particle_statistics(tmp_path):
+    """Test `compute_particle_statistics` when streaming the particles in chunks smaller than the time series."""
+    import h5py
+
+    filepath = str(tmp_path / 'output_data.hdf5')
+
+    with h5py.File(filepath, 'w') as handle:
+        for volume in range(2):
+            for particle in range(3):
+                final = 0.2 * (3 * volume + particle + 1)
+                values = numpy.linspace(0, final, 5)[:, None] * numpy.ones((1, 7))
+                handle[f'mpet.partTrodecvol{volume}part{particle}.c'] = values
+        handle['mpet.partTrodeavol0part0.c1'] = numpy.full(5, 0.2)
+        handle['mpet.partTrodeavol0part0.c2'] = numpy.full(5, 0.4)
+
+    with h5py.File(filepath, 'r') as handle:
+        assert get_particle_datasets(handle, 'mpet.')['a'] == {
+            (0, 0): ['mpet.partTrodeavol0part0.c1', 'mpet.partTrodeavol0part0.c2']
+        }
+        statistics = compute_particle_statistics(handle, 'mpet.', bins=4, chunk_size=2)
+
+    assert numpy.allclose(statistics['c_mean'][-1], 0.7)
+    assert numpy.allclose(statistics['c_volume_mean'][-1], [0.4, 1.])
+    assert numpy.array_equal(statistics['c_histogram'][-1], [1, 1, 1, 3])
+    assert numpy.array_equal(statistics['c_histogram'][0], [6, 0, 0, 0])
+    assert numpy.allclose(statistics['c_lithium_rich_fraction'][-1], 4 / 6)
+    assert numpy.allclose(statistics['a_mean'], 0.3)
+
+
+def test_compute_particle_statistics_non_finite(tmp_path):
+    """Test filling fractions that are not finite are not counted in the histogram."""
+    import h5py
+
+    filepath = str(tmp_path / 'output_data.hdf5')
+
+    with h5py.File(filepath, 'w') as handle:
+        handle['mpet.partTrodecvol0part0.c'] = numpy.full((2, 3), 0.9)
+        handle['mpet.partTrodecvol0part1.c'] = numpy.array([[0.1] * 3, [numpy.nan] * 3])
+
+    with h5py.File(filepath, 'r') as handle:
+        statistics = compute_particle_statistics(handle, 'mpet.', bins=2)
+
+    assert numpy.array_equal(statistics['c_histogram'], [[1, 1], [0, 1]])
+
+
+def test_compute_particle_statistics_shell_volumes(tmp_path):
+    """Test the concentrations of spherical particles are averaged with the volumes of the shells."""
+    import h5py
+
+    filepath = str(tmp_path / 'output_data.hdf5')
+    concentrations = numpy.linspace(0, 1, 5)
+
+    with h5py.File(filepath, 'w') as handle:
+        handle['mpet.partTrodecvol0part0.c'] = concentrations[None, :] * numpy.ones((3, 1))
+
+    weights = get_shell_volumes('sphere', 5)
+    assert numpy.isclose(weights.sum(), 1.)
+    assert weights[0] < weights[1] < weights[2]
+    assert get_shell_volumes('C3', 5) is None
+
+    with h5py.File(filepath, 'r') as handle:
+        uniform = compute_particle_statistics(handle, 'mpet.', chunk_size=2)
+        sphere = compute_particle_statistics(handle, 'mpet.', chunk_size=2, particle_shapes={'c': 'sphere'})
+
+    assert numpy.allclose(uniform['c_mean'], 0.5)
+    assert numpy.allclose(sphere['c_mean'], concentrations @ weights)
+    assert sphere['c_mean'].shape == (3,)
@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+"""Tests for the `aiida_mpet.parsers.parse_raw.pickles` module."""
+import os
+import pickle
+
+import numpy
+import pytest
+
+from aiida_mpet.parsers.parse_raw.pickles import load_pickle, split_scalars_and_arrays
+
+
+def test_load_pickle():
+    """Test that `load_pickle` loads builtin types and numpy arrays."""
+    value = {'Crate': 1.0, 'Nvol': {'c': 10, 'a': 0}, 'psd_vol': numpy.arange(3.), 'T': numpy.float64(1.)}
+    loaded = load_pickle(pickle.dumps(value))
+
+    assert loaded['Nvol'] == {'c': 10, 'a': 0}
+    assert numpy.array_equal(loaded['psd_vol'], value['psd_vol'])
+    assert loaded['T'] == 1.
+
+
+def test_load_pickle_disallowed():
+    """Test that `load_pickle` refuses to load globals that are not explicitly allowed."""
+    with pytest.raises(pickle.UnpicklingError):
+        load_pickle(pickle.dumps({'callable': os.system}))
+
+
+def test_split_scalars_and_arrays():
+    """Test `split_scalars_and_arrays`."""
+    value = {
+        'Crate': numpy.float64(1.),
+        'Nvol': {'c': 10, 'a': 0},
+        'segments': [[0., 10.], [1., 20.]],
+        'psd_vol': {'c': numpy.arange(3.)},
+        'Vmax': float('inf'),
+        'profileType': 'CC',
+    }
+    scalars, arrays = split_scalars_and_arrays(value, prefix='system_')
+
+    assert scalars == {'Crate': 1., 'Nvol': {'c': 10, 'a': 0}, 'profileType': 'CC'}
+    assert sorted(arrays) == ['system_Vmax', 'system_psd_vol_c', 'system_segments']
+    assert arrays['system_segments'].shape == (2, 2)
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+"""Tests for the `aiida_mpet.parsers.parse_raw.profiles` module."""
+import numpy
+
+from aiida_mpet.parsers.parse_raw.profiles import extract_profiles, get_snapshot_times
+
+
+def test_get_snapshot_times():
+    """Test `get_snapshot_times` for times, states of charge and values outside of the simulation."""
+    times = numpy.linspace(0., 4., 5)
+    filling_fraction = numpy.array([0.1, 0.3, 0.5, 0.7, 0.9])
+
+    snapshots, soc = get_snapshot_times(times, filling_fraction, [1.5, 10.], [0.4, 0.95])
+
+    assert numpy.allclose(snapshots, [1.5, 1.5])
+    assert numpy.allclose(soc, [0.4, 0.4])
+
+
+def test_extract_profiles(tmp_path):
+    """Test `extract_profiles` concatenates the parts of the cell and interpolates between the time steps."""
+    import h5py
+
+    filepath = str(tmp_path / 'output_data.hdf5')
+    times = numpy.linspace(0., 4., 5)
+
+    with h5py.File(filepath, 'w') as handle:
+        handle['mpet.phi_applied'] = numpy.zeros(5)
+        handle['mpet.phi_applied_times'] = times
+        handle['mpet.ffrac_c'] = times / 4.
+        handle['mpet.c_lyte_s'] = times[:, None] * numpy.ones((1, 2))
+        handle['mpet.c_lyte_c'] = 10. * times[:, None] * numpy.ones((1, 3))
+
+    with h5py.File(filepath, 'r') as handle:
+        profiles = extract_profiles(handle, snapshot_times=[5.], snapshot_soc=[0.875], t_ref=2.)
+
+    assert set(profiles) == {'snapshot_times', 'snapshot_soc', 'c_lyte'}
+    assert numpy.allclose(profiles['snapshot_times'], [5., 7.])
+    assert numpy.allclose(profiles['snapshot_soc'], [0.625, 0.875])
+    assert numpy.allclose(profiles['c_lyte'], [[2.5] * 2 + [25.] * 3, [3.5] * 2 + [35.] * 3])
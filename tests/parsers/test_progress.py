@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""Tests for the `aiida_mpet.parsers.parse_raw.progress` module."""
+import json
+import subprocess
+import sys
+
+import numpy
+import pytest
+
+from aiida_mpet.parsers.parse_raw.progress import get_remote_read_command, read_appended_time_series
+
+
+@pytest.fixture
+def filepath(tmp_path):
+    """Return the path of an output data file of which the last two time steps were not flushed yet."""
+    import h5py
+
+    filepath = str(tmp_path / 'output_data.hdf5')
+
+    with h5py.File(filepath, 'w') as handle:
+        handle['mpet.phi_applied_times'] = numpy.r_[numpy.linspace(0, 1, 10), 0., 0.]
+        handle['mpet.phi_applied'] = numpy.arange(12.)
+        handle['mpet.current'] = numpy.ones(12)
+        handle['mpet.ffrac_c'] = numpy.arange(11.)
+
+    return filepath
+
+
+def test_read_appended_time_series(filepath):
+    """Test only the complete time steps beyond the offset are read."""
+    import h5py
+
+    with h5py.File(filepath, 'r') as handle:
+        length, arrays = read_appended_time_series(handle)
+        assert length == 10
+        assert sorted(arrays) == ['current', 'ffrac_c', 'phi_applied', 'times']
+        numpy.testing.assert_array_equal(arrays['phi_applied'], numpy.arange(10.))
+
+        length, arrays = read_appended_time_series(handle, offset=7)
+        assert length == 10
+        numpy.testing.assert_array_equal(arrays['phi_applied'], [7., 8., 9.])
+
+        length, arrays = read_appended_time_series(handle, offset=10)
+        assert length == 10
+        assert all(values.size == 0 for values in arrays.values())
+
+        # An offset beyond the end of the file means it was rewritten
+        length, arrays = read_appended_time_series(handle, offset=20)
+        assert length < 20
+        assert all(values.size == 0 for values in arrays.values())
+
+
+def test_get_remote_read_command(filepath):
+    """Test the remote read command prints the appended time steps as JSON."""
+    command = get_remote_read_command(filepath, offset=8, python=sys.executable)
+    result = json.loads(subprocess.run(command, shell=True, check=True, capture_output=True, text=True).stdout)
+
+    assert result['length'] == 10
+    assert result['arrays']['phi_applied'] == [8., 9.]
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""Tests for the `aiida_mpet.parsers.parse_raw.reporters` module."""
+import numpy
+import pytest
+
+from aiida_mpet.parsers.parse_raw.output_data import parse_output_data
+from aiida_mpet.parsers.parse_raw.reporters import get_data_reporter, get_output_data_filename, open_output_data
+
+
+def test_get_data_reporter():
+    """Test `get_data_reporter` and `get_output_data_filename`."""
+    assert get_data_reporter({}) == 'hdf5'
+    assert get_data_reporter({'Sim Params': {'dataReporter': 'mat'}}) == 'mat'
+    assert get_output_data_filename('hdf5Fast') == 'output_data.hdf5'
+    assert get_output_data_filename('mat') == 'output_data.mat'
+
+    with pytest.raises(ValueError):
+        get_data_reporter({'Sim Params': {'dataReporter': 'csv'}})
+
+
+@pytest.mark.parametrize('reporter', ('hdf5', 'mat'))
+def test_open_output_data(tmp_path, reporter):
+    """Test the readers of the different data reporters expose the same datasets and shapes."""
+    data = {
+        'mpet.phi_applied': numpy.linspace(0., -1., 4),
+        'mpet.phi_applied_times': numpy.arange(4.),
+        'mpet.current': numpy.ones(4),
+        'mpet.c_lyte_c': numpy.arange(12.).reshape(4, 3),
+    }
+    filepath = str(tmp_path / get_output_data_filename(reporter))
+
+    if reporter == 'mat':
+        io = pytest.importorskip('scipy.io')
+        io.savemat(filepath, data)
+    else:
+        import h5py
+        with h5py.File(filepath, 'w') as handle:
+            for name, value in data.items():
+                handle[name] = value
+
+    with open_output_data(filepath, reporter) as handle:
+        assert set(handle) == set(data)
+        assert handle['mpet.current'].shape == (4,)
+        assert handle['mpet.c_lyte_c'].ndim == 2
+        assert numpy.array_equal(handle['mpet.c_lyte_c'][[1, 3]], data['mpet.c_lyte_c'][[1, 3]])
+
+    parsed_data, arrays = parse_output_data(filepath, reporter)
+    assert parsed_data['number_of_time_steps'] == 4
+    assert numpy.allclose(arrays['phi_applied'], data['mpet.phi_applied'])
+
+
+def test_open_output_data_truncated(tmp_path):
+    """Test `open_output_data` recovers the data of an HDF5 file that was truncated when MPET was killed."""
+    import h5py
+
+    filepath = tmp_path / 'output_data.hdf5'
+
+    with h5py.File(filepath, 'w') as handle:
+        handle['mpet.phi_applied'] = numpy.arange(10.)
+        handle['mpet.c_lyte_c'] = numpy.ones((10000, 4))
+
+    content = filepath.read_bytes()
+    filepath.write_bytes(content[:len(content) // 2])
+
+    with pytest.raises(OSError):
+        h5py.File(filepath, 'r')
+
+    with open_output_data(str(filepath)) as handle:
+        assert numpy.array_equal(handle['mpet.phi_applied'][()], numpy.arange(10.))
+        assert handle['mpet.c_lyte_c'][-1].tolist() == [0.] * 4
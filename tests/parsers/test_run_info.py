@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+"""Tests for the `aiida_mpet.parsers.parse_raw.run_info` module."""
+import io
+
+from aiida_mpet.parsers.parse_raw.run_info import add_integration_time, parse_run_info
+
+RUN_INFO = """\
+mpet version:
+0.1.7
+
+branch name:
+master
+commit hash: 0123abcd
+daetools version: 1.9.0
+
+Total run time: 123.5 s
+"""
+
+
+def test_parse_run_info():
+    """Test values on the same line as their key and on the following line are parsed."""
+    assert parse_run_info(io.StringIO(RUN_INFO)) == {
+        'mpet_version': '0.1.7',
+        'mpet_branch': 'master',
+        'mpet_commit': '0123abcd',
+        'daetools_version': '1.9.0',
+        'wall_time_seconds': 123.5,
+    }
+
+
+def test_parse_run_info_incomplete():
+    """Test the run time is missing if the simulation was interrupted."""
+    assert parse_run_info('mpet version:\n0.1.7\n') == {'mpet_version': '0.1.7'}
+
+
+def test_add_integration_time():
+    """Test the integration time is the wall time minus the setup time from the stdout, if both are known."""
+    assert add_integration_time({'wall_time_seconds': 10.}, {'setup_time_seconds': 2.5}) == {
+        'wall_time_seconds': 10.,
+        'integration_time_seconds': 7.5,
+    }
+    assert add_integration_time({}, {'wall_time_seconds': 10., 'setup_time_seconds': 2.5}) == {
+        'integration_time_seconds': 7.5
+    }
+    assert add_integration_time({'wall_time_seconds': 10.}, {}) == {'wall_time_seconds': 10.}
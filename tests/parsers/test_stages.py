@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""Tests for the `aiida_mpet.parsers.parse_raw.stages` module."""
+import os
+
+import numpy
+import pytest
+
+from aiida_mpet.parsers.parse_raw.output_data import parse_output_data
+from aiida_mpet.parsers.parse_raw.stages import StageWorkerError, compute_cell_results, run_stage, summarize_output_data
+
+
+@pytest.fixture
+def filepath(tmp_path):
+    """Return the path of an output data file of a constant current discharge."""
+    import h5py
+
+    filepath = str(tmp_path / 'output_data.hdf5')
+
+    with h5py.File(filepath, 'w') as handle:
+        handle['mpet.phi_applied_times'] = numpy.linspace(0, 1, 101)
+        handle['mpet.phi_applied'] = numpy.linspace(0, 40, 101)
+        handle['mpet.current'] = numpy.ones(101)
+        handle['mpet.ffrac_c'] = numpy.linspace(0.1, 0.9, 101)
+
+    return filepath
+
+
+def test_compute_cell_results(filepath):
+    """Test `compute_cell_results` returns the metrics and downsampled curves of the requested time steps."""
+    derived_values = {'t_ref': 3600., 'phiRef': {'c': -140.}, 'cap': {'c': 72000.}}
+
+    metrics, curves = compute_cell_results(filepath, 'hdf5', derived_values, (2.5, None), downsample_points=20)
+
+    assert metrics['capacity'] == pytest.approx(0.8 * 72000. / 36000.)
+    assert metrics['last_valid_time'] == pytest.approx(3600.)
+    assert sorted(curves) == ['voltage_capacity', 'voltage_time']
+    assert all(len(values) == 20 for curve in curves.values() for values in curve)
+
+    metrics, curves = compute_cell_results(filepath, 'hdf5', derived_values, stop=51)
+    assert metrics['capacity'] == pytest.approx(0.4 * 72000. / 36000.)
+    assert metrics['last_valid_time'] == pytest.approx(1800.)
+    assert curves == {}
+
+    with pytest.raises(KeyError):
+        compute_cell_results(filepath, 'hdf5', {})
+
+
+@pytest.mark.parametrize('size', (0, 1))
+def test_run_stage(filepath, size):
+    """Test `run_stage` returns the same result in the calling process and in a worker process."""
+    parsed_data, arrays = run_stage(size, parse_output_data, filepath)
+
+    assert parsed_data['number_of_time_steps'] == 101
+    numpy.testing.assert_array_equal(arrays['ffrac_c'], numpy.linspace(0.1, 0.9, 101))
+
+
+def test_summarize_output_data(filepath):
+    """Test `summarize_output_data` only returns the scalar results of the output data file."""
+    assert summarize_output_data(filepath, 'hdf5') == {
+        'number_of_time_steps': 101,
+        'final_time': 1.,
+        'truncated': False,
+    }
+
+
+def test_run_stage_worker_died():
+    """Test `run_stage` raises instead of running the stage in the calling process if the worker process died."""
+    # Terminate the worker process abruptly, like the operating system does when it runs out of memory
+    with pytest.raises(StageWorkerError):
+        run_stage(1, os._exit, 1)  # pylint: disable=protected-access
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""Tests for the `aiida_mpet.parsers.parse_raw.study` module."""
+import io
+
+import pytest
+
+from aiida_mpet.parsers.parse_raw.study import parse_stdout
+
+STDOUT_COMPLETE = """\
+Warning: the particle size distribution is truncated
+Time at Day 0, 00:01:02
+Total time: 12.5 s
+"""
+
+STDOUT_FAILED = """\
+convergence test failed repeatedly or with |h| = hmin
+Traceback (most recent call last):
+  File "mpetrun.py", line 10, in <module>
+    main()
+RuntimeError: The solver failed
+"""
+
+
+def test_parse_stdout_complete():
+    """Test the completion marker, the wall time and warnings are parsed from a file handle."""
+    parsed_data, logs = parse_stdout(io.StringIO(STDOUT_COMPLETE))
+
+    assert parsed_data == {'completed': True, 'wall_time_seconds': 12.5}
+    assert logs.warning == ['Warning: the particle size distribution is truncated']
+    assert logs.error == []
+
+
+def test_parse_stdout_failed():
+    """Test the solver failure and the exception of a traceback are detected in an incomplete stdout."""
+    parsed_data, logs = parse_stdout(STDOUT_FAILED)
+
+    assert parsed_data == {}
+    assert 'ERROR_SOLVER_CONVERGENCE' in logs.error
+    assert 'ERROR_OUTPUT_STDOUT_INCOMPLETE' in logs.error
+    assert 'RuntimeError: The solver failed' in logs.error
+
+
+@pytest.mark.parametrize('line, label', (
+    ('Error: Cannot allocate memory', 'ERROR_OUT_OF_MEMORY'),
+    ('ERROR: corrector could not converge after 10 attempts', 'ERROR_SOLVER_CONVERGENCE'),
+    ('Warning: job cancelled due to time limit exceeded', 'ERROR_OUT_OF_WALLTIME'),
+))
+def test_parse_stdout_labels(line, label):
+    """Test the label of a fatal problem is added if the line also matches an error or warning."""
+    _, logs = parse_stdout(f'{line}\n')
+
+    assert logs.error == [label, line, 'ERROR_OUTPUT_STDOUT_INCOMPLETE']
+    assert logs.warning == []
+
+
+def test_parse_stdout_aggregate():
+    """Test repeated messages are kept once with their count and the lines of their first and last occurrence."""
+    stdout = io.StringIO('Warning: step reduced\n' + 'Error test failed repeatedly\n' * 100 + 'Total time: 1 s\n')
+    _, logs = parse_stdout(stdout)
+
+    assert logs.error == ['ERROR_SOLVER_CONVERGENCE', 'Error test failed repeatedly']
+    assert logs.counts['error']['Error test failed repeatedly'] == (100, 2, 101)
+    assert logs.counts['warning']['Warning: step reduced'] == (1, 1, 1)
+
+
+def test_parse_stdout_maximum_messages():
+    """Test the number of distinct messages that are kept is bounded and the labels are added only once."""
+    stdout = io.StringIO(''.join(f'Error test failed at step {index}\n' for index in range(100)) + 'Total time: 1 s\n')
+    _, logs = parse_stdout(stdout, maximum_messages=5)
+
+    assert logs.error.count('ERROR_SOLVER_CONVERGENCE') == 1
+    assert len(logs.error) == 7
+    assert logs.error[-1] == (
+        'suppressed 95 further error messages, the maximum of 5 distinct error messages was reached'
+    )
+
+
+def test_parse_stdout_telemetry():
+    """Test the version of daetools, the setup time and the solver statistics are parsed."""
+    stdout = io.StringIO(
+        'DAE Tools version 1.9.0\n'
+        'The system initialized successfully in: 2.50 s\n'
+        "{'NumSteps': 10, 'NumResEvals': 25}\n"
+        "{'NumSteps': 120, 'NumResEvals': 300, 'NumJacEvals': 12, 'NumErrTestFails': 3}\n"
+        'Total time: 12.5 s\n'
+    )
+    parsed_data, logs = parse_stdout(stdout)
+
+    assert parsed_data == {
+        'completed': True,
+        'wall_time_seconds': 12.5,
+        'daetools_version': '1.9.0',
+        'setup_time_seconds': 2.5,
+        'integrator_steps': 120,
+        'residual_evaluations': 300,
+        'jacobian_evaluations': 12,
+        'error_test_failures': 3,
+    }
+    assert logs.error == []
@@ -1,47 +1,112 @@
 # -*- coding: utf-8 -*-
 # pylint: disable=invalid-name,redefined-outer-name
 """Tests for the `MpetrunParser`."""
+import json
+import os
+import sys
+import tempfile
+
+import numpy
 import pytest
 
 from aiida import orm
 from aiida.common import AttributeDict
 
+from aiida_mpet.parsers.parse_raw.pickles import INPUT_DICT_NAMES
+from aiida_mpet.utils import admission, caching
+
 
 @pytest.fixture
-def generate_inputs(generate_structure):
+def generate_inputs():
     """Return only those inputs that the parser will expect to be there."""
 
-    def _generate_inputs(parameters=None, settings=None, metadata=None):
-        #TODO
-        parameters = {'CONTROL': {'calculation': calculation_type}, **(parameters or {})}
+    def _generate_inputs(parameters=None, parser_options=None):
+        parameters = {'Sim Params': {'dataReporter': 'hdf5', 'Vmin': 2.5, 'Vmax': 4.5}, **(parameters or {})}
 
         return AttributeDict({
             'parameters': orm.Dict(dict=parameters),
-            'settings': orm.Dict(dict=settings),
-            'metadata': metadata or {}
+            'cathode_parameters': orm.Dict(dict={'Particles': {'type': 'ACR', 'shape': 'C3'}}),
+            'anode_parameters': orm.Dict(dict={}),
+            'settings': orm.Dict(dict={'parser_options': parser_options or {}}),
         })
 
     return _generate_inputs
 
 
-def test_mpetrun_default(fixture_localhost, generate_calc_job_node, generate_parser, generate_inputs, data_regression):
-    """Test a `mpet` calculation.
+def test_mpetrun_interrupted(
+    fixture_localhost, generate_calc_job_node, generate_parser, generate_inputs, monkeypatch, tmp_path
+):
+    """Test a `mpetrun` calculation that was cancelled by the scheduler because it ran out of walltime.
 
-    The output is created by running a dead simple mpetrun.
+    The output data of the time steps that were written before the interruption is parsed and attached, the memory of
+    parsing it is admitted within the budget of the machine and the stages of the parser are profiled.
     """
-    name = 'default'
+    name = 'interrupted'
     entry_point_calc_job = 'mpet.mpetrun'
     entry_point_parser = 'mpet.mpetrun'
 
-    node = generate_calc_job_node(entry_point_calc_job, fixture_localhost, name, generate_inputs())
+    dirpath_ledger = tmp_path / 'ledger'
+    dirpath_ledger.mkdir()
+    monkeypatch.setattr(tempfile, 'tempdir', str(dirpath_ledger))
+    monkeypatch.setenv(admission.MEMORY_BUDGET_VARIABLE, '1')
+
+    dirpath_temporary = tmp_path / 'retrieved_temporary'
+    dirpath_temporary.mkdir()
+    filenames = [f'input_dict_{dict_name}.p' for dict_name in INPUT_DICT_NAMES]
+    attributes = {'retrieve_temporary_list': filenames}
+    parser_options = {'include_arrays': True, 'profile_memory': True}
+    inputs = generate_inputs(parser_options=parser_options)
+
+    node = generate_calc_job_node(
+        entry_point_calc_job, fixture_localhost, name, inputs, attributes, (str(dirpath_temporary), filenames)
+    )
     parser = generate_parser(entry_point_parser)
-    results, calcfunction = parser.parse_from_node(node, store_provenance=False)
+    results, calcfunction = parser.parse_from_node(
+        node, store_provenance=False, retrieved_temporary_folder=str(dirpath_temporary)
+    )
 
     assert calcfunction.is_finished, calcfunction.exception
-    assert calcfunction.is_finished_ok, calcfunction.exit_message
-    assert not orm.Log.objects.get_logs_for(node), [log.message for log in orm.Log.objects.get_logs_for(node)]
-    assert 'output_parameters' in results
+    assert calcfunction.is_failed, calcfunction.exit_status
+    assert calcfunction.exit_status == node.process_class.exit_codes.ERROR_OUTPUT_DATA_PARTIAL.status
+    assert sorted(results) == [
+        'output_arrays', 'output_parameters', 'simulation_parameters', 'voltage_capacity', 'voltage_time'
+    ]
+
+    output_parameters = results['output_parameters'].get_dict()
+    assert output_parameters['out_of_walltime'] is True
+    assert output_parameters['number_of_time_steps'] == 21
+    assert output_parameters['last_valid_time'] == pytest.approx(3600.)
+    assert output_parameters['capacity'] == pytest.approx(1.6)
+    assert output_parameters['mpet_version'] == '0.1.7'
+    assert output_parameters['setup_time_seconds'] == pytest.approx(2.5)
+    assert results['simulation_parameters'].get_dict()['derived_values']['t_ref'] == pytest.approx(3600.)
+
+    output_arrays = results['output_arrays']
+    times = numpy.linspace(0, 1, 21)
+    numpy.testing.assert_allclose(output_arrays.get_array('time'), times * 3600.)
+    assert output_arrays.get_attribute(caching.TIME_AXIS_HASH_ATTRIBUTE) == caching.get_array_hash(times)
+    assert output_arrays.get_attribute(caching.TIME_AXIS_T_REF_ATTRIBUTE) == pytest.approx(3600.)
+
+    # The reservation that exceeds the budget on its own is admitted, because nothing else is in flight, and released
+    ledger = os.path.join(admission.get_ledger_directory(), admission.LEDGER_FILENAME)
+    with open(ledger, 'r', encoding='utf-8') as handle:
+        assert json.load(handle) == {}
+
+    stages = node.get_extra(parser.PROFILE_EXTRA_KEY)
+    expected = ['total', 'stdout', 'output_data', 'output_data.kpis', 'output_data.node_creation', 'node_creation']
+    assert set(expected).issubset(stages)
+    assert all(stage['wall_time_seconds'] >= 0 for stage in stages.values())
+
+    if sys.version_info >= (3, 9):
+        assert all('peak_memory_bytes' in stage for stage in stages.values())
+
+
+def test_build_output_parameters(generate_parser):
+    """Test that `build_output_parameters` merges the parsed data but only keeps the scalar values."""
+    parser = generate_parser('mpet.mpetrun')
+    parameters = parser.build_output_parameters({'capacity': 1., 'voltages': [3.4, 3.3]}, {
+        'capacity': 2.,
+        'done': True
+    })
 
-    data_regression.check({
-        'output_parameters': results['output_parameters'].get_dict()
-    })
\ No newline at end of file
+    assert parameters == {'capacity': 2., 'done': True}
@@ -1,17 +1,43 @@
 # -*- coding: utf-8 -*-
 """Tests for immigrating `MpetrunCalculation`s."""
 import os
+import shutil
 
-import numpy as np
+import h5py
+import numpy
+import pytest
 
-from aiida_mpet.tools.mpetruninputparser import create_builder_from_file
+from aiida_mpet.calculations.helpers import MPETInputValidationError
+from aiida_mpet.tools.immigrate import _process_folder, find_run_folders, immigrate_folders, reconstruct_parameters
+from aiida_mpet.tools.mpetruninputparser import MpetrunInputFile, create_builder_from_file
+from aiida_mpet.utils.validation.parameters import ELECTRODE_KEYWORDS, SYSTEM_KEYWORDS
 
 
-def test_create_builder(fixture_sandbox, fixture_code, generate_calc_job, filepath_tests):
-    """Test the `create_builder_from_file` method that parses an existing `mpet` folder into a process builder.
+@pytest.fixture
+def generate_run_folder(tmp_path, filepath_tests):
+    """Return a factory that creates an MPET output folder from the output files of the `interrupted` parser fixture."""
+
+    def _generate_run_folder(name, truncated=False, stdout=False):
+        source = os.path.join(filepath_tests, 'parsers', 'fixtures', 'mpetrun', 'interrupted')
+        folder = tmp_path / 'runs' / name / 'sim_output'
+        shutil.copytree(source, str(folder), ignore=None if stdout else shutil.ignore_patterns('aiida.out'))
+
+        # Append a time step with a time that does not increase, like the incomplete time step of an interrupted run
+        if truncated:
+            with h5py.File(str(folder / 'output_data.hdf5'), 'r') as handle:
+                datasets = {key: handle[key][()] for key in handle}
+
+            with h5py.File(str(folder / 'output_data.hdf5'), 'w') as handle:
+                for key, value in datasets.items():
+                    handle.create_dataset(key, data=numpy.append(value, 0.))
+
+        return str(folder)
 
-    The input file used is the one generated for `tests.calculations.test_mpetrun.test_mpetrun_default`.
-    """
+    return _generate_run_folder
+
+
+def test_create_builder(fixture_sandbox, fixture_code, generate_calc_job, filepath_tests):
+    """Test the `create_builder_from_file` method that parses an existing set of MPET configuration files."""
     entry_point_name = 'mpet.mpetrun'
     code = fixture_code(entry_point_name)
 
@@ -27,27 +53,116 @@ def test_create_builder(fixture_sandbox, fixture_code, generate_calc_job, filepa
         }
     }
 
-    in_folderpath = os.path.join(filepath_tests, 'calculations', 'test_mpetrun')
+    in_folderpath = os.path.join(filepath_tests, 'tools', 'fixtures', 'mpetrun', 'default')
 
-    builder = create_builder_from_file(in_folderpath, 'test_mpetrun_default.in', code, metadata)
+    builder = create_builder_from_file(in_folderpath, 'params_system.cfg', code, metadata)
 
     # In certain versions of `aiida-core` the builder comes with the `stash` namespace by default.
     builder['metadata']['options'].pop('stash', None)
 
     assert builder['code'] == code
     assert builder['metadata'] == metadata
-    
-    #TODO
-    assert builder['parameters'].get_dict() == {
-        'CONTROL': {
-            'calculation': 'scf',
-            'verbosity': 'high'
-        },
-        'SYSTEM': {
-            'ecutrho': 240.0,
-            'ecutwfc': 30.0,
-            'ibrav': 0,
-        }
-    }
+
+    parameters = builder['parameters'].get_dict()
+    assert parameters['Sim Params']['Crate'] == 1.0
+    assert isinstance(parameters['Sim Params']['Crate'], float)
+    assert parameters['Sim Params']['tsteps'] == 200
+    assert parameters['Sim Params']['prevDir'] is False
+    assert parameters['Sim Params']['segments'] == '[(0.3,0.4),(-0.5,0.1)]'
+    assert parameters['Electrodes']['k0_foil'] == 1.0
+    assert parameters['Electrodes']['cathode'] == 'aiida_c.in'
+    assert parameters['Electrodes']['anode'] == 'aiida_a.in'
+
+    assert builder['cathode_parameters'].get_dict()['Material']['muRfunc'] == 'LiFePO4'
+    assert builder['anode_parameters'].get_dict()['Reactions']['k0'] == 30.0
 
     generate_calc_job(fixture_sandbox, entry_point_name, builder)
+
+
+def test_invalid_value():
+    """Test that a value that does not match the type of a known keyword raises."""
+    with pytest.raises(MPETInputValidationError):
+        MpetrunInputFile('[Sim Params]\ntsteps = many\n', SYSTEM_KEYWORDS)
+
+
+def test_reconstruct_parameters():
+    """Test `reconstruct_parameters` for the flat dictionaries pickled by MPET."""
+    import numpy
+
+    flat = {'Crate': numpy.float64(1.0), 'Nvol': {'c': 10, 's': 5, 'a': 0}, 'c0': 1000, 'psd_num': numpy.ones(3)}
+    parameters, skipped = reconstruct_parameters(flat, SYSTEM_KEYWORDS)
+
+    assert parameters == {
+        'Sim Params': {'Crate': 1.0, 'Nvol_c': 10, 'Nvol_s': 5, 'Nvol_a': 0},
+        'Electrolyte': {'c0': 1000},
+    }
+    assert isinstance(parameters['Sim Params']['Crate'], float)
+    assert skipped == ['psd_num']
+
+    parameters, skipped = reconstruct_parameters({'type': 'ACR', 'k0': 1.6, 'unknown': 1}, ELECTRODE_KEYWORDS)
+    assert parameters == {'Particles': {'type': 'ACR'}, 'Reactions': {'k0': 1.6}}
+    assert skipped == ['unknown']
+
+
+def test_find_run_folders(tmp_path):
+    """Test `find_run_folders` only returns folders with all pickled input dictionaries."""
+    for name, filenames in (('complete', ('system', 'cathode', 'anode')), ('incomplete', ('system',))):
+        folder = tmp_path / 'runs' / name / 'sim_output'
+        folder.mkdir(parents=True)
+        for filename in filenames:
+            (folder / f'input_dict_{filename}.p').write_bytes(b'')
+
+    assert find_run_folders(str(tmp_path)) == [str(tmp_path / 'runs' / 'complete' / 'sim_output')]
+
+
+def test_process_folder(generate_run_folder):
+    """Test `_process_folder` parses the output parameters like the `MpetrunParser` and detects partial runs."""
+    result = _process_folder(generate_run_folder('complete'))
+    parsed_stdout, parsed_run_info, parsed_output_data = result['parsed_data']
+
+    assert 'error' not in result
+    assert result['partial'] is False
+    assert parsed_stdout == {}
+    assert parsed_run_info['mpet_version'] == '0.1.7'
+    assert parsed_output_data['number_of_time_steps'] == 21
+    assert parsed_output_data['last_valid_time'] == pytest.approx(3600.)
+    assert parsed_output_data['capacity'] == pytest.approx(1.6)
+
+    result = _process_folder(generate_run_folder('truncated', truncated=True))
+
+    assert result['partial'] is True
+    assert result['parsed_data'][2]['truncated'] is True
+    assert result['parsed_data'][2]['last_valid_time'] == pytest.approx(3600.)
+    assert any('was truncated' in warning for warning in result['warnings'])
+
+    result = _process_folder(generate_run_folder('interrupted', stdout=True), stdout_filename='aiida.out')
+
+    assert result['partial'] is True
+    assert result['parsed_data'][0]['out_of_walltime'] is True
+    assert 'aiida.out' in result['retrieved_filenames']
+
+
+def test_immigrate_folders(fixture_code, generate_run_folder, tmp_path):
+    """Test `immigrate_folders` creates a node per distinct run and skips the runs that were already immigrated."""
+    from aiida.plugins import CalculationFactory
+
+    MpetrunCalculation = CalculationFactory('mpet.mpetrun')
+    code = fixture_code('mpet.mpetrun').store()
+
+    generate_run_folder('complete')
+    generate_run_folder('duplicate')
+    generate_run_folder('truncated', truncated=True)
+
+    nodes = immigrate_folders(str(tmp_path), code, processes=1)
+    exit_statuses = sorted(node.exit_status for node in nodes)
+
+    assert exit_statuses == [0, MpetrunCalculation.exit_codes.ERROR_OUTPUT_DATA_PARTIAL.status]
+    assert all(node.is_sealed for node in nodes)
+
+    for node in nodes:
+        output_parameters = node.outputs.output_parameters.get_dict()
+        assert output_parameters['last_valid_time'] == pytest.approx(3600.)
+        assert output_parameters['mpet_version'] == '0.1.7'
+        assert 'output_data.hdf5' in node.outputs.retrieved.list_object_names()
+
+    assert immigrate_folders(str(tmp_path), code, processes=1) == []
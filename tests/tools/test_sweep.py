@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""Tests for the :py:mod:`~aiida_mpet.tools.sweep` module."""
+import pytest
+
+from aiida import orm
+from aiida.common import exceptions
+from aiida.plugins import CalculationFactory
+
+from aiida_mpet.tools.sweep import ConfigTemplate, SweepBuilderFactory
+
+MpetrunCalculation = CalculationFactory('mpet.mpetrun')
+SECTIONS = MpetrunCalculation._automatic_namelists['default']  # pylint: disable=protected-access
+
+
+@pytest.fixture
+def parameters():
+    """Return a minimal set of system parameters."""
+    return {
+        'Sim Params': {'profileType': 'CC', 'Crate': 1, 'tend': 1.2e3, 'tsteps': 200},
+        'Electrodes': {'cathode': 'aiida_c.in', 'anode': 'aiida_a.in'},
+    }
+
+
+def test_config_template(parameters):
+    """Test that the template renders the same content as the calculation for the merged parameters."""
+    template = ConfigTemplate(parameters, SECTIONS)
+    overrides = {'Sim Params': {'Crate': 2}, 'Geometry': {'L_c': 50e-6}}
+
+    # pylint: disable=protected-access
+    expected = MpetrunCalculation._generate_MPETRUNinputdata(orm.Dict(dict=template.merge(overrides)), {})
+
+    assert template.render(overrides) == expected
+    assert template.parameters['Sim Params']['Crate'] == 1
+
+    with pytest.raises(exceptions.InputValidationError):
+        template.render({'Unknown': {}})
+
+
+def test_iter_builders(fixture_code, parameters):
+    """Test that the factory yields a builder for each point and reuses the base nodes."""
+    code = fixture_code('mpet.mpetrun').store()
+    electrode = {'Particles': {'type': 'ACR'}}
+    factory = SweepBuilderFactory(code, parameters, electrode, electrode, processes=0, window=2)
+    overrides = [{'parameters': {'Sim Params': {'Crate': crate}}} for crate in (1, 2, 3)]
+
+    builders = list(factory.iter_builders(overrides))
+
+    assert len(builders) == 3
+    assert [builder.parameters['Sim Params']['Crate'] for builder in builders] == [1, 2, 3]
+    assert len({builder.cathode_parameters.uuid for builder in builders}) == 1
+
+    rendered = list(factory.iter_rendered(overrides))
+    assert sorted(rendered[0]) == ['aiida.in', 'aiida_a.in', 'aiida_c.in']
+    assert 'Crate = 3' in rendered[2]['aiida.in']
+
+
+def test_iter_rendered_interleaved(fixture_code, parameters):
+    """Test that interleaving the generators of two factories in the current interpreter keeps their templates."""
+    code = fixture_code('mpet.mpetrun')
+    electrode = {'Particles': {'type': 'ACR'}}
+    other = {**parameters, 'Sim Params': {**parameters['Sim Params'], 'tsteps': 400}}
+    factory = SweepBuilderFactory(code, parameters, electrode, electrode, processes=0, window=1)
+    factory_other = SweepBuilderFactory(code, other, electrode, electrode, processes=0, window=1)
+    overrides = [{'parameters': {'Sim Params': {'Crate': crate}}} for crate in (1, 2)]
+
+    rendered = factory.iter_rendered(overrides)
+    rendered_other = factory_other.iter_rendered(overrides)
+
+    for _ in overrides:
+        assert 'tsteps = 200' in next(rendered)['aiida.in']
+        assert 'tsteps = 400' in next(rendered_other)['aiida.in']
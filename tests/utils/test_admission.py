@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""Tests for the `aiida_mpet.utils.admission` module."""
+import json
+
+import pytest
+
+from aiida_mpet.utils import admission
+
+
+def read_ledger(directory):
+    """Return the sizes of the reservations in the ledger in the given directory."""
+    with open(directory / admission.LEDGER_FILENAME, encoding='utf-8') as handle:
+        return sorted(value['size'] for value in json.load(handle).values())
+
+
+def test_get_memory_budget(monkeypatch):
+    """Test `get_memory_budget` and `estimate_decode_size`."""
+    monkeypatch.delenv(admission.MEMORY_BUDGET_VARIABLE, raising=False)
+    assert admission.get_memory_budget() is None
+
+    monkeypatch.setenv(admission.MEMORY_BUDGET_VARIABLE, '1024')
+    assert admission.get_memory_budget() == 1024
+
+    monkeypatch.setenv(admission.MEMORY_BUDGET_VARIABLE, '0')
+    assert admission.get_memory_budget() is None
+
+    monkeypatch.setenv(admission.MEMORY_BUDGET_VARIABLE, 'a lot')
+    with pytest.raises(ValueError):
+        admission.get_memory_budget()
+
+    assert admission.estimate_decode_size(100, 'hdf5') == 200
+    assert admission.estimate_decode_size(100, 'mat') == 300
+
+
+def test_memory_admission(tmp_path):
+    """Test reservations are admitted while they fit in the budget and released when the context is exited."""
+    with admission.memory_admission(6, budget=10, directory=str(tmp_path)) as waited:
+        assert waited < 1
+        assert read_ledger(tmp_path) == [6]
+
+        with admission.memory_admission(4, budget=10, directory=str(tmp_path)):
+            assert read_ledger(tmp_path) == [4, 6]
+
+        # A reservation that does not fit is only admitted once the timeout expired
+        with admission.memory_admission(8, budget=10, directory=str(tmp_path), timeout=0.1, interval=0.05) as waited:
+            assert waited >= 0.1
+            assert read_ledger(tmp_path) == [6, 8]
+
+    assert read_ledger(tmp_path) == []
+
+    # A reservation larger than the budget is admitted when nothing else is in flight
+    with admission.memory_admission(20, budget=10, directory=str(tmp_path)):
+        assert read_ledger(tmp_path) == [20]
+
+        # Without blocking, a reservation that does not fit is admitted after a single attempt
+        with admission.memory_admission(8, budget=10, directory=str(tmp_path), blocking=False) as waited:
+            assert waited < 1
+            assert read_ledger(tmp_path) == [8, 20]
+
+
+def test_memory_admission_inaccessible(tmp_path):
+    """Test the memory is admitted if the ledger cannot be accessed."""
+    directory = str(tmp_path / 'missing')
+
+    with admission.memory_admission(10, budget=10, directory=directory) as waited:
+        assert waited < 1
+
+
+def test_memory_admission_stale(tmp_path):
+    """Test reservations of processes that no longer exist are dropped."""
+    with open(tmp_path / admission.LEDGER_FILENAME, 'w', encoding='utf-8') as handle:
+        json.dump({'stale': {'pid': 2**22 + 1, 'size': 10}}, handle)
+
+    with admission.memory_admission(10, budget=10, directory=str(tmp_path), timeout=1):
+        assert read_ledger(tmp_path) == [10]
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""Tests for the :py:mod:`~aiida_mpet.utils.caching` module."""
+import numpy
+import pytest
+
+from aiida import orm
+from aiida.engine import ProcessState
+
+from aiida_mpet.utils import caching
+
+
+def generate_candidate(crate=1):
+    """Return a candidate parameter set with the given C-rate."""
+    return {
+        'parameters': {'Sim Params': {'Crate': crate}},
+        'cathode_parameters': {'Particles': {'type': 'ACR'}},
+        'anode_parameters': {'Particles': {'type': 'CHR'}},
+    }
+
+
+def test_get_input_hashes():
+    """Test that `get_input_hashes` accepts plain dictionaries and `Dict` nodes interchangeably."""
+    candidate = generate_candidate()
+    hashes = caching.get_input_hashes(candidate)
+
+    assert set(hashes) == set(caching.HASHED_INPUT_PORTS)
+    assert hashes == caching.get_input_hashes({key: orm.Dict(dict=value) for key, value in candidate.items()})
+    assert caching.get_canonical_input_hash(candidate) != caching.get_canonical_input_hash(generate_candidate(2))
+
+    with pytest.raises(ValueError):
+        caching.get_input_hashes({'parameters': {}})
+
+
+@pytest.mark.usefixtures('clear_database_before_test')
+def test_get_cached_calculations(fixture_localhost, generate_calc_job_node):
+    """Test that only the candidates without a successfully finished calculation are returned as pending."""
+    candidates = [generate_candidate(crate) for crate in (1, 2, 3)]
+
+    for crate, exit_status in ((1, 0), (2, 300)):
+        inputs = {key: orm.Dict(dict=value) for key, value in generate_candidate(crate).items()}
+        node = generate_calc_job_node('mpet.mpetrun', fixture_localhost, inputs=inputs)
+        node.set_process_state(ProcessState.FINISHED)
+        node.set_exit_status(exit_status)
+
+        if exit_status == 0:
+            computed = node
+
+    pending, cached = caching.get_cached_calculations(candidates)
+
+    assert pending == [1, 2]
+    assert list(cached) == [0]
+    assert cached[0].uuid == computed.uuid
+
+
+@pytest.mark.usefixtures('clear_database_before_test')
+def test_get_interned_dicts():
+    """Test that identical dictionaries are interned onto a single stored `Dict` node."""
+    existing = orm.Dict(dict={'Particles': {'type': 'ACR'}}).store()
+
+    first, second, third = caching.get_interned_dicts([{'Particles': {'type': 'ACR'}}] * 2 + [{'Material': {}}])
+
+    assert first.uuid == second.uuid == existing.uuid
+    assert third.is_stored
+    assert caching.get_interned_dict({'Material': {}}).uuid == third.uuid
+
+
+@pytest.mark.usefixtures('clear_database_before_test')
+def test_get_interned_dicts_outputs(fixture_localhost, generate_calc_job_node):
+    """Test that a `Dict` node created by a calculation is not reused as an input."""
+    from aiida.common.links import LinkType
+
+    node = generate_calc_job_node('mpet.mpetrun', fixture_localhost)
+    output = orm.Dict(dict={'capacity': 1.})
+    output.add_incoming(node, link_type=LinkType.CREATE, link_label='output_parameters')
+    output.store()
+
+    interned = caching.get_interned_dict({'capacity': 1.})
+
+    assert interned.is_stored
+    assert interned.uuid != output.uuid
+    assert not interned.get_incoming().all()
+
+
+def test_get_time_axis_attributes():
+    """Test the time axis is identified by the hash of the nondimensional times and the reference time separately."""
+    times = numpy.linspace(0, 1, 101)
+
+    assert caching.get_array_hash(times) == caching.get_array_hash(list(times))
+    assert caching.get_array_hash(times) != caching.get_array_hash(times[:-1])
+
+    attributes = caching.get_time_axis_attributes(times, 3600)
+
+    assert attributes == {
+        caching.TIME_AXIS_HASH_ATTRIBUTE: caching.get_array_hash(times),
+        caching.TIME_AXIS_T_REF_ATTRIBUTE: 3600.,
+    }
+    assert caching.get_time_axis_attributes(times.copy(), 1800)[caching.TIME_AXIS_HASH_ATTRIBUTE] == (
+        attributes[caching.TIME_AXIS_HASH_ATTRIBUTE]
+    )
@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+"""Tests for the `aiida_mpet.utils.downsampling` module."""
+import numpy
+
+from aiida_mpet.utils.downsampling import downsample_lttb, get_lttb_indices
+
+
+def test_get_lttb_indices():
+    """Test that `get_lttb_indices` keeps the end points and the cutoff of a discharge curve."""
+    x = numpy.linspace(0, 1, 100000)
+    y = numpy.where(x < 0.999, 3.4 - 0.1 * x, 3.3 - 100 * (x - 0.999))
+
+    indices = get_lttb_indices(x, y, 500)
+
+    assert len(indices) == 500
+    assert indices[0] == 0 and indices[-1] == len(x) - 1
+    assert numpy.all(numpy.diff(indices) > 0)
+    assert numpy.isclose(y[indices].min(), y.min())
+
+
+def test_downsample_lttb_short():
+    """Test that `downsample_lttb` returns curves that are shorter than the threshold unchanged."""
+    x = numpy.arange(10.)
+    x_sampled, y_sampled = downsample_lttb(x, 2 * x, 500)
+
+    assert numpy.array_equal(x_sampled, x)
+    assert numpy.array_equal(y_sampled, 2 * x)
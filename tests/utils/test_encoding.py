@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""Tests for the `aiida_mpet.utils.encoding` module."""
+import numpy
+import pytest
+
+from aiida_mpet.utils.encoding import decode_array, encode_array, get_decoded_array, set_encoded_array
+
+
+@pytest.mark.parametrize('encoding, dtype, tolerance', (
+    ('float64', numpy.float64, 0.),
+    ('float32', numpy.float32, 1e-6),
+    ('int16', numpy.int16, 1e-4),
+))
+def test_encode_array(encoding, dtype, tolerance):
+    """Test that `decode_array` inverts `encode_array` within the precision of the encoding."""
+    array = numpy.linspace(0.01, 0.99, 1000).reshape(100, 10)
+    encoded, offset, scale = encode_array(array, encoding)
+
+    assert encoded.dtype == dtype
+    assert numpy.allclose(decode_array(encoded, offset, scale), array, rtol=0, atol=tolerance)
+
+
+def test_encode_array_int16_non_finite():
+    """Test that not-a-number values and constant arrays survive the `int16` encoding."""
+    array = numpy.array([1., numpy.nan, 1.])
+    decoded = decode_array(*encode_array(array, 'int16'))
+
+    assert numpy.isnan(decoded[1])
+    assert numpy.array_equal(decoded[[0, 2]], [1., 1.])
+
+
+def test_encode_array_invalid():
+    """Test that `encode_array` raises for unsupported encodings."""
+    with pytest.raises(ValueError):
+        encode_array(numpy.ones(3), 'int8')
+
+
+@pytest.mark.usefixtures('clear_database_before_test')
+def test_get_decoded_array():
+    """Test storing a chunked array and reading back a range of it."""
+    from aiida import orm
+
+    array = numpy.random.random((25, 4))
+    array_data = orm.ArrayData()
+    set_encoded_array(array_data, 'c_lyte_c', (array[start:start + 10] for start in range(0, 25, 10)), 'float32')
+    array_data.store()
+
+    assert sorted(array_data.get_arraynames()) == ['c_lyte_c_chunk0', 'c_lyte_c_chunk1', 'c_lyte_c_chunk2']
+    assert numpy.allclose(get_decoded_array(array_data, 'c_lyte_c'), array, atol=1e-6)
+    assert numpy.allclose(get_decoded_array(array_data, 'c_lyte_c', 8, 12), array[8:12], atol=1e-6)
@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+"""Tests for the :py:mod:`~aiida_mpet.utils.profiling` module."""
+import sys
+import tracemalloc
+
+import numpy
+import pytest
+
+from aiida_mpet.utils.profiling import StageProfiler
+
+
+@pytest.mark.skipif(sys.version_info < (3, 9), reason='the peak of `tracemalloc` can only be reset from python 3.9')
+def test_stage_profiler():
+    """Test the wall time and peak memory of nested and repeated stages are recorded."""
+    profiler = StageProfiler(trace_memory=True)
+    size = 8 * 10**6
+
+    with profiler.stage('total'):
+        with profiler.stage('allocate'):
+            array = numpy.ones(size // 8)
+            del array
+
+        with profiler.stage('small'):
+            pass
+
+        with profiler.stage('small'):
+            pass
+
+    stages = profiler.get_stages()
+
+    assert sorted(stages) == ['allocate', 'small', 'total']
+    assert stages['allocate']['peak_memory_bytes'] >= size
+    assert stages['total']['peak_memory_bytes'] >= size
+    assert stages['small']['peak_memory_bytes'] < size
+    assert stages['total']['wall_time_seconds'] >= stages['allocate']['wall_time_seconds']
+    assert not tracemalloc.is_tracing()
+
+
+def test_stage_profiler_wall_time():
+    """Test only the wall time is recorded and `tracemalloc` is not started by default."""
+    profiler = StageProfiler()
+
+    with profiler.stage('total'):
+        assert not tracemalloc.is_tracing()
+
+    assert list(profiler.get_stages()['total']) == ['wall_time_seconds']